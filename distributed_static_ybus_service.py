@@ -38,18 +38,31 @@
 #-------------------------------------------------------------------------------
 
 from argparse import ArgumentParser
+from collections import deque
+import copy
+from concurrent.futures import as_completed, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 import json
 import logging
+import multiprocessing
 import os
 from pathlib import Path
+import signal
+import threading
 import time
-from typing import Dict, Optional
+import tracemalloc
+from typing import Callable, Deque, Dict, List, Optional
 
 from cimgraph.data_profile import CIM_PROFILE
 import gridappsd.field_interface.agents.agents as agents_mod
 from gridappsd.field_interface.agents import FeederAgent, SwitchAreaAgent, SecondaryAreaAgent
 from gridappsd.field_interface.interfaces import FieldMessageBus, MessageBusDefinition
 
+from sparse_ybus import SparseYbus
+from ybus_cache import areaFingerprint, DEFAULT_MAX_CACHE_BYTES, YbusCache
+from ybus_messages import DICT_FORMAT, ybusResponses, ybusSubmatrixResponse
+from ybus_contributions import YbusContributionTable
+from ybus_metrics import enableAllocationTracking, ServiceMetrics, StageTimer
 import ybus_utils as utils
 
 #TODO: query gridappsd-python for correct cim_profile instead of hardcoding it.
@@ -58,12 +71,317 @@ agents_mod.set_cim_profile(cim_profile, iec61970_301=7)
 # cim_profile = CIM_PROFILE.CIMHUB_2023.value
 # agents_mod.set_cim_profile(cim_profile, iec61970_301=8)
 cim = agents_mod.cim
-logging.basicConfig(format='%(asctime)s::%(levelname)s::%(name)s::%(filename)s::%(lineno)d::%(message)s',
-                    filename='DistributedYBus.log',
-                    filemode='w',
-                    level=logging.INFO,
-                    encoding='utf-8')
 logger = logging.getLogger(__name__)
+# set by main when YBUS_CACHE_DIR is given
+ybusCache: Optional[YbusCache] = None
+# number of areas whose CIM data is fetched at the same time during warmup
+WARMUP_FETCH_THREADS = 8
+# Ybus calculations started by requests run here instead of on the message bus callback thread
+YBUS_REQUEST_WORKERS = 4
+ybusRequestPool = ThreadPoolExecutor(max_workers=YBUS_REQUEST_WORKERS, thread_name_prefix="YbusRequest")
+# how often the supervisor checks the services' message bus connections and how many times in a row it tries to
+# reconnect one
+SUPERVISOR_CHECK_SECONDS = 30.0
+MAX_SERVICE_RESTARTS = 3
+# number of switch state updates remembered per area for YbusDelta requests
+YBUS_CHANGE_HISTORY = 1000
+
+
+def configureLogging(filemode: str = 'w'):
+    # called by main and by every warmup worker process, the workers append to the log main started
+    logging.basicConfig(format='%(asctime)s::%(levelname)s::%(name)s::%(filename)s::%(lineno)d::%(message)s',
+                        filename='DistributedYBus.log',
+                        filemode=filemode,
+                        level=logging.INFO,
+                        encoding='utf-8')
+
+
+def initializeAssemblyWorker(stageThreads: int, dumpAreas: List[str], traceAllocations: bool):
+    # spawned workers start from a fresh interpreter, so the settings main applied are passed on to them
+    configureLogging('a')
+    utils.setYbusStageThreads(stageThreads)
+    for areaID in dumpAreas:
+        utils.enableYbusDump(areaID)
+    if traceAllocations:
+        enableAllocationTracking()
+
+
+def loadOrCalculateYbus(distributedArea,
+                        agentAreaDict: Dict,
+                        assemblyPool: Optional[Executor] = None,
+                        childServices: Optional[List] = None,
+                        contributionTable: Optional[YbusContributionTable] = None,
+                        calculationStages: Optional[List[Dict]] = None) -> SparseYbus:
+    # a cache hit skips both the CIM attribute fetch and the Ybus calculation. The time spent outside of the Ybus
+    # calculation itself is added to calculationStages.
+    if calculationStages is None:
+        calculationStages = []
+    areaId = distributedArea.container.mRID
+    fingerprint = None
+    if ybusCache is not None:
+        timer = StageTimer()
+        fingerprint = areaFingerprint(agentAreaDict)
+        Ybus = ybusCache.load(areaId, fingerprint)
+        calculationStages.append({"stage": "ybusCacheLoad", **timer.stop()})
+        if Ybus is not None:
+            logger.info(f"Loaded the Ybus for area id {areaId} from the Ybus cache.")
+            return Ybus
+    if contributionTable is not None:
+        # co-located areas are views of one model wide calculation and never fetch their own CIM data
+        Ybus = contributionTable.areaYbus(areaId)
+        if ybusCache is not None:
+            ybusCache.store(areaId, fingerprint, Ybus)
+        return Ybus
+    childPool = None
+    childFutures: List[Future] = []
+    if childServices:
+        # the child areas get their own threads so they are calculated in parallel while this area fetches its own CIM
+        # data, without waiting behind the requests on ybusRequestPool or taking its workers from them
+        childPool = ThreadPoolExecutor(max_workers=len(childServices), thread_name_prefix="YbusChild")
+        childFutures = [submitYbusUpdate(child, childPool) for child in childServices]
+    try:
+        timer = StageTimer()
+        utils.initializeCimProfile(distributedArea)
+        calculationStages.append({"stage": "initializeCimProfile", **timer.stop()})
+        if childServices:
+            Ybus = assembleFromChildYbuses(distributedArea, childServices, childFutures)
+        elif assemblyPool is None:
+            Ybus = utils.calculateSparseYbus(distributedArea)
+        else:
+            # the tables are extracted on this thread and only the NumPy heavy fill stages are sent to the pool
+            capacity = utils.estimateYbusTripletCount(distributedArea)
+            cimTables = utils.CimTables(distributedArea).materialize()
+            Ybus = assemblyPool.submit(utils.assembleSparseYbus, cimTables, capacity).result()
+    finally:
+        if childPool is not None:
+            childPool.shutdown(wait=False)
+    if ybusCache is not None and fingerprint is not None:
+        ybusCache.store(areaId, fingerprint, Ybus)
+    return Ybus
+
+
+def assembleFromChildYbuses(distributedArea, childServices: List, childFutures: List[Future]) -> SparseYbus:
+    # merges the switch area Ybuses and only calculates the feeder level equipment none of them covers
+    areaId = distributedArea.container.mRID
+    childYbuses = []
+    childEquipmentIDs = set()
+    for child, childFuture in zip(childServices, childFutures):
+        childFuture.result()
+        equipmentIDs = utils.areaEquipmentIDs(child.switch_area)
+        if not childEquipmentIDs.isdisjoint(equipmentIDs):
+            logger.warning(
+                f"The switch areas under area id {areaId} share equipment. Calculating its Ybus from its own "
+                "CIM data instead.")
+            return utils.calculateSparseYbus(distributedArea)
+        childEquipmentIDs.update(equipmentIDs)
+        # snapshot the child so switch state updates can't change it while it is merged
+        with child.ybusStateLock:
+            childYbus = SparseYbus.fromCsr(list(child.sparseYbus.nodeNames), child.sparseYbus.tocsr().copy())
+            childYbus.switches = copy.deepcopy(child.sparseYbus.switches)
+        childYbuses.append(childYbus)
+    return utils.calculateHierarchicalSparseYbus(distributedArea, childYbuses, childEquipmentIDs)
+
+
+def submitYbusUpdate(service, executor: Executor, *args) -> Future:
+    # single flight: every caller for an area shares the future of the calculation already in progress
+    with service.ybusLock:
+        if service.ybusFuture is None:
+            service.ybusFuture = executor.submit(service.updateYbusService, *args)
+            service.ybusFuture.add_done_callback(partial(clearFailedYbusUpdate, service))
+        return service.ybusFuture
+
+
+def clearFailedYbusUpdate(service, future: Future):
+    # a failed calculation is retried by the next request instead of replaying the same error
+    if future.exception() is not None:
+        with service.ybusLock:
+            if service.ybusFuture is future:
+                service.ybusFuture = None
+
+
+def whenYbusReady(service, callback: Callable[[], None]):
+    # Runs callback on ybusRequestPool once the Ybus is ready, so encoding and sending a response never holds up the
+    # message bus callback thread that called on_request.
+    if service.isYbusInitialized:
+        ybusRequestPool.submit(callback)
+        return
+    future = submitYbusUpdate(service, ybusRequestPool)
+    future.add_done_callback(partial(runWhenYbusReady, service, callback))
+
+
+def runWhenYbusReady(service, callback: Callable[[], None], future: Future):
+    # callback also runs after a failed calculation so the request waiting for it is answered with an error
+    error = future.exception()
+    if error is not None:
+        logger.error(f"{type(service).__name__}:{service.downstream_message_bus_def.id} failed to calculate its Ybus."
+                     f"\n{error}")
+    ybusRequestPool.submit(callback)
+
+
+def sendFromYbus(service, sender: Callable, message_bus: FieldMessageBus, replyTo: str, message: Dict):
+    if not service.isYbusInitialized:
+        errorStr = f"{type(service).__name__}:{service.downstream_message_bus_def.id} failed to calculate its Ybus."
+        logger.error(errorStr)
+        raise RuntimeError(errorStr)
+    sender(service, message_bus, replyTo, message)
+
+
+def sendYbus(service, message_bus: FieldMessageBus, replyTo: str, message: Dict):
+    # Only copying the Ybus holds the lock, so switch state updates don't wait for the response to be encoded and
+    # sent. Streamed responses are sent chunk by chunk as they are encoded.
+    sendsDict = message.get("format", DICT_FORMAT) == DICT_FORMAT and not message.get("stream", False)
+    with service.ybusStateLock:
+        nodeNames = list(service.sparseYbus.nodeNames)
+        matrix = service.sparseYbus.tocsr().copy()
+        ybusDict = {bus1: dict(row) for bus1, row in service.ybus.items()} if sendsDict else {}
+    for response in ybusResponses(SparseYbus.fromCsr(nodeNames, matrix), ybusDict, message):
+        message_bus.send(replyTo, response)
+
+
+def sendYbusSubmatrix(service, message_bus: FieldMessageBus, replyTo: str, message: Dict):
+    with service.ybusStateLock:
+        response = ybusSubmatrixResponse(service.sparseYbus, message)
+    message_bus.send(replyTo, response)
+
+
+def sendSwitchStateUpdate(service, message_bus: FieldMessageBus, replyTo: str, message: Dict):
+    # SwitchStateUpdate: {"switches": {<switch name>: <true when open>}} answered with the entries it changed
+    switchStates = message.get("switches")
+    if not isinstance(switchStates, dict):
+        errorStr = f"SwitchStateUpdate switches is not a dict.\ntype: {type(switchStates)}"
+        logger.error(errorStr)
+        raise TypeError(errorStr)
+    nonBooleanStates = {
+        switchName: isOpen
+        for switchName, isOpen in switchStates.items() if not isinstance(isOpen, bool)
+    }
+    if len(nonBooleanStates) > 0:
+        errorStr = f"SwitchStateUpdate switch states must be true or false.\nswitches: {nonBooleanStates}"
+        logger.error(errorStr)
+        raise TypeError(errorStr)
+    unknownSwitches = [switchName for switchName in switchStates if switchName not in service.sparseYbus.switches]
+    if len(unknownSwitches) > 0:
+        errorStr = f"SwitchStateUpdate names switches that are not part of this area.\nswitches: {unknownSwitches}"
+        logger.error(errorStr)
+        raise KeyError(errorStr)
+    response = applySwitchStates(service, switchStates)
+    forwardSwitchStates(service, switchStates)
+    message_bus.send(replyTo, response)
+
+
+def applySwitchStates(service, switchStates: Dict) -> Dict:
+    # patches the switches of this area into its Ybus and records the change for YbusDelta requests
+    changes = {}
+    with service.ybusStateLock:
+        for switchName, isOpen in switchStates.items():
+            for bus1, row in utils.applySwitchState(service.sparseYbus, service.ybus, switchName, isOpen).items():
+                changes.setdefault(bus1, {}).update(row)
+        if len(changes) > 0:
+            service.ybusVersion += 1
+            service.ybusChanges.append((service.ybusVersion, changes))
+        return {"version": service.ybusVersion, "changes": changes}
+
+
+def forwardSwitchStates(service, switchStates: Dict):
+    # A hierarchical feeder Ybus holds the switches of its switch areas, so an update to either side is applied to
+    # the other one as well. Forwarded updates are not forwarded again, and a related Ybus still being calculated
+    # gets them once it is ready. States it already has leave it unchanged.
+    for relatedService in getattr(service, "childServices", []) + [getattr(service, "parentService", None)]:
+        if relatedService is not None:
+            queueSwitchStateUpdate(relatedService, partial(applyOwnedSwitchStates, relatedService, switchStates))
+
+
+def queueSwitchStateUpdate(service, update: Callable[[], None]):
+    # the pool may start the queued updates in any order, so every run applies the oldest update still waiting
+    service.switchStateUpdates.append(update)
+    whenYbusReady(service, partial(runNextSwitchStateUpdate, service))
+
+
+def runNextSwitchStateUpdate(service):
+    with service.switchStateUpdateLock:
+        service.switchStateUpdates.popleft()()
+
+
+def applyOwnedSwitchStates(service, switchStates: Dict):
+    # a related area whose Ybus failed to calculate has nothing to patch, it is recalculated with the CIM states
+    if not service.isYbusInitialized:
+        return
+    ownedStates = {
+        switchName: isOpen
+        for switchName, isOpen in switchStates.items() if switchName in service.sparseYbus.switches
+    }
+    if len(ownedStates) > 0:
+        applySwitchStates(service, ownedStates)
+
+
+def sendYbusDelta(service, message_bus: FieldMessageBus, replyTo: str, message: Dict):
+    # YbusDelta: {"sinceVersion": <version>} answered with the current value of every entry changed after that
+    # version, None for removed entries, or with resync set when the history no longer reaches back that far
+    sinceVersion = message.get("sinceVersion", 0)
+    if not isinstance(sinceVersion, int):
+        errorStr = f"YbusDelta sinceVersion is not an int.\ntype: {type(sinceVersion)}"
+        logger.error(errorStr)
+        raise TypeError(errorStr)
+    with service.ybusStateLock:
+        response = {"version": service.ybusVersion, "sinceVersion": sinceVersion, "resync": False, "changes": {}}
+        if len(service.ybusChanges) > 0 and service.ybusChanges[0][0] > sinceVersion + 1:
+            response["resync"] = True
+        else:
+            for version, changes in service.ybusChanges:
+                if version <= sinceVersion:
+                    continue
+                for bus1, row in changes.items():
+                    for bus2 in row:
+                        response["changes"].setdefault(bus1, {})[bus2] = service.ybus.get(bus1, {}).get(bus2)
+    message_bus.send(replyTo, response)
+
+
+def sendMetrics(service, message_bus: FieldMessageBus, replyTo: str, message: Dict):
+    # answered right away, also while the Ybus is still being calculated
+    response = service.metrics.toDict()
+    response["isYbusInitialized"] = service.isYbusInitialized
+    message_bus.send(replyTo, response)
+
+
+def timeRequest(service, message_bus: FieldMessageBus, replyTo: str, requestType: str, requestStart: float,
+                send: Callable[[], None]):
+    # The latency of a request runs from its arrival until its response is sent, including any wait for the Ybus. A
+    # request that fails is answered with the error, so the requester doesn't wait for a response that never comes.
+    try:
+        send()
+    except Exception as e:
+        logger.error(f"Answering the {requestType} request with an error.\n{e}")
+        message_bus.send(replyTo, {"requestType": requestType, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        service.metrics.recordRequest(requestType, time.perf_counter() - requestStart)
+
+
+def handleYbusRequest(service, message_bus: FieldMessageBus, headers: Dict, message: Dict, localYbusRequestType: str):
+    requestStart = time.perf_counter()
+    requestType = message.get("requestType", "")
+    replyTo = headers.get('reply-to')
+    # requests answered from the Ybus wait for it to be calculated first
+    ybusSenders = {
+        localYbusRequestType: sendYbus,
+        "YbusSubmatrix": sendYbusSubmatrix,
+        "SwitchStateUpdate": sendSwitchStateUpdate,
+        "YbusDelta": sendYbusDelta
+    }
+    if requestType in ybusSenders:
+        send = partial(sendFromYbus, service, ybusSenders[requestType], message_bus, replyTo, message)
+        callback = partial(timeRequest, service, message_bus, replyTo, requestType, requestStart, send)
+        if requestType == "SwitchStateUpdate":
+            # switch state updates are applied in the order they arrived
+            queueSwitchStateUpdate(service, callback)
+        else:
+            whenYbusReady(service, callback)
+    if requestType == "Metrics":
+        timeRequest(service, message_bus, replyTo, requestType, requestStart,
+                    partial(sendMetrics, service, message_bus, replyTo, message))
+    if requestType == "is_initialized":
+        isInitialized = service.isServiceInitialized and (service.isYbusInitialized or not service.isWarmupEnabled)
+        response = {"is_initialized": isInitialized}
+        message_bus.send(replyTo, response)
 
 
 class FeederAgentLevelStaticYbusService(FeederAgent):
@@ -80,14 +398,37 @@ class FeederAgentLevelStaticYbusService(FeederAgent):
         self.isServiceInitialized = False
         if self.feeder_area is not None:
             self.isServiceInitialized = True
+        # switch area services whose Ybuses are merged into this one, set by main when YBUS_HIERARCHICAL is given
+        self.childServices: List = []
+        # shared by every co-located service, set by main when YBUS_COLOCATED is given
+        self.contributionTable: Optional[YbusContributionTable] = None
+        # set by warmupYbusServices while the Ybus is being precomputed
+        self.isWarmupEnabled = False
+        # guards ybusFuture, the calculation shared by every request made before the Ybus is ready
+        self.ybusLock = threading.Lock()
+        self.ybusFuture: Optional[Future] = None
+        # guards the Ybus itself against switch state updates and the history of those for YbusDelta requests
+        self.ybusStateLock = threading.Lock()
+        self.ybusVersion = 0
+        self.ybusChanges = deque(maxlen=YBUS_CHANGE_HISTORY)
+        # switch state updates waiting for ybusRequestPool, applied in the order they were queued
+        self.switchStateUpdates: Deque[Callable[[], None]] = deque()
+        self.switchStateUpdateLock = threading.Lock()
+        # calculation and request metrics returned by Metrics requests
+        self.metrics = ServiceMetrics()
 
-    def updateYbusService(self):
+    def updateYbusService(self, assemblyPool: Optional[Executor] = None):
         if self.feeder_area is not None:
-            utils.initializeCimProfile(self.feeder_area)
-            self.ybus = utils.calculateYbus(self.feeder_area)
+            timer = StageTimer()
+            calculationStages = []
+            self.sparseYbus = loadOrCalculateYbus(self.feeder_area, self.agent_area_dict, assemblyPool,
+                                                  self.childServices, self.contributionTable, calculationStages)
+            self.ybus = self.sparseYbus.toDict()
+            self.metrics.recordCalculation(timer.stop(), calculationStages, self.sparseYbus.summary)
             self.isYbusInitialized = True
-            logger.debug(f"The Ybus for feederStaticYbusService in area id {self.feeder_area.container.mRID} is:\n"
-                        f"{json.dumps(self.ybus, indent=4, sort_keys=True, cls=utils.ComplexEncoder)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"The Ybus for feederStaticYbusService in area id {self.feeder_area.container.mRID} is:\n"
+                             f"{json.dumps(self.ybus, indent=4, sort_keys=True, cls=utils.ComplexEncoder)}")
         else:
             logger.error(f"{type(self).__name__}:{self.downstream_message_bus_def.id}'s feeder_area None. The service "
                          "is malformed.")
@@ -95,13 +436,7 @@ class FeederAgentLevelStaticYbusService(FeederAgent):
                                "service is malformed.")
 
     def on_request(self, message_bus: FieldMessageBus, headers: Dict, message: Dict):
-        if message.get("requestType", "") == "LocalYbus":
-            if not self.isYbusInitialized:
-                self.updateYbusService()
-            message_bus.send(headers.get('reply-to'), self.ybus)
-        if message.get("requestType", "") == "is_initialized":
-            response = {"is_initialized": self.isServiceInitialized}
-            message_bus.send(headers.get('reply-to'), response)
+        handleYbusRequest(self, message_bus, headers, message, "LocalYbus")
 
 
 class SwitchAreaAgentLevelStaticYbusService(SwitchAreaAgent):
@@ -118,14 +453,40 @@ class SwitchAreaAgentLevelStaticYbusService(SwitchAreaAgent):
         self.isServiceInitialized = False
         if self.switch_area is not None:
             self.isServiceInitialized = True
+        # feeder service whose Ybus merges this one, set by main when YBUS_HIERARCHICAL is given
+        self.parentService = None
+        # shared by every co-located service, set by main when YBUS_COLOCATED is given
+        self.contributionTable: Optional[YbusContributionTable] = None
+        # set by warmupYbusServices while the Ybus is being precomputed
+        self.isWarmupEnabled = False
+        # guards ybusFuture, the calculation shared by every request made before the Ybus is ready
+        self.ybusLock = threading.Lock()
+        self.ybusFuture: Optional[Future] = None
+        # guards the Ybus itself against switch state updates and the history of those for YbusDelta requests
+        self.ybusStateLock = threading.Lock()
+        self.ybusVersion = 0
+        self.ybusChanges = deque(maxlen=YBUS_CHANGE_HISTORY)
+        # switch state updates waiting for ybusRequestPool, applied in the order they were queued
+        self.switchStateUpdates: Deque[Callable[[], None]] = deque()
+        self.switchStateUpdateLock = threading.Lock()
+        # calculation and request metrics returned by Metrics requests
+        self.metrics = ServiceMetrics()
 
-    def updateYbusService(self):
+    def updateYbusService(self, assemblyPool: Optional[Executor] = None):
         if self.switch_area is not None:
-            utils.initializeCimProfile(self.switch_area)
-            self.ybus = utils.calculateYbus(self.switch_area)
+            timer = StageTimer()
+            calculationStages = []
+            self.sparseYbus = loadOrCalculateYbus(self.switch_area,
+                                                  self.agent_area_dict,
+                                                  assemblyPool,
+                                                  contributionTable=self.contributionTable,
+                                                  calculationStages=calculationStages)
+            self.ybus = self.sparseYbus.toDict()
+            self.metrics.recordCalculation(timer.stop(), calculationStages, self.sparseYbus.summary)
             self.isYbusInitialized = True
-            logger.debug(f"The Ybus for SwitchAreaYbusService in area id {self.switch_area.container.mRID} is:\n"
-                         f"{json.dumps(self.ybus, indent=4, sort_keys=True, cls=utils.ComplexEncoder)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"The Ybus for SwitchAreaYbusService in area id {self.switch_area.container.mRID} is:\n"
+                             f"{json.dumps(self.ybus, indent=4, sort_keys=True, cls=utils.ComplexEncoder)}")
         else:
             logger.error(f"{type(self).__name__}:{self.downstream_message_bus_def.id}'s switch_area None. The service "
                          "is malformed.")
@@ -133,13 +494,7 @@ class SwitchAreaAgentLevelStaticYbusService(SwitchAreaAgent):
                                "service is malformed.")
 
     def on_request(self, message_bus: FieldMessageBus, headers: Dict, message: Dict):
-        if message.get("requestType", "") == "LocalYbus":
-            if not self.isYbusInitialized:
-                self.updateYbusService()
-            message_bus.send(headers.get('reply-to'), self.ybus)
-        if message.get("requestType", "") == "is_initialized":
-            response = {"is_initialized": self.isServiceInitialized}
-            message_bus.send(headers.get('reply-to'), response)
+        handleYbusRequest(self, message_bus, headers, message, "LocalYbus")
 
 
 class SecondaryAreaAgentLevelStaticYbusService(SecondaryAreaAgent):
@@ -156,14 +511,38 @@ class SecondaryAreaAgentLevelStaticYbusService(SecondaryAreaAgent):
         self.isServiceInitialized = False
         if self.secondary_area is not None:
             self.isServiceInitialized = True
+        # shared by every co-located service, set by main when YBUS_COLOCATED is given
+        self.contributionTable: Optional[YbusContributionTable] = None
+        # set by warmupYbusServices while the Ybus is being precomputed
+        self.isWarmupEnabled = False
+        # guards ybusFuture, the calculation shared by every request made before the Ybus is ready
+        self.ybusLock = threading.Lock()
+        self.ybusFuture: Optional[Future] = None
+        # guards the Ybus itself against switch state updates and the history of those for YbusDelta requests
+        self.ybusStateLock = threading.Lock()
+        self.ybusVersion = 0
+        self.ybusChanges = deque(maxlen=YBUS_CHANGE_HISTORY)
+        # switch state updates waiting for ybusRequestPool, applied in the order they were queued
+        self.switchStateUpdates: Deque[Callable[[], None]] = deque()
+        self.switchStateUpdateLock = threading.Lock()
+        # calculation and request metrics returned by Metrics requests
+        self.metrics = ServiceMetrics()
 
-    def updateYbusService(self):
+    def updateYbusService(self, assemblyPool: Optional[Executor] = None):
         if self.secondary_area is not None:
-            utils.initializeCimProfile(self.secondary_area)
-            self.ybus = utils.calculateYbus(self.secondary_area)
+            timer = StageTimer()
+            calculationStages = []
+            self.sparseYbus = loadOrCalculateYbus(self.secondary_area,
+                                                  self.agent_area_dict,
+                                                  assemblyPool,
+                                                  contributionTable=self.contributionTable,
+                                                  calculationStages=calculationStages)
+            self.ybus = self.sparseYbus.toDict()
+            self.metrics.recordCalculation(timer.stop(), calculationStages, self.sparseYbus.summary)
             self.isYbusInitialized = True
-            logger.debug(f"The Ybus for SecondaryAreaYbusService in area id {self.secondary_area.container.mRID} is:\n"
-                         f"{json.dumps(self.ybus, indent=4, sort_keys=True, cls=utils.ComplexEncoder)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"The Ybus for SecondaryAreaYbusService in area id {self.secondary_area.container.mRID} "
+                             f"is:\n{json.dumps(self.ybus, indent=4, sort_keys=True, cls=utils.ComplexEncoder)}")
         else:
             logger.error(f"{type(self).__name__}:{self.downstream_message_bus_def.id}'s secondary_area None. The "
                          "service is malformed.")
@@ -171,13 +550,15 @@ class SecondaryAreaAgentLevelStaticYbusService(SecondaryAreaAgent):
                                "service is malformed.")
 
     def on_request(self, message_bus: FieldMessageBus, headers: Dict, message: Dict):
-        if message.get("requestType", "") == "localYbus":
-            if not self.isYbusInitialized:
-                self.updateYbusService()
-            message_bus.send(headers.get('reply-to'), self.ybus)
-        if message.get("requestType", "") == "is_initialized":
-            response = {"is_initialized": self.isServiceInitialized}
-            message_bus.send(headers.get('reply-to'), response)
+        handleYbusRequest(self, message_bus, headers, message, "localYbus")
+
+
+def serviceArea(service):
+    if isinstance(service, FeederAgentLevelStaticYbusService):
+        return service.feeder_area
+    if isinstance(service, SwitchAreaAgentLevelStaticYbusService):
+        return service.switch_area
+    return service.secondary_area
 
 
 def getMessageBusDefinition(areaId: str) -> MessageBusDefinition:
@@ -196,7 +577,81 @@ def getMessageBusDefinition(areaId: str) -> MessageBusDefinition:
     return bus
 
 
+def warmupYbusServices(services: List, assemblyProcesses: Optional[int] = None):
+    # CIM fetches are I/O bound and share a thread pool while the fill stages of each area run in their own process.
+    # Workers are spawned rather than forked, since a fork would copy locks held by the bus client and request
+    # threads already running in this process.
+    warmupStart = time.perf_counter()
+    for service in services:
+        service.isWarmupEnabled = True
+    with ThreadPoolExecutor(max_workers=min(WARMUP_FETCH_THREADS, len(services)),
+                            thread_name_prefix="YbusWarmup") as fetchPool, \
+            ProcessPoolExecutor(max_workers=assemblyProcesses,
+                                mp_context=multiprocessing.get_context("spawn"),
+                                initializer=initializeAssemblyWorker,
+                                initargs=(utils.ybusStageThreads, sorted(utils.ybusDumpAreas),
+                                          tracemalloc.is_tracing())) as assemblyPool:
+        futures = {submitYbusUpdate(service, fetchPool, assemblyPool): service for service in services}
+        for future in as_completed(futures):
+            service = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                # fall back to calculating the Ybus on request so the area still reports as initialized
+                service.isWarmupEnabled = False
+                logger.error(
+                    f"Ybus warmup failed for {type(service).__name__}:{service.downstream_message_bus_def.id}. "
+                    f"It will be calculated on request instead.\n{e}")
+    logger.info(f"Ybus warmup of {len(services)} areas finished in {time.perf_counter() - warmupStart:.3f} seconds.")
+
+
+def isServiceAlive(service) -> bool:
+    for messageBus in [service.upstream_message_bus, service.downstream_message_bus]:
+        if messageBus is not None and not messageBus.is_connected():
+            return False
+    return True
+
+
+def reconnectService(service):
+    # reconnects through the agent's public message bus and subscription methods, the agent stays registered with the
+    # context manager across the reconnect so only the subscriptions need to be made again
+    service.disconnect()
+    for messageBus in [service.upstream_message_bus, service.downstream_message_bus]:
+        if messageBus is not None:
+            messageBus.connect()
+    service.subscribe_to_measurement()
+    service.subscribe_to_messages()
+    service.subscribe_to_requests()
+
+
+def superviseYbusServices(services: List, stopEvent: threading.Event):
+    # sleeps on stopEvent between liveness checks and returns once it is set or no service is left alive
+    restartCounts = {id(service): 0 for service in services}
+    liveServices = list(services)
+    while len(liveServices) > 0 and not stopEvent.wait(SUPERVISOR_CHECK_SECONDS):
+        for service in list(liveServices):
+            if isServiceAlive(service):
+                restartCounts[id(service)] = 0
+                continue
+            serviceName = f"{type(service).__name__}:{service.downstream_message_bus_def.id}"
+            if restartCounts[id(service)] >= MAX_SERVICE_RESTARTS:
+                logger.error(f"{serviceName} is still disconnected after {MAX_SERVICE_RESTARTS} reconnection "
+                             "attempts. It will no longer be supervised.")
+                liveServices.remove(service)
+                continue
+            restartCounts[id(service)] += 1
+            logger.warning(f"{serviceName} lost its message bus connection. Reconnecting it, attempt "
+                           f"{restartCounts[id(service)]} of {MAX_SERVICE_RESTARTS}.")
+            try:
+                reconnectService(service)
+            except Exception as e:
+                logger.error(f"Reconnecting {serviceName} failed.\n{e}")
+    if len(liveServices) == 0:
+        logger.error("None of the Ybus services are connected to their message buses anymore.")
+
+
 def main():
+    configureLogging()
     parser = ArgumentParser()
     serviceConfigHelpStr = "Variable keyword arguments that provide user defined distributed area agent " \
                            "configuration files. Valid keywords are as follows:SYSTEM_BUS_CONFIG_FILE=<full " \
@@ -209,12 +664,25 @@ def main():
                            "not be specified in combination with SYSTEM_BUS_CONFIG_FILE, FEEDER_BUS_CONFIG_FILE, " \
                            "SWITCH_BUS_CONFIG_FILE_DIR, and SECONDARY_BUS_CONFIG_FILE_DIR, as it will override those " \
                            "values. The directory needs to contain at least one of the following folder names: " \
-                           "feeder_level, secondary_level, switch_level, and/or system_level."
+                           "feeder_level, secondary_level, switch_level, and/or system_level. YBUS_DUMP_AREA=<The " \
+                           "area mrid to log the full Ybus for after every calculation stage>. YBUS_CACHE_DIR=<full " \
+                           "path of a directory to persist calculated Ybus matrices in between service starts>. " \
+                           "YBUS_CACHE_MAX_MB=<size limit of the Ybus cache directory in megabytes. Defaults to " \
+                           "256>. YBUS_WARMUP=<true to calculate every area's Ybus in parallel right after the " \
+                           "services start>. YBUS_WARMUP_PROCESSES=<number of processes used for the warmup Ybus " \
+                           "assembly. Defaults to the number of CPUs>. YBUS_HIERARCHICAL=<true to assemble the " \
+                           "feeder Ybus from the Ybuses of the switch area services started alongside it>. " \
+                           "YBUS_STAGE_THREADS=<number of threads running the independent fill stages of one Ybus " \
+                           "calculation. Defaults to 1, which runs the stages in sequence>. " \
+                           "YBUS_COLOCATED=<true to calculate the Ybuses of every area started in this process from " \
+                           "a single fetch of their CIM data>. YBUS_TRACE_ALLOCATIONS=<true to measure the peak " \
+                           "memory allocation of every Ybus calculation stage for Metrics requests>."
     parser.add_argument("service_configurations", nargs="+", help=serviceConfigHelpStr)
     args = parser.parse_args()
     validKeywords = [
         "MODEL_MRID", "SYSTEM_BUS_CONFIG_FILE", "FEEDER_BUS_CONFIG_FILE", "SWITCH_BUS_CONFIG_FILE",
-        "SECONDARY_BUS_CONFIG_FILE"
+        "SECONDARY_BUS_CONFIG_FILE", "YBUS_DUMP_AREA", "YBUS_CACHE_DIR", "YBUS_CACHE_MAX_MB", "YBUS_WARMUP",
+        "YBUS_WARMUP_PROCESSES", "YBUS_HIERARCHICAL", "YBUS_STAGE_THREADS", "YBUS_COLOCATED", "YBUS_TRACE_ALLOCATIONS"
     ]
     mainArgs = {}
     for arg in args.service_configurations:
@@ -234,6 +702,15 @@ def main():
     feederMessageBusConfigFile = mainArgs.get("FEEDER_BUS_CONFIG_FILE")
     switchAreaMessageBusConfigFile = mainArgs.get("SWITCH_BUS_CONFIG_FILE")
     secondaryAreaMessageBusConfigFile = mainArgs.get("SECONDARY_BUS_CONFIG_FILE")
+    ybusDumpArea = mainArgs.get("YBUS_DUMP_AREA")
+    ybusCacheDir = mainArgs.get("YBUS_CACHE_DIR")
+    ybusCacheMaxMb = mainArgs.get("YBUS_CACHE_MAX_MB")
+    ybusWarmup = mainArgs.get("YBUS_WARMUP", "false")
+    ybusWarmupProcesses = mainArgs.get("YBUS_WARMUP_PROCESSES")
+    ybusHierarchical = mainArgs.get("YBUS_HIERARCHICAL", "false")
+    ybusStageThreads = mainArgs.get("YBUS_STAGE_THREADS")
+    ybusColocated = mainArgs.get("YBUS_COLOCATED", "false")
+    ybusTraceAllocations = mainArgs.get("YBUS_TRACE_ALLOCATIONS", "false")
     if not isinstance(systemMessageBusConfigFile, str) and systemMessageBusConfigFile is not None:
         errorStr = f"system_bus_config_file isn't a str type.\ntype: {type(systemMessageBusConfigFile)}"
         logger.error(errorStr)
@@ -254,11 +731,66 @@ def main():
         errorStr = f"model_mrid is not a string.\ntype: {type(modelMrid)}"
         logger.error(errorStr)
         raise TypeError(errorStr)
+    if not isinstance(ybusDumpArea, str) and ybusDumpArea is not None:
+        errorStr = f"ybus_dump_area is not a string.\ntype: {type(ybusDumpArea)}"
+        logger.error(errorStr)
+        raise TypeError(errorStr)
+    if ybusDumpArea is not None:
+        utils.enableYbusDump(ybusDumpArea)
+    if ybusCacheMaxMb is not None and ybusCacheDir is None:
+        errorStr = "YBUS_CACHE_MAX_MB was given without YBUS_CACHE_DIR."
+        logger.error(errorStr)
+        raise RuntimeError(errorStr)
+    if ybusCacheDir is not None:
+        maxCacheBytes = DEFAULT_MAX_CACHE_BYTES
+        if ybusCacheMaxMb is not None:
+            try:
+                maxCacheBytes = int(float(ybusCacheMaxMb) * 1024 * 1024)
+            except ValueError:
+                errorStr = f"ybus_cache_max_mb is not a number.\nvalue: {ybusCacheMaxMb}"
+                logger.error(errorStr)
+                raise TypeError(errorStr)
+        global ybusCache
+        ybusCache = YbusCache(ybusCacheDir, maxCacheBytes)
+    if ybusWarmup.lower() not in ["true", "false"]:
+        errorStr = f"ybus_warmup must be true or false.\nvalue: {ybusWarmup}"
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+    if ybusHierarchical.lower() not in ["true", "false"]:
+        errorStr = f"ybus_hierarchical must be true or false.\nvalue: {ybusHierarchical}"
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+    if ybusColocated.lower() not in ["true", "false"]:
+        errorStr = f"ybus_colocated must be true or false.\nvalue: {ybusColocated}"
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+    if ybusColocated.lower() == "true" and ybusHierarchical.lower() == "true":
+        errorStr = "YBUS_COLOCATED and YBUS_HIERARCHICAL can't both be true."
+        logger.error(errorStr)
+        raise RuntimeError(errorStr)
+    if ybusTraceAllocations.lower() not in ["true", "false"]:
+        errorStr = f"ybus_trace_allocations must be true or false.\nvalue: {ybusTraceAllocations}"
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+    if ybusTraceAllocations.lower() == "true":
+        enableAllocationTracking()
+    warmupProcesses = None
+    if ybusWarmupProcesses is not None:
+        if not ybusWarmupProcesses.isdigit() or int(ybusWarmupProcesses) < 1:
+            errorStr = f"ybus_warmup_processes is not a positive integer.\nvalue: {ybusWarmupProcesses}"
+            logger.error(errorStr)
+            raise ValueError(errorStr)
+        warmupProcesses = int(ybusWarmupProcesses)
+    if ybusStageThreads is not None:
+        if not ybusStageThreads.isdigit() or int(ybusStageThreads) < 1:
+            errorStr = f"ybus_stage_threads is not a positive integer.\nvalue: {ybusStageThreads}"
+            logger.error(errorStr)
+            raise ValueError(errorStr)
+        utils.setYbusStageThreads(int(ybusStageThreads))
     serviceMetadata = {
         "app_id": "distributed_static_ybus_service",
         "description": "This is a GridAPPS-D distributed static ybus service agent."
     }
-    servicesAreRunning = False
     runningYbusServiceInfo = []
     runningServiceInstances = []
     feederMessageBusDef = None
@@ -300,7 +832,6 @@ def main():
         feederMessageBusDef = getMessageBusDefinition(modelMrid)
         logger.info(f"Creating Feeder Area Ybus Service for area id: {feederMessageBusDef.id}")
         feederYbusService = FeederAgentLevelStaticYbusService(systemMessageBusDef, feederMessageBusDef, serviceMetadata)
-        #feederYbusService.updateYbusService()
         runningYbusServiceInfo.append(f"{type(feederYbusService).__name__}:{feederMessageBusDef.id}")
         runningServiceInstances.append(feederYbusService)
         for switchArea in feederYbusService.agent_area_dict.get('switch_areas', []):
@@ -310,7 +841,6 @@ def main():
                 logger.info(f"Creating Switch Area Ybus Service for area id: {switchAreaMessageBusDef.id}")
                 switchAreaService = SwitchAreaAgentLevelStaticYbusService(feederMessageBusDef, switchAreaMessageBusDef,
                                                                           serviceMetadata)
-                #switchAreaService.updateYbusService()
                 runningYbusServiceInfo.append(f"{type(switchAreaService).__name__}:{switchAreaMessageBusDef.id}")
                 runningServiceInstances.append(switchAreaService)
                 for secondaryArea in switchArea.get('secondary_areas', []):
@@ -325,24 +855,53 @@ def main():
                                 len(secondaryAreaService.agent_area_dict['unaddressable_equipment']) == 0:
                             secondaryAreaService.disconnect()
                         else:
-                            #secondaryAreaService.updateYbusService()
                             runningYbusServiceInfo.append(f"{type(secondaryAreaService).__name__}:"
                                                           f"{secondaryAreaMessageBusDef.id}")
                             runningServiceInstances.append(secondaryAreaService)
-    if len(runningServiceInstances) > 0:
-        servicesAreRunning = True
-        print("Ybus services are running!")
-    while servicesAreRunning:
+    if len(runningServiceInstances) == 0:
+        return
+    if ybusHierarchical.lower() == "true":
+        for feederService in runningServiceInstances:
+            if isinstance(feederService, FeederAgentLevelStaticYbusService):
+                feederService.childServices = [
+                    service for service in runningServiceInstances
+                    if isinstance(service, SwitchAreaAgentLevelStaticYbusService) and service.switch_area is not None
+                    and service.upstream_message_bus.id == feederService.downstream_message_bus.id
+                ]
+                for childService in feederService.childServices:
+                    childService.parentService = feederService
+    if ybusColocated.lower() == "true":
+        colocatedServices = [service for service in runningServiceInstances if serviceArea(service) is not None]
+        if len(colocatedServices) > 0:
+            contributionTable = YbusContributionTable([serviceArea(service) for service in colocatedServices])
+            for service in colocatedServices:
+                service.contributionTable = contributionTable
+    print("Ybus services are running!")
+    if ybusWarmup.lower() == "true":
+        warmupThread = threading.Thread(target=warmupYbusServices,
+                                        args=(runningServiceInstances, warmupProcesses),
+                                        name="YbusWarmup",
+                                        daemon=True)
+        warmupThread.start()
+    stopEvent = threading.Event()
+
+    def requestShutdown(signum, frame):
+        logger.info(f"Received {signal.Signals(signum).name}.")
+        stopEvent.set()
+
+    signal.signal(signal.SIGTERM, requestShutdown)
+    signal.signal(signal.SIGINT, requestShutdown)
+    superviseYbusServices(runningServiceInstances, stopEvent)
+    exitStr = "Exiting distributed static Ybus service for the following areas:"
+    for area in runningYbusServiceInfo:
+        exitStr += f"\n{area}"
+    logger.info(exitStr)
+    ybusRequestPool.shutdown(wait=False, cancel_futures=True)
+    for service in runningServiceInstances:
         try:
-            for service in runningServiceInstances:
-                # TODO: check to see if service instance is still running
-                servicesAreRunning = True
-        except KeyboardInterrupt:
-            exitStr = "Manually exiting distributed static Ybus service for the following areas:"
-            for area in runningYbusServiceInfo:
-                exitStr += f"\n{area}"
-            logger.info(exitStr)
-            break
+            service.disconnect()
+        except Exception as e:
+            logger.error(f"Disconnecting {type(service).__name__}:{service.downstream_message_bus_def.id} failed.\n{e}")
 
 
 if __name__ == "__main__":
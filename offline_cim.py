@@ -0,0 +1,181 @@
+# Copyright (c) 2023, Battelle Memorial Institute All rights reserved.
+# Battelle Memorial Institute (hereinafter Battelle) hereby grants permission to any person or entity
+# lawfully obtaining a copy of this software and associated documentation files (hereinafter the
+# Software) to redistribute and use the Software in source and binary forms, with or without modification.
+# Such person or entity may use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and may permit others to do so, subject to the following conditions:
+# Redistributions of source code must retain the above copyright notice, this list of conditions and the
+# following disclaimers.
+# Redistributions in binary form must reproduce the above copyright notice, this list of conditions and
+# the following disclaimer in the documentation and/or other materials provided with the distribution.
+# Other than as used herein, neither the name Battelle Memorial Institute or Battelle may be used in any
+# form whatsoever without the express written consent of Battelle.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL
+# BATTELLE OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY,
+# OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# General disclaimer for use with OSS licenses
+
+# This material was prepared as an account of work sponsored by an agency of the United States Government.
+# Neither the United States Government nor the United States Department of Energy, nor Battelle, nor any
+# of their employees, nor any jurisdiction or organization that has cooperated in the development of these
+# materials, makes any warranty, express or implied, or assumes any legal liability or responsibility for
+# the accuracy, completeness, or usefulness or any information, apparatus, product, software, or process
+# disclosed, or represents that its use would not infringe privately owned rights.
+
+# Reference herein to any specific commercial product, process, or service by trade name, trademark, manufacturer,
+# or otherwise does not necessarily constitute or imply its endorsement, recommendation, or favoring by the United
+# States Government or any agency thereof, or Battelle Memorial Institute. The views and opinions of authors expressed
+# herein do not necessarily state or reflect those of the United States Government or any agency thereof.
+
+# PACIFIC NORTHWEST NATIONAL LABORATORY operated by BATTELLE for the
+# UNITED STATES DEPARTMENT OF ENERGY under Contract DE-AC05-76RL01830
+# -------------------------------------------------------------------------------
+
+import logging
+import os
+from pathlib import Path
+import pickle
+from typing import Dict, List, Optional, Union
+
+from cimgraph.databases.fileparsers.json_ld_parser import JSONLDFile
+from cimgraph.databases.fileparsers.xml_parser import XMLFile
+
+import ybus_utils as utils
+
+logger = logging.getLogger(__name__)
+
+# cimgraph file connections by the suffix of the CIM model file they read
+cimFileConnections = {".xml": XMLFile, ".jsonld": JSONLDFile, ".json": JSONLDFile}
+snapshotSuffixes = {".pkl", ".pickle"}
+# bump whenever the snapshot layout changes so older snapshots are rejected instead of misread
+CIM_SNAPSHOT_VERSION = 1
+
+
+class OfflineArea:
+    # Stand-in for the DistributedArea of a service, built from a CIM model on disk. Every edge is already in the
+    # graph, so get_all_edges has nothing left to fetch and initializeCimProfile and calculateYbus run on it unchanged.
+
+    def __init__(self, container, graph: Dict[type, Dict]):
+        self.container = container
+        self.graph = graph
+
+    def get_all_edges(self, cim_class: type, graph: Optional[Dict] = None):
+        pass
+
+
+class SnapshotPickler(pickle.Pickler):
+    # references to objects of the graph are written as their index so pickling never recurses along the feeder
+
+    def __init__(self, file, objectIndex: Dict[int, int]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.objectIndex = objectIndex
+
+    def persistent_id(self, obj) -> Optional[int]:
+        return self.objectIndex.get(id(obj))
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, objects: List):
+        super().__init__(file)
+        self.objects = objects
+
+    def persistent_load(self, pid: int):
+        return self.objects[pid]
+
+
+def modelContainer(graph: Dict[type, Dict], areaId: Optional[str], defaultId: str):
+    for feeder in graph.get(utils.cim.Feeder, {}).values():
+        if areaId is None or feeder.mRID == areaId:
+            return feeder
+    return utils.cim.Feeder(mRID=areaId if areaId is not None else defaultId)
+
+
+def loadCimFile(path: Union[str, Path], areaId: Optional[str] = None) -> OfflineArea:
+    # the file connections pick their CIM profile from the environment so it has to be the one ybus_utils uses
+    path = Path(path)
+    cimFileConnection = cimFileConnections.get(path.suffix.lower())
+    if cimFileConnection is None:
+        errorStr = f"Unsupported CIM model file type.\nfile: {path}\nsupported: {sorted(cimFileConnections)}"
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+    if not path.is_file():
+        errorStr = f"CIM model file not found.\nfile: {path}"
+        logger.error(errorStr)
+        raise FileNotFoundError(errorStr)
+    cimProfile = os.environ.setdefault("CIMG_CIM_PROFILE", utils.cim_profile)
+    if cimProfile != utils.cim_profile:
+        errorStr = f"CIMG_CIM_PROFILE doesn't match the profile of the Ybus calculation.\nCIMG_CIM_PROFILE: " \
+                   f"{cimProfile}\nexpected: {utils.cim_profile}"
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+    connection = cimFileConnection(str(path))
+    # the file connections key the graph by identifier while the Ybus extraction looks equipment up by mRID
+    graph = {
+        cimClass: {
+            getattr(obj, "mRID", None) or key: obj
+            for key, obj in objects.items()
+        }
+        for cimClass, objects in connection.create_new_graph(None).items()
+    }
+    return OfflineArea(modelContainer(graph, areaId, path.stem), graph)
+
+
+def saveCimSnapshot(distributedArea, path: Union[str, Path]):
+    # Saves the graph of an area after initializeCimProfile so it can be reloaded without the platform. The objects
+    # are pickled one by one with their references replaced by indexes.
+    objects = []
+    objectIndex: Dict[int, int] = {}
+    layout = []
+    for cimClass, graphObjects in distributedArea.graph.items():
+        keys = []
+        for key, obj in graphObjects.items():
+            idx = objectIndex.get(id(obj))
+            if idx is None:
+                idx = objectIndex[id(obj)] = len(objects)
+                objects.append(obj)
+            keys.append((key, idx))
+        layout.append((cimClass, keys))
+    header = {
+        "version": CIM_SNAPSHOT_VERSION,
+        "cimProfile": utils.cim_profile,
+        "classes": [type(obj) for obj in objects],
+        "layout": layout
+    }
+    with open(path, "wb") as file:
+        pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+        SnapshotPickler(file, objectIndex).dump({
+            "container": distributedArea.container,
+            "states": [vars(obj) for obj in objects]
+        })
+
+
+def loadCimSnapshot(path: Union[str, Path]) -> OfflineArea:
+    # snapshots are pickles, so only load ones written by saveCimSnapshot from a trusted source
+    with open(path, "rb") as file:
+        header = pickle.load(file)
+        if header.get("version") != CIM_SNAPSHOT_VERSION or header.get("cimProfile") != utils.cim_profile:
+            errorStr = f"The CIM snapshot was written for another snapshot version or CIM profile.\nfile: {path}\n" \
+                       f"version: {header.get('version')}\ncimProfile: {header.get('cimProfile')}"
+            logger.error(errorStr)
+            raise ValueError(errorStr)
+        # every object exists before any state is read so the references between them can be resolved in one pass
+        objects = [cimClass.__new__(cimClass) for cimClass in header["classes"]]
+        body = SnapshotUnpickler(file, objects).load()
+    for obj, state in zip(objects, body["states"]):
+        obj.__dict__.update(state)
+    graph = {cimClass: {key: objects[idx] for key, idx in keys} for cimClass, keys in header["layout"]}
+    return OfflineArea(body["container"], graph)
+
+
+def loadCimModel(path: Union[str, Path], areaId: Optional[str] = None) -> OfflineArea:
+    # CIM XML or JSON-LD files and pickled snapshots written by saveCimSnapshot
+    if Path(path).suffix.lower() in snapshotSuffixes:
+        return loadCimSnapshot(path)
+    return loadCimFile(path, areaId)
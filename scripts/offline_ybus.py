@@ -0,0 +1,42 @@
+from argparse import ArgumentParser
+import json
+import logging
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from offline_cim import loadCimModel, saveCimSnapshot
+import ybus_utils as utils
+
+
+def main():
+    parser = ArgumentParser(description="Calculate the Ybus of a CIM model on disk without a GridAPPS-D platform.")
+    parser.add_argument("model", help="CIM XML or JSON-LD file, or a snapshot written with --snapshot")
+    parser.add_argument("--area-id", help="mRID of the Feeder to use as the area container")
+    parser.add_argument("--snapshot", help="save the loaded model as a snapshot at this path for faster reloads")
+    parser.add_argument("--output", help="write the Ybus as {bus1: {bus2: [real, imag]}} JSON to this path")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times the Ybus is calculated")
+    args = parser.parse_args()
+    # keep the per-row extraction dumps out of the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    start = time.perf_counter()
+    area = loadCimModel(args.model, args.area_id)
+    utils.initializeCimProfile(area)
+    print(f"loaded {args.model} in {time.perf_counter() - start:.3f} s")
+    if args.snapshot is not None:
+        saveCimSnapshot(area, args.snapshot)
+    Ybus = None
+    for run in range(args.repeat):
+        Ybus = utils.calculateSparseYbus(area)
+        stages = " ".join(f"{stage['stage']}={stage['seconds']:.3f}" for stage in Ybus.summary["stages"])
+        print(f"run {run}: {Ybus.summary['nodes']} nodes {Ybus.summary['entries']} entries "
+              f"{Ybus.summary['seconds']:.3f} s {stages}")
+    if args.output is not None and Ybus is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(Ybus.toDict(), file, indent=4, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+from pathlib import Path
+import random
+import sys
+from typing import Dict, List, NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from offline_cim import OfflineArea
+import ybus_utils as utils
+
+cim = utils.cim
+
+# line models the generator can use, sequence and ACLineSegment impedance lines are always 3-phase and tape shield
+# cables always 1-phase
+lineKinds = ("phase", "sequence", "acline", "overhead", "cn", "tapeshield")
+# wire spacings by line model and phase count, overhead spacings carry a neutral position after the phases
+spacingCoords = {
+    ("overhead", 1): [(0.0, 8.5), (0.5, 7.3)],
+    ("overhead", 2): [(0.0, 8.5), (1.5, 8.5), (0.75, 7.3)],
+    ("overhead", 3): [(0.0, 8.5), (0.76, 8.5), (2.13, 8.5), (1.22, 7.3)],
+    ("cn", 1): [(0.0, -1.0)],
+    ("cn", 2): [(0.0, -1.0), (0.15, -1.0)],
+    ("cn", 3): [(0.0, -1.0), (0.15, -1.0), (0.3, -1.0)],
+    ("tapeshield", 1): [(0.0, -1.0), (0.08, -1.0)]
+}
+switchClasses = [cim.LoadBreakSwitch, cim.Breaker, cim.Fuse, cim.Recloser, cim.Sectionaliser]
+
+
+class FeederSpec(NamedTuple):
+    nodeCount: int
+    # share of 3-, 2- and 1-phase lines
+    phaseMix: Dict[int, float]
+    # share of every line model in lineKinds
+    lineMix: Dict[str, float]
+    transformerCount: int
+    switchCount: int
+    capacitorCount: int
+    seed: int = 1
+
+
+def defaultFeederSpec(nodeCount: int, seed: int = 1) -> FeederSpec:
+    # roughly the make up of a North American distribution feeder with its service transformers
+    return FeederSpec(nodeCount=nodeCount,
+                      phaseMix={
+                          3: 0.4,
+                          2: 0.1,
+                          1: 0.5
+                      },
+                      lineMix={
+                          "phase": 0.45,
+                          "sequence": 0.1,
+                          "acline": 0.05,
+                          "overhead": 0.25,
+                          "cn": 0.1,
+                          "tapeshield": 0.05
+                      },
+                      transformerCount=max(nodeCount // 10, 1),
+                      switchCount=max(nodeCount // 50, 1),
+                      capacitorCount=max(nodeCount // 200, 1),
+                      seed=seed)
+
+
+def parseMix(mixStr: str) -> Dict[str, float]:
+    # "phase:4,overhead:1" style weights
+    mix = {}
+    for item in mixStr.split(","):
+        key, weight = item.split(":")
+        mix[key.strip()] = float(weight)
+    return mix
+
+
+class SyntheticFeederBuilder:
+    # Builds a radial feeder as a cimgraph graph with the classes and attributes the Ybus extraction reads. Every
+    # line, transformer and switch adds one bus, each hanging off a random one of the recently added buses.
+
+    def __init__(self, spec: FeederSpec):
+        self.spec = spec
+        self.rnd = random.Random(spec.seed)
+        self.area = OfflineArea(cim.Feeder(mRID=f"synthetic_feeder_{spec.nodeCount}"), {})
+        self.objectCount = 0
+        self.connectivityNodes: Dict[str, object] = {}
+        self.busNames: List[str] = ["SOURCEBUS"]
+        self.busPhases: Dict[str, str] = {"SOURCEBUS": "ABC"}
+        self.configs: Dict = {}
+
+    def make(self, cimClass, **attributes):
+        self.objectCount += 1
+        return cimClass(mRID=f"_{cimClass.__name__}_{self.objectCount}", **attributes)
+
+    def add(self, obj):
+        self.area.graph.setdefault(type(obj), {})[obj.mRID] = obj
+        return obj
+
+    def terminal(self, bus: str, sequenceNumber: int):
+        if bus not in self.connectivityNodes:
+            self.connectivityNodes[bus] = self.add(self.make(cim.ConnectivityNode, name=bus))
+        terminal = self.make(cim.Terminal, sequenceNumber=sequenceNumber)
+        terminal.ConnectivityNode = self.connectivityNodes[bus]
+        return terminal
+
+    def newBus(self, phases: str) -> str:
+        bus = f"N{len(self.busNames)}"
+        self.busNames.append(bus)
+        self.busPhases[bus] = phases
+        return bus
+
+    def parentBus(self, minPhases: int = 1) -> str:
+        # recent buses keep the feeder deep instead of a star around the source
+        for _ in range(20):
+            bus = self.busNames[self.rnd.randrange(max(len(self.busNames) - 50, 0), len(self.busNames))]
+            if len(self.busPhases[bus]) >= minPhases and self.busPhases[bus] != "s12":
+                return bus
+        return "SOURCEBUS"
+
+    def choose(self, mix: Dict):
+        keys = list(mix)
+        return self.rnd.choices(keys, weights=[mix[key] for key in keys])[0]
+
+    def phaseImpedance(self, phaseCount: int):
+        key = ("phase", phaseCount)
+        if key not in self.configs:
+            impedance = self.add(
+                self.make(cim.PerLengthPhaseImpedance, name=f"plpi{phaseCount}", conductorCount=phaseCount))
+            impedance.PhaseImpedanceData = [
+                cim.PhaseImpedanceData(row=row,
+                                       column=col,
+                                       r=3e-4 if row == col else 1e-4,
+                                       x=6.6e-4 if row == col else 2.2e-4 * (1 + 0.05 * col))
+                for row in range(1, phaseCount + 1) for col in range(1, row + 1)
+            ]
+            impedance.ACLineSegments = []
+            self.configs[key] = impedance
+        return self.configs[key]
+
+    def sequenceImpedance(self):
+        if "sequence" not in self.configs:
+            impedance = self.add(
+                self.make(cim.PerLengthSequenceImpedance, name="seq", r=2e-4, x=5e-4, r0=6e-4, x0=1.5e-3))
+            impedance.ACLineSegments = []
+            self.configs["sequence"] = impedance
+        return self.configs["sequence"]
+
+    def wireSpacing(self, kind: str, phaseCount: int):
+        key = (kind, phaseCount)
+        if key not in self.configs:
+            spacing = self.add(
+                self.make(cim.WireSpacingInfo,
+                          name=f"{kind}{phaseCount}",
+                          isCable="false" if kind == "overhead" else "true"))
+            spacing.WirePositions = [
+                self.make(cim.WirePosition, sequenceNumber=seq, xCoord=x, yCoord=y)
+                for seq, (x, y) in enumerate(spacingCoords[key], 1)
+            ]
+            spacing.ACLineSegments = []
+            self.configs[key] = spacing
+        return self.configs[key]
+
+    def wireInfo(self, kind: str):
+        if kind not in self.configs:
+            if kind == "overhead":
+                wire = self.make(cim.OverheadWireInfo, name="ohw", gmr=0.0088, rAC25=0.0002)
+            elif kind == "cn":
+                wire = self.make(cim.ConcentricNeutralCableInfo,
+                                 name="cnw",
+                                 gmr=0.0052,
+                                 rAC25=0.00025,
+                                 diameterOverJacket=0.04,
+                                 neutralStrandCount=13,
+                                 neutralStrandRadius=0.0008,
+                                 neutralStrandGmr=0.0006,
+                                 neutralStrandRDC20=0.0089)
+            else:
+                wire = self.make(cim.TapeShieldCableInfo,
+                                 name="tsw",
+                                 gmr=0.0052,
+                                 rAC25=0.00025,
+                                 diameterOverScreen=0.03,
+                                 tapeThickness=0.000127)
+            self.configs[kind] = self.add(wire)
+        return self.configs[kind]
+
+    def addLine(self, idx: int):
+        kind = self.choose(self.spec.lineMix)
+        phaseCount = self.choose(self.spec.phaseMix)
+        if kind in ("sequence", "acline"):
+            phaseCount = 3
+        elif kind == "tapeshield":
+            phaseCount = 1
+        bus1 = self.parentBus(phaseCount)
+        parentPhases = self.busPhases[bus1]
+        phaseCount = min(phaseCount, len(parentPhases))
+        start = idx % len(parentPhases)
+        phases = "".join(sorted((parentPhases * 2)[start:start + phaseCount]))
+        bus2 = self.newBus(phases)
+        line = self.make(cim.ACLineSegment, name=f"line{idx}", length=20.0 + 200.0 * self.rnd.random())
+        line.Terminals = [self.terminal(bus1, 1), self.terminal(bus2, 2)]
+        line.ACLineSegmentPhases = []
+        line.PerLengthImpedance = None
+        line.WireSpacingInfo = None
+        if kind == "phase":
+            line.PerLengthImpedance = self.phaseImpedance(phaseCount)
+            line.PerLengthImpedance.ACLineSegments.append(line)
+            line.ACLineSegmentPhases = [
+                self.make(cim.ACLineSegmentPhase, phase=cim.SinglePhaseKind(phase)) for phase in phases
+            ]
+        elif kind == "sequence":
+            line.PerLengthImpedance = self.sequenceImpedance()
+            line.PerLengthImpedance.ACLineSegments.append(line)
+        elif kind == "acline":
+            line.r, line.x, line.r0, line.x0 = 0.3, 0.6, 0.9, 1.8
+        else:
+            line.WireSpacingInfo = self.wireSpacing(kind, phaseCount)
+            line.WireSpacingInfo.ACLineSegments.append(line)
+            wires = [(phase, self.wireInfo(kind)) for phase in phases]
+            if kind != "cn":
+                wires.append(("N", self.wireInfo("overhead")))
+            for phase, wire in wires:
+                linePhase = self.make(cim.ACLineSegmentPhase, phase=cim.SinglePhaseKind(phase))
+                linePhase.WireInfo = wire
+                line.ACLineSegmentPhases.append(linePhase)
+        self.add(line)
+
+    def addTank(self, idx: int):
+        # service transformers are 1-phase center tapped, every fifth tank is a 3-phase bank
+        threePhase = idx % 5 == 0
+        bus1 = self.parentBus(3 if threePhase else 1)
+        if threePhase:
+            bus2 = self.newBus("ABC")
+            connections = "DY" if idx % 2 else "YY"
+            spec = [(1, connections[0], 12470, 500000, "ABC", bus1), (2, connections[1], 480, 500000, "ABC", bus2)]
+        else:
+            bus2 = self.newBus("s12")
+            phase = self.busPhases[bus1][idx % len(self.busPhases[bus1])]
+            spec = [(1, "I", 7200, 50000, phase, bus1), (2, "I", 120, 50000, "s1", bus2),
+                    (3, "I", 120, 50000, "s2", bus2)]
+        name = f"tank{idx}"
+        endInfos = []
+        tankEnds = []
+        for endNumber, connection, ratedU, ratedS, phases, bus in spec:
+            endInfo = self.make(cim.TransformerEndInfo,
+                                endNumber=endNumber,
+                                connectionKind=cim.WindingConnection(connection),
+                                ratedS=ratedS,
+                                ratedU=ratedU,
+                                r=0.9 + 0.1 * endNumber)
+            endInfo.EnergisedEndShortCircuitTests = []
+            endInfo.GroundedEndShortCircuitTests = []
+            endInfo.EnergisedEndNoLoadTests = []
+            endInfos.append(endInfo)
+            tankEnd = self.make(cim.TransformerTankEnd, endNumber=endNumber, phases=cim.PhaseCode(phases))
+            tankEnd.Terminal = self.terminal(bus, 1)
+            tankEnd.BaseVoltage = self.make(cim.BaseVoltage, nominalVoltage=ratedU)
+            tankEnds.append(tankEnd)
+        for energised, grounded in ([(0, 1)] if threePhase else [(0, 1), (1, 2), (0, 2)]):
+            shortCircuitTest = self.make(cim.ShortCircuitTest, leakageImpedance=2.0 + energised + grounded)
+            shortCircuitTest.EnergisedEnd = endInfos[energised]
+            shortCircuitTest.GroundedEnds = [endInfos[grounded]]
+            endInfos[energised].EnergisedEndShortCircuitTests.append(shortCircuitTest)
+            endInfos[grounded].GroundedEndShortCircuitTests.append(shortCircuitTest)
+        endInfos[0].EnergisedEndNoLoadTests.append(self.make(cim.NoLoadTest, loss=0.06, excitingCurrent=0.5))
+        tankInfo = self.make(cim.TransformerTankInfo, name=f"{name}_info")
+        tankInfo.TransformerEndInfos = endInfos
+        tank = self.make(cim.TransformerTank, name=name)
+        tank.TransformerTankInfo = tankInfo
+        tank.Assets = []
+        tank.TransformerTankEnds = tankEnds
+        self.add(tank)
+
+    def addPowerTransformer(self, idx: int):
+        bus1 = self.parentBus(3)
+        bus2 = self.newBus("ABC")
+        ends = []
+        for endNumber, bus, connection, ratedU in ((1, bus1, "D" if idx % 2 else "Y", 12470), (2, bus2, "Y", 4160)):
+            end = self.make(cim.PowerTransformerEnd,
+                            endNumber=endNumber,
+                            ratedS=5000000,
+                            ratedU=ratedU,
+                            r=0.5 + 0.1 * endNumber,
+                            connectionKind=cim.WindingConnection(connection))
+            end.Terminal = self.terminal(bus, endNumber)
+            end.CoreAdmittance = self.make(cim.TransformerCoreAdmittance, b=1e-6 * endNumber, g=2e-7 * endNumber)
+            ends.append(end)
+        powerTransformer = self.make(cim.PowerTransformer, name=f"xfmr{idx}")
+        powerTransformer.PowerTransformerEnd = ends
+        self.add(powerTransformer)
+        meshImpedance = self.make(cim.TransformerMeshImpedance, x=2.5)
+        meshImpedance.FromTransformerEnd = ends[0]
+        meshImpedance.ToTransformerEnd = [ends[1]]
+        self.add(meshImpedance)
+
+    def addSwitch(self, idx: int):
+        bus1 = self.parentBus()
+        phases = self.busPhases[bus1]
+        switch = self.make(switchClasses[idx % len(switchClasses)],
+                           name=f"sw{idx}",
+                           open="true" if idx % 7 == 6 else "false")
+        switch.Terminals = [self.terminal(bus1, 1), self.terminal(self.newBus(phases), 2)]
+        switch.SwitchPhase = []
+        if len(phases) < 3:
+            switch.SwitchPhase = [
+                self.make(cim.SwitchPhase, phaseSide1=cim.SinglePhaseKind(phase), phaseSide2=cim.SinglePhaseKind(phase))
+                for phase in phases
+            ]
+        self.add(switch)
+
+    def addCapacitor(self, idx: int):
+        bus = self.parentBus()
+        capacitor = self.make(cim.LinearShuntCompensator, name=f"cap{idx}", bPerSection=0.0015)
+        capacitor.Terminals = [self.terminal(bus, 1)]
+        capacitor.ShuntCompensatorPhase = []
+        if len(self.busPhases[bus]) < 3:
+            capacitor.ShuntCompensatorPhase = [
+                self.make(cim.LinearShuntCompensatorPhase, phase=cim.SinglePhaseKind(phase))
+                for phase in self.busPhases[bus]
+            ]
+        self.add(capacitor)
+
+    def build(self) -> OfflineArea:
+        spec = self.spec
+        # every tenth transformer is a substation style PowerTransformer, the rest are tanks
+        powerTransformerCount = spec.transformerCount // 10
+        tankCount = spec.transformerCount - powerTransformerCount
+        lineCount = max(spec.nodeCount - spec.transformerCount - spec.switchCount, 1)
+        # lines, transformers and switches are interleaved so all of them spread over the whole feeder
+        elements = ["line"] * lineCount + ["tank"] * tankCount + ["xfmr"] * powerTransformerCount + \
+            ["switch"] * spec.switchCount
+        self.rnd.shuffle(elements)
+        # the first element has to be a line so there is a bus other than the source to hang the rest off
+        elements.remove("line")
+        elements.insert(0, "line")
+        counts = {}
+        adders = {
+            "line": self.addLine,
+            "tank": self.addTank,
+            "xfmr": self.addPowerTransformer,
+            "switch": self.addSwitch
+        }
+        for element in elements:
+            counts[element] = counts.get(element, 0) + 1
+            adders[element](counts[element])
+        for idx in range(spec.capacitorCount):
+            self.addCapacitor(idx)
+        return self.area
+
+
+def buildSyntheticFeeder(spec: FeederSpec) -> OfflineArea:
+    return SyntheticFeederBuilder(spec).build()
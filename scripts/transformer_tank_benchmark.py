@@ -0,0 +1,114 @@
+import importlib
+import logging
+from pathlib import Path
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sparse_ybus import SparseYbus
+import ybus_utils as utils
+
+cim = importlib.import_module("cimgraph.data_profile.rc4_2021")
+
+# number of single-phase service transformers in each synthetic model
+tankCounts = [2500, 5000, 10000, 20000]
+
+
+class SyntheticArea:
+    # just enough of a cimgraph DistributedArea for utils.CimTables
+    def __init__(self, mRID: str):
+        self.container = SimpleNamespace(mRID=mRID)
+        self.graph: Dict = {}
+
+    def add(self, obj):
+        self.graph.setdefault(type(obj), {})[obj.mRID] = obj
+
+
+def makeServiceTransformer(area: SyntheticArea, idx: int, nodes: Dict):
+    # 1-phase, 3-winding center tapped service transformer fed from one of three primary phases
+    name = f"svc{idx}"
+    phase = "ABC"[idx % 3]
+    primaryBus = f"p{idx // 10}"
+    secondaryBus = f"s{idx}"
+    spec = [(1, 7200, phase, primaryBus), (2, 120, "s1", secondaryBus), (3, 120, "s2", secondaryBus)]
+    endInfos = []
+    tankEnds = []
+    for endNumber, ratedU, phases, bus in spec:
+        endInfo = cim.TransformerEndInfo(mRID=f"{name}_info{endNumber}",
+                                         endNumber=endNumber,
+                                         connectionKind=cim.WindingConnection("I"),
+                                         ratedS=25000,
+                                         ratedU=ratedU,
+                                         r=0.9 + 0.1 * endNumber)
+        endInfo.EnergisedEndShortCircuitTests = []
+        endInfo.GroundedEndShortCircuitTests = []
+        endInfo.EnergisedEndNoLoadTests = []
+        endInfos.append(endInfo)
+        if bus not in nodes:
+            nodes[bus] = cim.ConnectivityNode(mRID=f"cn_{bus}", name=bus)
+        terminal = cim.Terminal(mRID=f"{name}_t{endNumber}", sequenceNumber=1)
+        terminal.ConnectivityNode = nodes[bus]
+        tankEnd = cim.TransformerTankEnd(mRID=f"{name}_end{endNumber}",
+                                         endNumber=endNumber,
+                                         phases=cim.PhaseCode(phases))
+        tankEnd.Terminal = terminal
+        tankEnd.BaseVoltage = cim.BaseVoltage(mRID=f"bv{ratedU}", nominalVoltage=ratedU)
+        tankEnds.append(tankEnd)
+    for energised, grounded in ((0, 1), (1, 2), (0, 2)):
+        shortCircuitTest = cim.ShortCircuitTest(mRID=f"{name}_sct{energised}{grounded}",
+                                                leakageImpedance=2.0 + energised + grounded)
+        shortCircuitTest.EnergisedEnd = endInfos[energised]
+        shortCircuitTest.GroundedEnds = [endInfos[grounded]]
+        # every test is reachable from both of its ends so each one is visited twice during extraction
+        endInfos[energised].EnergisedEndShortCircuitTests.append(shortCircuitTest)
+        endInfos[grounded].GroundedEndShortCircuitTests.append(shortCircuitTest)
+    noLoadTest = cim.NoLoadTest(mRID=f"{name}_nlt", loss=0.06, excitingCurrent=0.5)
+    endInfos[0].EnergisedEndNoLoadTests.append(noLoadTest)
+    tankInfo = cim.TransformerTankInfo(mRID=f"{name}_tankinfo", name=f"{name}_tankinfo")
+    tankInfo.TransformerEndInfos = endInfos
+    tank = cim.TransformerTank(mRID=name, name=name)
+    tank.TransformerTankInfo = tankInfo
+    tank.Assets = []
+    tank.TransformerTankEnds = tankEnds
+    area.add(tank)
+
+
+def buildArea(tankCount: int) -> SyntheticArea:
+    area = SyntheticArea(f"synthetic_{tankCount}")
+    nodes = {}
+    for idx in range(tankCount):
+        makeServiceTransformer(area, idx, nodes)
+    return area
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or tankCounts
+    # keep the per-row query dumps out of the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    results: List[Dict] = []
+    print(f"{'tanks':>8} {'sct rows':>9} {'extract s':>10} {'fill s':>8} {'us/tank':>8}")
+    for tankCount in counts:
+        area = buildArea(tankCount)
+        cimTables = utils.CimTables(area)
+        start = time.perf_counter()
+        tables = cimTables.transformerTanks
+        extractSeconds = time.perf_counter() - start
+        Ybus = SparseYbus(24 * tankCount)
+        start = time.perf_counter()
+        utils.fillYbusTransformerTankXfmrs(cimTables, Ybus)
+        Ybus.tocsr()
+        fillSeconds = time.perf_counter() - start
+        perTank = 1e6 * (extractSeconds + fillSeconds) / tankCount
+        results.append({"tanks": tankCount, "perTank": perTank})
+        print(f"{tankCount:>8} {len(tables.shortCircuitTests):>9} {extractSeconds:>10.3f} {fillSeconds:>8.3f} "
+              f"{perTank:>8.1f}")
+    # with linear scaling the cost per tank stays flat as the model grows
+    growth = results[-1]["perTank"] / results[0]["perTank"]
+    print(f"per tank cost growth from {results[0]['tanks']} to {results[-1]['tanks']} tanks: {growth:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
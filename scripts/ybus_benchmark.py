@@ -0,0 +1,192 @@
+from argparse import ArgumentParser
+import json
+import logging
+from pathlib import Path
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sparse_ybus import SparseYbus
+from synthetic_feeder import FeederSpec, buildSyntheticFeeder, defaultFeederSpec, parseMix
+from ybus_metrics import StageTimer
+import ybus_utils as utils
+
+# CimTables groups in the order the fill stages first read them
+tableGroups = ["lines", "powerTransformers", "transformerTanks", "switches", "shunts"]
+BASELINE_VERSION = 1
+
+
+def measure(func: Callable, trackMemory: bool) -> Tuple[object, float, int]:
+    # tracemalloc slows the measured code down a lot, so seconds and peak memory come from separate runs
+    if not trackMemory:
+        start = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - start, 0
+    tracemalloc.start()
+    try:
+        # a StageTimer keeps its peak when the stages reset the tracemalloc peak for their own timers
+        timer = StageTimer()
+        result = func()
+        peakBytes = timer.stop()["peakBytes"]
+    finally:
+        tracemalloc.stop()
+    return result, 0.0, peakBytes
+
+
+def runStages(spec: FeederSpec, trackMemory: bool) -> Dict[str, Dict]:
+    area = buildSyntheticFeeder(spec)
+    cimTables = utils.CimTables(area)
+    results = {}
+    for tableGroup in tableGroups:
+        table, seconds, peakBytes = measure(lambda: getattr(cimTables, tableGroup), trackMemory)
+        rowCount = sum(len(rows) for rows in table) if isinstance(table, tuple) else len(table)
+        results[tableGroup] = {"seconds": seconds, "peakBytes": peakBytes, "rows": rowCount}
+    Ybus = SparseYbus(utils.estimateYbusTripletCount(area))
+    for stageName, fillStage in utils.ybusFillStages:
+        tripletCount = Ybus.tripletCount
+        _, seconds, peakBytes = measure(lambda: fillStage(cimTables, Ybus), trackMemory)
+        results[stageName] = {"seconds": seconds, "peakBytes": peakBytes, "triplets": Ybus.tripletCount - tripletCount}
+    _, seconds, peakBytes = measure(Ybus.tocsr, trackMemory)
+    results["tocsr"] = {"seconds": seconds, "peakBytes": peakBytes, "triplets": Ybus.tripletCount}
+    results["total"] = {"nodes": Ybus.nodeCount, "triplets": Ybus.tripletCount}
+    return results
+
+
+def benchmarkSize(spec: FeederSpec, repeat: int) -> Dict[str, Dict]:
+    # the fastest of the repeats is kept for the timings, the memory pass runs once
+    best = None
+    for _ in range(repeat):
+        results = runStages(spec, False)
+        if best is None:
+            best = results
+            continue
+        for stage, result in results.items():
+            if "seconds" in result:
+                best[stage]["seconds"] = min(best[stage]["seconds"], result["seconds"])
+    for stage, result in runStages(spec, True).items():
+        if "peakBytes" in result:
+            best[stage]["peakBytes"] = result["peakBytes"]
+    for result in best.values():
+        if "seconds" not in result:
+            continue
+        units = result.get("rows", result.get("triplets", 0))
+        result["throughput"] = round(units / result["seconds"], 1) if result["seconds"] > 0 else None
+        result["seconds"] = round(result["seconds"], 6)
+    best["total"]["seconds"] = round(
+        sum(result["seconds"] for stage, result in best.items() if stage != "total" and "seconds" in result), 6)
+    return best
+
+
+def benchmarkStageThreads(spec: FeederSpec, threadCounts: List[int], repeat: int) -> Dict[str, float]:
+    # fastest full assembly of the materialized tables with each of the stage thread counts
+    cimTables = utils.CimTables(buildSyntheticFeeder(spec)).materialize()
+    results = {}
+    try:
+        for threadCount in threadCounts:
+            utils.setYbusStageThreads(threadCount)
+            best = None
+            for _ in range(repeat):
+                _, seconds, _ = measure(lambda: utils.assembleSparseYbus(cimTables).tocsr(), False)
+                best = seconds if best is None else min(best, seconds)
+            results[str(threadCount)] = round(best, 6)
+    finally:
+        utils.setYbusStageThreads(1)
+    return results
+
+
+def compareToBaseline(results: Dict, baseline: Dict, tolerance: float, minSeconds: float) -> List[str]:
+    # a stage regresses when it is slower or uses more memory than the baseline by more than the tolerance factor,
+    # stages faster than minSeconds in the baseline are too noisy to compare their time
+    regressions = []
+    for size, stages in results["sizes"].items():
+        baseStages = baseline.get("sizes", {}).get(size)
+        # a baseline of a feeder generated with other parameters can't be compared
+        if baseStages is None or baseStages.get("feeder") != stages["feeder"]:
+            continue
+        for stage, result in stages.items():
+            baseResult = baseStages.get(stage)
+            if baseResult is None or "seconds" not in result:
+                continue
+            if baseResult["seconds"] >= minSeconds and result["seconds"] > baseResult["seconds"] * tolerance:
+                regressions.append(f"{size} nodes {stage}: {result['seconds']:.6f} s, "
+                                   f"baseline {baseResult['seconds']:.6f} s")
+            if baseResult.get("peakBytes") and result["peakBytes"] > baseResult["peakBytes"] * tolerance:
+                regressions.append(f"{size} nodes {stage}: {result['peakBytes']} peak bytes, "
+                                   f"baseline {baseResult['peakBytes']} peak bytes")
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description="Time the Ybus CIM table extraction and fill stages on synthetic feeders.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="feeder node counts")
+    parser.add_argument("--phase-mix", help="weights of the line phase counts, e.g. 3:4,2:1,1:5")
+    parser.add_argument(
+        "--line-mix", help="weights of the line models, e.g. phase:9,sequence:2,acline:1,overhead:5,cn:2,tapeshield:1")
+    parser.add_argument("--transformers", type=float, default=0.1, help="transformers per node")
+    parser.add_argument("--switches", type=float, default=0.02, help="switches per node")
+    parser.add_argument("--seed", type=int, default=1, help="random seed of the feeder generator")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per size, the fastest one is kept")
+    parser.add_argument("--output", help="write the results as a JSON baseline to this path")
+    parser.add_argument("--baseline", help="JSON baseline to compare the results against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown factor against the baseline")
+    parser.add_argument("--stage-threads",
+                        type=int,
+                        nargs="+",
+                        help="also time the full assembly with each of these YBUS_STAGE_THREADS values")
+    parser.add_argument("--min-seconds",
+                        type=float,
+                        default=0.005,
+                        help="baseline stage time below which timings are not compared")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    # every stage runs in sequence on this thread so the stage timings don't overlap
+    utils.setYbusStageThreads(1)
+    results = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "sizes": {}
+    }
+    for nodeCount in args.sizes:
+        spec = defaultFeederSpec(nodeCount, args.seed)
+        spec = spec._replace(transformerCount=max(int(nodeCount * args.transformers), 1),
+                             switchCount=max(int(nodeCount * args.switches), 1))
+        if args.phase_mix is not None:
+            spec = spec._replace(phaseMix={int(phases): weight for phases, weight in parseMix(args.phase_mix).items()})
+        if args.line_mix is not None:
+            spec = spec._replace(lineMix=parseMix(args.line_mix))
+        stages = benchmarkSize(spec, args.repeat)
+        # stored as it reads back from JSON so it compares equal to the feeder of a loaded baseline
+        stages["feeder"] = json.loads(json.dumps(spec._asdict()))
+        if args.stage_threads is not None:
+            stages["stageThreads"] = benchmarkStageThreads(spec, args.stage_threads, args.repeat)
+        results["sizes"][str(nodeCount)] = stages
+        print(f"{nodeCount} nodes: {stages['total']['nodes']} Ybus nodes {stages['total']['triplets']} triplets "
+              f"{stages['total']['seconds']:.3f} s")
+        for stage, result in stages.items():
+            if stage not in ("total", "feeder", "stageThreads"):
+                print(f"    {stage:<42} {result['seconds']:>10.4f} s {result['peakBytes'] / 1e6:>9.2f} MB "
+                      f"{result['throughput'] or 0:>12.0f} /s")
+        for threadCount, seconds in stages.get("stageThreads", {}).items():
+            print(f"    assembly with {threadCount} stage threads {seconds:>10.4f} s")
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4, sort_keys=True)
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compareToBaseline(results, baseline, args.tolerance, args.min_seconds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
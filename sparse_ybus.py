@@ -0,0 +1,449 @@
+# Copyright (c) 2023, Battelle Memorial Institute All rights reserved.
+# Battelle Memorial Institute (hereinafter Battelle) hereby grants permission to any person or entity
+# lawfully obtaining a copy of this software and associated documentation files (hereinafter the
+# Software) to redistribute and use the Software in source and binary forms, with or without modification.
+# Such person or entity may use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and may permit others to do so, subject to the following conditions:
+# Redistributions of source code must retain the above copyright notice, this list of conditions and the
+# following disclaimers.
+# Redistributions in binary form must reproduce the above copyright notice, this list of conditions and
+# the following disclaimer in the documentation and/or other materials provided with the distribution.
+# Other than as used herein, neither the name Battelle Memorial Institute or Battelle may be used in any
+# form whatsoever without the express written consent of Battelle.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL
+# BATTELLE OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY,
+# OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# General disclaimer for use with OSS licenses
+
+# This material was prepared as an account of work sponsored by an agency of the United States Government.
+# Neither the United States Government nor the United States Department of Energy, nor Battelle, nor any
+# of their employees, nor any jurisdiction or organization that has cooperated in the development of these
+# materials, makes any warranty, express or implied, or assumes any legal liability or responsibility for
+# the accuracy, completeness, or usefulness or any information, apparatus, product, software, or process
+# disclosed, or represents that its use would not infringe privately owned rights.
+
+# Reference herein to any specific commercial product, process, or service by trade name, trademark, manufacturer,
+# or otherwise does not necessarily constitute or imply its endorsement, recommendation, or favoring by the United
+# States Government or any agency thereof, or Battelle Memorial Institute. The views and opinions of authors expressed
+# herein do not necessarily state or reflect those of the United States Government or any agency thereof.
+
+# PACIFIC NORTHWEST NATIONAL LABORATORY operated by BATTELLE for the
+# UNITED STATES DEPARTMENT OF ENERGY under Contract DE-AC05-76RL01830
+# -------------------------------------------------------------------------------
+
+from bisect import bisect_left, bisect_right
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sparse
+
+logger = logging.getLogger(__name__)
+
+# triplet kinds mirroring the fillYbusAdd, fillYbusUnique and fillYbusOnlyAddShunts semantics
+ADD = 0
+UNIQUE = 1
+SHUNT = 2
+
+
+class SparseYbus:
+    # Accumulates Ybus contributions as (row, col, value) triplets against an integer node-phase index and
+    # reduces them into a symmetric scipy.sparse CSR matrix on demand. Only the upper triangle is stored while
+    # accumulating. Unique entries are resolved last-write-wins, overwriting any additive contributions stamped
+    # before them, and shunt entries are only applied to nodes that already have a diagonal entry.
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(int(capacity), 1)
+        # (bus, phase) of every node by index, the phase is None for node names without a phase suffix
+        self.nodeKeys: List[Tuple[str, Optional[str]]] = []
+        self._busNodes: Dict[str, Dict[Optional[str], int]] = {}
+        # node names are only rendered from nodeKeys when something asks for them
+        self._nodeNames: List[str] = []
+        self._nodeIndex: Dict[str, int] = {}
+        self._rows = np.empty(capacity, dtype=np.int64)
+        self._cols = np.empty(capacity, dtype=np.int64)
+        self._vals = np.empty(capacity, dtype=complex)
+        self._kinds = np.empty(capacity, dtype=np.int8)
+        self._size = 0
+        self._matrix: Optional[sparse.csr_matrix] = None
+        # per-stage record filled in by ybus_utils.calculateSparseYbus
+        self.summary: Dict = {}
+        # {switch name: {"open": bool, "nodes": [[bus1, bus2], ...]}} filled in by the switch fill stage
+        self.switches: Dict = {}
+        # node names in sorted order along with their indexes for prefix queries, rebuilt when nodes are added
+        self._sortedNodes: Optional[Tuple[List[str], List[int]]] = None
+        # patches to upper triangle (row, col) entries the reduced matrix can't take in place, either because the entry
+        # doesn't exist in it yet or because the patch cancels it out, applied on the next read
+        self._pendingPatches: Dict[Tuple[int, int], complex] = {}
+        # set once the reduced matrix has been patched or rebuilt from CSR, the triplets no longer describe it then and
+        # are rewritten from it before they are needed again
+        self._tripletsStale = False
+
+    @classmethod
+    def fromCsr(cls, nodeNames: List[str], matrix: sparse.csr_matrix) -> "SparseYbus":
+        # rebuilds a Ybus from an already reduced matrix, e.g. one loaded from the Ybus cache
+        Ybus = cls()
+        for node in nodeNames:
+            Ybus.getNodeIndex(node)
+        Ybus._matrix = matrix.tocsr()
+        Ybus._tripletsStale = True
+        return Ybus
+
+    def merge(self, other: "SparseYbus"):
+        # adds every entry of another Ybus, so entries on nodes both of them share are summed
+        upper = sparse.triu(other.tocsr(), format="coo")
+        otherIdx = np.array([self.nodeId(bus, phase) for bus, phase in other.nodeKeys], dtype=np.int64)
+        self.extend(otherIdx[upper.row], otherIdx[upper.col], upper.data, ADD)
+        for switchName, switch in other.switches.items():
+            self.switches.setdefault(switchName, {"open": switch["open"], "nodes": [list(n) for n in switch["nodes"]]})
+
+    def appendTriplets(self, other: "SparseYbus"):
+        # appends the unreduced triplets of another Ybus with their kinds, so a Ybus filled stage by stage into
+        # separate buffers reduces to the same matrix as one filled in place in the same order
+        other._compactTriplets()
+        otherIdx = np.array([self.nodeId(bus, phase) for bus, phase in other.nodeKeys], dtype=np.int64)
+        size = other._size
+        if size > 0:
+            self.extend(otherIdx[other._rows[:size]], otherIdx[other._cols[:size]], other._vals[:size],
+                        other._kinds[:size])
+        for switchName, switch in other.switches.items():
+            self.switches.setdefault(switchName, {"open": switch["open"], "nodes": []})["nodes"].extend(switch["nodes"])
+
+    def __getstate__(self) -> Dict:
+        # only the filled part of the triplet buffers is pickled when a Ybus is sent to another process
+        self._compactTriplets()
+        state = self.__dict__.copy()
+        for name in ("_rows", "_cols", "_vals", "_kinds"):
+            state[name] = state[name][:self._size].copy()
+        state["_nodeNames"] = []
+        state["_nodeIndex"] = {}
+        return state
+
+    @property
+    def tripletCount(self) -> int:
+        self._compactTriplets()
+        return self._size
+
+    @property
+    def nodeCount(self) -> int:
+        return len(self.nodeKeys)
+
+    @property
+    def nodeNames(self) -> List[str]:
+        names = self._nodeNames
+        for bus, phase in self.nodeKeys[len(names):]:
+            names.append(bus if phase is None else bus + '.' + phase)
+        return names
+
+    @property
+    def nodeIndex(self) -> Dict[str, int]:
+        index = self._nodeIndex
+        names = self.nodeNames
+        for idx in range(len(index), len(names)):
+            index[names[idx]] = idx
+        return index
+
+    def nodeId(self, bus: str, phase: Optional[str]) -> int:
+        # interns a (bus, phase) pair so the fill stages can stamp without building node name strings
+        phases = self._busNodes.get(bus)
+        if phases is None:
+            phases = self._busNodes[bus] = {}
+        idx = phases.get(phase)
+        if idx is None:
+            idx = phases[phase] = len(self.nodeKeys)
+            self.nodeKeys.append((bus, phase))
+        return idx
+
+    def nodeIds(self, bus: str, phases: Iterable[str]) -> List[int]:
+        return [self.nodeId(bus, phase) for phase in phases]
+
+    def crossPhaseNodes(self, node1: int, node2: int) -> Tuple[int, int]:
+        # the node on the bus of node1 with the phase of node2 and the one on the bus of node2 with the phase of node1
+        bus1, phase1 = self.nodeKeys[node1]
+        bus2, phase2 = self.nodeKeys[node2]
+        return self.nodeId(bus1, phase2), self.nodeId(bus2, phase1)
+
+    def getNodeIndex(self, node: str) -> int:
+        bus, sep, phase = node.rpartition('.')
+        if not sep:
+            return self.nodeId(node, None)
+        return self.nodeId(bus, phase)
+
+    def add(self, bus1: str, bus2: str, Yval: complex):
+        self.stamp(self.getNodeIndex(bus1), self.getNodeIndex(bus2), Yval, ADD)
+
+    def setUnique(self, bus1: str, bus2: str, Yval: complex):
+        self.stamp(self.getNodeIndex(bus1), self.getNodeIndex(bus2), Yval, UNIQUE)
+
+    def addShunt(self, bus: str, Yval: complex):
+        idx = self.getNodeIndex(bus)
+        self.stamp(idx, idx, Yval, SHUNT)
+
+    def patch(self, bus1: str, bus2: str, Yval: complex):
+        # Adds Yval to one entry of the reduced Ybus, which stays the source of truth from then on. Entries that
+        # exist and stay nonzero are updated in place. Entries that are new or cancel out are left pending until the
+        # next read, where a cancelled entry is removed like a rebuild without the patched equipment would leave it out.
+        matrix = self._matrix
+        if matrix is None:
+            matrix = self.tocsr()
+        row = self.getNodeIndex(bus1)
+        col = self.getNodeIndex(bus2)
+        key = (min(row, col), max(row, col))
+        self._tripletsStale = True
+        positions = None
+        if key not in self._pendingPatches and matrix.shape[0] == self.nodeCount:
+            positions = self._entryPositions(matrix, row, col)
+        if positions is not None and matrix.data[positions[0]] + Yval != 0:
+            matrix.data[positions] += Yval
+        else:
+            self._pendingPatches[key] = self._pendingPatches.get(key, 0j) + Yval
+
+    @staticmethod
+    def _entryPositions(matrix: sparse.csr_matrix, row: int, col: int) -> Optional[List[int]]:
+        # positions of the (row, col) and (col, row) entries in the data of the matrix, None if it doesn't hold them
+        if not matrix.has_sorted_indices:
+            matrix.sort_indices()
+        positions = []
+        for r, c in {(row, col), (col, row)}:
+            start = matrix.indptr[r]
+            end = matrix.indptr[r + 1]
+            k = start + int(np.searchsorted(matrix.indices[start:end], c))
+            if k == end or matrix.indices[k] != c:
+                return None
+            positions.append(k)
+        return positions
+
+    def _applyPatches(self, matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        n = self.nodeCount
+        keys = np.array(list(self._pendingPatches.keys()), dtype=np.int64).reshape(-1, 2)
+        vals = np.array(list(self._pendingPatches.values()), dtype=complex)
+        self._pendingPatches = {}
+        r = keys[:, 0]
+        c = keys[:, 1]
+        offDiagonal = r != c
+        coo = matrix.tocoo()
+        # the existing value comes first in both halves so they sum to bit-identical values
+        fullRows = np.concatenate((coo.row, r, c[offDiagonal]))
+        fullCols = np.concatenate((coo.col, c, r[offDiagonal]))
+        fullVals = np.concatenate((coo.data, vals, vals[offDiagonal]))
+        patched = sparse.coo_matrix((fullVals, (fullRows, fullCols)), shape=(n, n))
+        patched.sum_duplicates()
+        # explicit zeros from the fill stages are kept, only entries a patch cancelled out are dropped
+        entryKeys = np.minimum(patched.row, patched.col).astype(np.int64) * n + np.maximum(patched.row, patched.col)
+        isCancelled = (patched.data == 0) & np.isin(entryKeys, r * n + c)
+        keep = ~isCancelled
+        return sparse.coo_matrix((patched.data[keep], (patched.row[keep], patched.col[keep])), shape=(n, n)).tocsr()
+
+    def _compactTriplets(self):
+        # replaces the triplets with the upper triangle of the reduced matrix once they no longer describe it, so
+        # patches don't pile up in the buffers and later stamps add to what the matrix holds
+        if not self._tripletsStale:
+            return
+        upper = sparse.triu(self.tocsr(), format="coo")
+        self._tripletsStale = False
+        self._size = 0
+        self._reserve(upper.nnz)
+        self._rows[:upper.nnz] = upper.row
+        self._cols[:upper.nnz] = upper.col
+        self._vals[:upper.nnz] = upper.data
+        self._kinds[:upper.nnz] = ADD
+        self._size = upper.nnz
+
+    def extend(self, rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, kind: Union[int, np.ndarray] = ADD):
+        # bulk version of add/setUnique/addShunt for stages that already work with node indexes
+        rows = np.asarray(rows, dtype=np.int64).ravel()
+        cols = np.asarray(cols, dtype=np.int64).ravel()
+        vals = np.asarray(vals, dtype=complex).ravel()
+        count = len(rows)
+        if count == 0:
+            return
+        self._compactTriplets()
+        self._reserve(self._size + count)
+        start = self._size
+        end = start + count
+        self._rows[start:end] = np.minimum(rows, cols)
+        self._cols[start:end] = np.maximum(rows, cols)
+        self._vals[start:end] = vals
+        self._kinds[start:end] = kind
+        self._size = end
+        self._matrix = None
+
+    def stamp(self, row: int, col: int, Yval: complex, kind: int = ADD):
+        if self._tripletsStale:
+            self._compactTriplets()
+        if self._size == len(self._rows):
+            self._reserve(self._size + 1)
+        if row > col:
+            row, col = col, row
+        k = self._size
+        self._rows[k] = row
+        self._cols[k] = col
+        self._vals[k] = Yval
+        self._kinds[k] = kind
+        self._size = k + 1
+        self._matrix = None
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._rows):
+            return
+        newCapacity = max(capacity, 2 * len(self._rows))
+        for name in ("_rows", "_cols", "_vals", "_kinds"):
+            old = getattr(self, name)
+            new = np.empty(newCapacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _warnOverwritten(self, keys: np.ndarray, n: int):
+        for key in np.unique(keys).tolist():
+            bus1 = self.nodeNames[key // n]
+            bus2 = self.nodeNames[key % n]
+            logger.warning(f'Unexpected existing value found for Ybus[{bus1}][{bus2}] when filling model value')
+
+    def _reduce(self) -> sparse.csr_matrix:
+        n = self.nodeCount
+        size = self._size
+        rows = self._rows[:size]
+        cols = self._cols[:size]
+        kinds = self._kinds[:size]
+        keys = rows * n + cols
+        positions = np.arange(size)
+        # keep only the final write of every unique entry
+        uniqueIdx = positions[kinds == UNIQUE]
+        order = np.lexsort((uniqueIdx, keys[uniqueIdx]))
+        uniqueIdx = uniqueIdx[order]
+        uniqueKeys = keys[uniqueIdx]
+        isLast = np.ones(len(uniqueIdx), dtype=bool)
+        isLast[:-1] = uniqueKeys[1:] != uniqueKeys[:-1]
+        if not isLast.all():
+            self._warnOverwritten(uniqueKeys[~isLast], n)
+        uniqueIdx = uniqueIdx[isLast]
+        uniqueKeys = uniqueKeys[isLast]
+        # additive contributions stamped before the final unique write of the same entry are overwritten by it
+        addIdx = positions[kinds == ADD]
+        addKeys = keys[addIdx]
+        loc = np.minimum(np.searchsorted(uniqueKeys, addKeys), max(len(uniqueKeys) - 1, 0))
+        if len(uniqueKeys) > 0:
+            overwritten = (uniqueKeys[loc] == addKeys) & (addIdx < uniqueIdx[loc])
+            if overwritten.any():
+                self._warnOverwritten(addKeys[overwritten], n)
+            addIdx = addIdx[~overwritten]
+        coreIdx = np.concatenate((addIdx, uniqueIdx))
+        # shunt contributions are only added to existing diagonal entries
+        hasDiagonal = np.zeros(n, dtype=bool)
+        coreRows = rows[coreIdx]
+        hasDiagonal[coreRows[coreRows == cols[coreIdx]]] = True
+        shuntIdx = positions[kinds == SHUNT]
+        isApplied = hasDiagonal[rows[shuntIdx]]
+        for idx in np.unique(rows[shuntIdx[~isApplied]]).tolist():
+            bus = self.nodeNames[idx]
+            logger.warning(f'Existing value not found for Ybus[{bus}][{bus}] when adding shunt element model '
+                           'contribution')
+        allIdx = np.concatenate((coreIdx, shuntIdx[isApplied]))
+        upper = sparse.coo_matrix((self._vals[:size][allIdx], (rows[allIdx], cols[allIdx])), shape=(n, n))
+        # sum duplicates once in the upper triangle so both halves of the matrix hold bit-identical values
+        upper.sum_duplicates()
+        r = upper.row
+        c = upper.col
+        v = upper.data
+        offDiagonal = r != c
+        fullRows = np.concatenate((r, c[offDiagonal]))
+        fullCols = np.concatenate((c, r[offDiagonal]))
+        fullVals = np.concatenate((v, v[offDiagonal]))
+        # explicit zeros are kept as entries
+        return sparse.coo_matrix((fullVals, (fullRows, fullCols)), shape=(n, n)).tocsr()
+
+    def tocsr(self) -> sparse.csr_matrix:
+        if self._matrix is None:
+            self._matrix = self._reduce()
+        if len(self._pendingPatches) > 0:
+            self._matrix = self._applyPatches(self._matrix)
+        return self._matrix
+
+    def tocoo(self) -> sparse.coo_matrix:
+        return self.tocsr().tocoo()
+
+    def sortedNodes(self) -> Tuple[List[str], List[int]]:
+        if self._sortedNodes is None or len(self._sortedNodes[0]) != self.nodeCount:
+            names = self.nodeNames
+            order = sorted(range(len(names)), key=names.__getitem__)
+            self._sortedNodes = ([names[idx] for idx in order], order)
+        return self._sortedNodes
+
+    def selectNodes(self, nodes: Iterable[str] = (), prefixes: Iterable[str] = ()) -> List[int]:
+        # sorted indexes of the named nodes plus every node whose name starts with one of the prefixes
+        names, order = self.sortedNodes()
+        selected = set()
+        for node in nodes:
+            idx = self.nodeIndex.get(node.upper())
+            if idx is not None:
+                selected.add(idx)
+        for prefix in prefixes:
+            prefix = prefix.upper()
+            start = bisect_left(names, prefix)
+            end = bisect_right(names, prefix + chr(0x10ffff), lo=start)
+            selected.update(order[start:end])
+        return sorted(selected)
+
+    def submatrix(self, rowIdx: List[int], induced: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # rows, columns and values of every entry in the selected rows, only those in the selected columns as well
+        # when induced is set
+        matrix = self.tocsr()
+        rows = np.asarray(rowIdx, dtype=np.int64)
+        starts = matrix.indptr[rows]
+        lengths = matrix.indptr[rows + 1] - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(int(lengths.sum()))
+        entryRows = np.repeat(rows, lengths)
+        entryCols = matrix.indices[positions]
+        entryVals = matrix.data[positions]
+        if induced:
+            keep = np.isin(entryCols, rows)
+            entryRows = entryRows[keep]
+            entryCols = entryCols[keep]
+            entryVals = entryVals[keep]
+        return entryRows, entryCols, entryVals
+
+    def countUnique(self) -> int:
+        # number of distinct entries in the upper triangle including the diagonal
+        matrix = self.tocsr()
+        diagonalCount = np.count_nonzero(
+            matrix.indices == np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr)))
+        return int((matrix.nnz + diagonalCount) // 2)
+
+    def newEntryCounts(self, tripletEnds: List[int]) -> List[int]:
+        # number of distinct entries first stamped by the triplets before each of tripletEnds and after the previous
+        # one, the same as the differences of countUnique taken at those points. Shunts never add an entry.
+        self._compactTriplets()
+        size = self._size
+        positions = np.flatnonzero(self._kinds[:size] != SHUNT)
+        keys = self._rows[positions] * self.nodeCount + self._cols[positions]
+        firstPositions = np.sort(positions[np.unique(keys, return_index=True)[1]])
+        counts = np.searchsorted(firstPositions, np.asarray(tripletEnds, dtype=np.int64))
+        return np.diff(counts, prepend=0).tolist()
+
+    def toDict(self) -> Dict:
+        # backwards compatible {bus1: {bus2: (real, imag)}} view of the matrix
+        return csrToDict(self.nodeNames, self.tocsr())
+
+
+def csrToDict(nodeNames: List[str], matrix: sparse.csr_matrix, rowStart: int = 0) -> Dict:
+    # matrix may be a block of rows starting at rowStart, its column indexes always refer to the full nodeNames
+    indptr = matrix.indptr.tolist()
+    indices = matrix.indices.tolist()
+    data = matrix.data.tolist()
+    Ybus = {}
+    for i in range(matrix.shape[0]):
+        start = indptr[i]
+        end = indptr[i + 1]
+        if start == end:
+            continue
+        Ybus[nodeNames[rowStart + i]] = {
+            nodeNames[j]: (yVal.real, yVal.imag)
+            for j, yVal in zip(indices[start:end], data[start:end])
+        }
+    return Ybus
@@ -0,0 +1,6 @@
+from pathlib import Path
+import sys
+
+# the service modules live in the repository root and the feeder generator in scripts, neither is installed
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
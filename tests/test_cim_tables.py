@@ -0,0 +1,20 @@
+import pickle
+
+import ybus_utils as utils
+from ybus_test_utils import syntheticArea
+
+
+def test_every_table_group_is_extracted_once():
+    cimTables = utils.CimTables(syntheticArea())
+    utils.assembleSparseYbus(cimTables)
+    extractedGroups = [tableMetric["table"] for tableMetric in cimTables.tableMetrics]
+    assert sorted(extractedGroups) == sorted(["lines", "powerTransformers", "transformerTanks", "switches", "shunts"])
+
+
+def test_materialized_tables_calculate_the_same_ybus():
+    area = syntheticArea()
+    expected = utils.calculateSparseYbus(area)
+    cimTables = pickle.loads(pickle.dumps(utils.CimTables(area).materialize()))
+    actual = utils.assembleSparseYbus(cimTables)
+    assert actual.nodeNames == expected.nodeNames
+    assert (actual.tocsr() != expected.tocsr()).nnz == 0
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+
+import offline_cim
+import ybus_utils as utils
+from ybus_test_utils import syntheticArea
+
+
+@pytest.mark.parametrize("suffix", [".pkl", ".pickle"])
+def test_snapshot_round_trip_calculates_the_same_ybus(tmp_path: Path, suffix: str):
+    area = syntheticArea()
+    expected = utils.calculateYbus(area)
+    path = tmp_path / f"feeder{suffix}"
+    offline_cim.saveCimSnapshot(area, path)
+    for loadedArea in [offline_cim.loadCimSnapshot(path), offline_cim.loadCimModel(path)]:
+        assert loadedArea.container.mRID == area.container.mRID
+        utils.initializeCimProfile(loadedArea)
+        assert utils.calculateYbus(loadedArea) == expected
+
+
+def test_snapshot_of_another_version_is_rejected(tmp_path: Path, monkeypatch):
+    path = tmp_path / "feeder.pkl"
+    offline_cim.saveCimSnapshot(syntheticArea(), path)
+    monkeypatch.setattr(offline_cim, "CIM_SNAPSHOT_VERSION", offline_cim.CIM_SNAPSHOT_VERSION + 1)
+    with pytest.raises(ValueError):
+        offline_cim.loadCimModel(path)
+
+
+def test_unsupported_suffix_is_rejected(tmp_path: Path):
+    path = tmp_path / "feeder.csv"
+    path.write_text("mRID,name\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        offline_cim.loadCimModel(path)
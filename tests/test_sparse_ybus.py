@@ -0,0 +1,136 @@
+import pickle
+
+import numpy as np
+
+from sparse_ybus import ADD, SHUNT, SparseYbus, UNIQUE
+
+
+def test_unique_overwrites_earlier_adds():
+    Ybus = SparseYbus()
+    Ybus.add("A.1", "B.1", 1 + 1j)
+    Ybus.add("B.1", "A.1", 2 + 2j)
+    Ybus.setUnique("A.1", "B.1", 5 - 2j)
+    # only the contributions stamped before the unique write are overwritten
+    Ybus.add("B.1", "A.1", 0.5)
+    ybusDict = Ybus.toDict()
+    assert ybusDict["A.1"]["B.1"] == (5.5, -2.0)
+    assert ybusDict["B.1"]["A.1"] == (5.5, -2.0)
+
+
+def test_last_unique_write_wins():
+    Ybus = SparseYbus()
+    Ybus.setUnique("A.1", "A.2", 1.0)
+    Ybus.setUnique("A.2", "A.1", 2.0 + 1j)
+    assert Ybus.toDict()["A.1"]["A.2"] == (2.0, 1.0)
+
+
+def test_shunt_only_applies_where_a_diagonal_exists():
+    Ybus = SparseYbus()
+    Ybus.addShunt("A.1", 1j)
+    Ybus.add("A.1", "A.1", 2.0)
+    Ybus.add("A.1", "B.1", -1.0)
+    Ybus.addShunt("B.1", 3.0)
+    ybusDict = Ybus.toDict()
+    assert ybusDict["A.1"]["A.1"] == (2.0, 1.0)
+    assert "B.1" not in ybusDict["B.1"]
+
+
+def test_explicit_zeros_are_kept():
+    Ybus = SparseYbus()
+    Ybus.add("A.1", "B.1", 1.0)
+    Ybus.add("B.1", "A.1", -1.0)
+    assert Ybus.toDict()["A.1"]["B.1"] == (0.0, 0.0)
+    assert Ybus.tocsr().nnz == 2
+
+
+def test_reduced_matrix_is_symmetric():
+    rng = np.random.default_rng(7)
+    Ybus = SparseYbus()
+    for node in range(40):
+        Ybus.getNodeIndex(f"N{node}.1")
+    count = 2000
+    Ybus.extend(rng.integers(0, 40, count), rng.integers(0, 40, count),
+                rng.normal(size=count) + 1j * rng.normal(size=count), rng.choice([ADD, UNIQUE, SHUNT], count))
+    matrix = Ybus.tocsr()
+    assert (matrix != matrix.T).nnz == 0
+
+
+def test_patch_matches_a_fresh_reduction():
+    Ybus = SparseYbus()
+    Ybus.add("A.1", "A.1", 2.0)
+    Ybus.add("A.1", "B.1", -1.0)
+    Ybus.add("B.1", "B.1", 2.0)
+    Ybus.tocsr()
+    Ybus.patch("B.1", "A.1", 0.25j)
+    expected = SparseYbus()
+    expected.add("A.1", "A.1", 2.0)
+    expected.add("A.1", "B.1", -1.0 + 0.25j)
+    expected.add("B.1", "B.1", 2.0)
+    assert Ybus.toDict() == expected.toDict()
+
+
+def test_patch_drops_cancelled_entries():
+    Ybus = SparseYbus()
+    Ybus.add("A.1", "A.1", 2.0)
+    Ybus.add("A.1", "B.1", -1.0)
+    Ybus.add("B.1", "B.1", 2.0)
+    Ybus.add("A.1", "C.1", 0.0)
+    Ybus.tocsr()
+    Ybus.patch("A.1", "B.1", 1.0)
+    Ybus.patch("B.1", "B.1", -2.0)
+    ybusDict = Ybus.toDict()
+    assert "B.1" not in ybusDict
+    assert "B.1" not in ybusDict["A.1"]
+    # the zero a fill stage stamped is still there
+    assert ybusDict["A.1"]["C.1"] == (0.0, 0.0)
+
+
+def patchableYbus() -> SparseYbus:
+    Ybus = SparseYbus()
+    Ybus.add("A.1", "A.1", 2.0)
+    Ybus.add("A.1", "B.1", -1.0)
+    Ybus.add("B.1", "B.1", 2.0)
+    Ybus.tocsr()
+    return Ybus
+
+
+def test_patch_updates_existing_entries_in_place():
+    Ybus = patchableYbus()
+    matrix = Ybus.tocsr()
+    tripletCount = Ybus.tripletCount
+    for _ in range(100):
+        Ybus.patch("A.1", "B.1", 0.5)
+        Ybus.patch("A.1", "B.1", -0.5)
+    assert Ybus.tocsr() is matrix
+    assert Ybus.tripletCount == tripletCount
+    assert Ybus.toDict()["B.1"]["A.1"] == (-1.0, 0.0)
+
+
+def test_patch_adds_new_entries_and_nodes():
+    Ybus = patchableYbus()
+    Ybus.patch("B.1", "C.1", -0.5)
+    Ybus.patch("C.1", "C.1", 0.5)
+    ybusDict = Ybus.toDict()
+    assert ybusDict["C.1"] == {"B.1": (-0.5, 0.0), "C.1": (0.5, 0.0)}
+    assert ybusDict["B.1"]["C.1"] == (-0.5, 0.0)
+
+
+def test_stamps_after_a_patch_add_to_the_patched_matrix():
+    Ybus = patchableYbus()
+    Ybus.patch("A.1", "B.1", 1.0)
+    Ybus.add("A.1", "B.1", 0.5)
+    Ybus.addShunt("B.1", 1j)
+    ybusDict = Ybus.toDict()
+    assert ybusDict["A.1"]["B.1"] == (0.5, 0.0)
+    assert ybusDict["B.1"]["B.1"] == (2.0, 1.0)
+
+
+def test_patched_ybus_pickles_with_its_patches():
+    Ybus = patchableYbus()
+    Ybus.patch("A.1", "B.1", 1.0)
+    Ybus.patch("B.1", "C.1", 3.0)
+    restored = pickle.loads(pickle.dumps(Ybus))
+    # the pickled triplets have to reduce to the patched matrix
+    restored._matrix = None
+    assert restored.toDict() == Ybus.toDict()
+    assert "B.1" not in restored.toDict()["A.1"]
@@ -0,0 +1,269 @@
+from collections import deque
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+import pytest
+
+import distributed_static_ybus_service as service_mod
+from sparse_ybus import SparseYbus
+from ybus_metrics import ServiceMetrics
+import ybus_utils as utils
+from ybus_test_utils import assertYbusDictsClose, rebuildWithSwitchStates, syntheticArea
+
+# how long a test waits for the request pool to answer
+RESPONSE_TIMEOUT = 30.0
+UNKNOWN_SWITCH_STATES = {"not a switch": True}
+
+
+class RecordingMessageBus:
+
+    def __init__(self, lock: threading.Lock):
+        self.lock = lock
+        self.sent: List[Dict] = []
+        self.sendThreads: List[str] = []
+        self.sentWhileLocked = False
+        self.condition = threading.Condition()
+
+    def send(self, replyTo: str, message: Dict):
+        with self.condition:
+            self.sentWhileLocked = self.sentWhileLocked or self.lock.locked()
+            self.sent.append(message)
+            self.sendThreads.append(threading.current_thread().name)
+            self.condition.notify_all()
+
+    def waitFor(self, count: int) -> List[Dict]:
+        with self.condition:
+            assert self.condition.wait_for(lambda: len(self.sent) >= count, RESPONSE_TIMEOUT)
+            return list(self.sent)
+
+
+def fakeService(Ybus: SparseYbus, **attributes) -> SimpleNamespace:
+    # the attributes the request handlers use on a service whose Ybus is already calculated
+    return SimpleNamespace(sparseYbus=Ybus,
+                           ybus=Ybus.toDict(),
+                           isYbusInitialized=True,
+                           isServiceInitialized=True,
+                           isWarmupEnabled=False,
+                           ybusStateLock=threading.Lock(),
+                           ybusVersion=0,
+                           ybusChanges=deque(maxlen=service_mod.YBUS_CHANGE_HISTORY),
+                           switchStateUpdates=deque(),
+                           switchStateUpdateLock=threading.Lock(),
+                           metrics=ServiceMetrics(),
+                           **attributes)
+
+
+def waitUntil(condition: Callable[[], bool]):
+    deadline = time.monotonic() + RESPONSE_TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def service() -> SimpleNamespace:
+    return fakeService(utils.calculateSparseYbus(syntheticArea()))
+
+
+def request(service: SimpleNamespace, messageBus: RecordingMessageBus, message: Dict):
+    service_mod.handleYbusRequest(service, messageBus, {"reply-to": "reply"}, message, "LocalYbus")
+
+
+@pytest.mark.parametrize("requestType", ["LocalYbus", "YbusSubmatrix", "YbusDelta"])
+def test_ybus_requests_are_answered_on_the_request_pool(service: SimpleNamespace, requestType: str):
+    messageBus = RecordingMessageBus(service.ybusStateLock)
+    request(service, messageBus, {"requestType": requestType})
+    messageBus.waitFor(1)
+    assert messageBus.sendThreads[0].startswith("YbusRequest")
+
+
+@pytest.mark.parametrize("message", [{}, {"format": "coo"}, {"stream": True, "maxChunkEntries": 500}])
+def test_ybus_is_sent_outside_the_state_lock(service: SimpleNamespace, message: Dict):
+    messageBus = RecordingMessageBus(service.ybusStateLock)
+    service_mod.sendYbus(service, messageBus, "reply", message)
+    assert not messageBus.sentWhileLocked
+    Ybus = service.sparseYbus
+    assert messageBus.sent == list(service_mod.ybusResponses(Ybus, Ybus.toDict(), message))
+
+
+@pytest.mark.parametrize("requestType", ["Metrics", "is_initialized"])
+def test_status_requests_are_answered_right_away(service: SimpleNamespace, requestType: str):
+    messageBus = RecordingMessageBus(service.ybusStateLock)
+    request(service, messageBus, {"requestType": requestType})
+    assert messageBus.sendThreads == [threading.current_thread().name]
+
+
+def test_switch_state_updates_are_applied_in_arrival_order(service: SimpleNamespace):
+    switchName, switch = next(iter(service.sparseYbus.switches.items()))
+    wasOpen = switch["open"]
+    messageBus = RecordingMessageBus(service.ybusStateLock)
+    updateCount = 20
+    # holding the lock makes every pool worker pick up an update and wait for it, so they race once it's released
+    with service.ybusStateLock:
+        for idx in range(updateCount):
+            # every update flips the switch, so one applied out of order would leave the Ybus unchanged
+            isOpen = wasOpen != (idx % 2 == 0)
+            request(service, messageBus, {"requestType": "SwitchStateUpdate", "switches": {switchName: isOpen}})
+        time.sleep(0.2)
+    responses = messageBus.waitFor(updateCount)
+    assert sorted(response["version"] for response in responses) == list(range(1, updateCount + 1))
+    assert all(len(response["changes"]) > 0 for response in responses)
+
+
+@pytest.mark.parametrize("state", ["false", 0, None])
+def test_switch_states_must_be_booleans(service: SimpleNamespace, state):
+    message = {"switches": {next(iter(service.sparseYbus.switches)): state}}
+    with pytest.raises(TypeError):
+        service_mod.sendSwitchStateUpdate(service, RecordingMessageBus(service.ybusStateLock), "reply", message)
+    assert service.ybusVersion == 0
+
+
+def test_switch_state_update_patches_the_ybus_and_records_the_change():
+    area = syntheticArea()
+    service = fakeService(utils.calculateSparseYbus(area))
+    switchName, switch = next(iter(service.sparseYbus.switches.items()))
+    switchStates = {switchName: not switch["open"]}
+    messageBus = RecordingMessageBus(service.ybusStateLock)
+    request(service, messageBus, {"requestType": "SwitchStateUpdate", "switches": switchStates})
+    assert messageBus.waitFor(1)[0]["version"] == 1
+    assertYbusDictsClose(service.ybus, rebuildWithSwitchStates(area, switchStates).toDict())
+    request(service, messageBus, {"requestType": "YbusDelta", "sinceVersion": 0})
+    responses = messageBus.waitFor(2)
+    assert responses[1]["changes"] == responses[0]["changes"]
+
+
+def test_hierarchical_switch_updates_reach_both_levels():
+    area = syntheticArea()
+    # a shuffled split so both switch areas hold some of the switches
+    equipmentIDs = sorted(utils.areaEquipmentIDs(area))
+    random.Random(4).shuffle(equipmentIDs)
+    childEquipmentIDs = [set(equipmentIDs[:len(equipmentIDs) // 2]), set(equipmentIDs[len(equipmentIDs) // 2:-20])]
+    children = []
+    for equipment in childEquipmentIDs:
+        childArea = utils.EquipmentFilteredArea(area, set(equipmentIDs) - equipment)
+        children.append(fakeService(utils.assembleSparseYbus(utils.CimTables(childArea)), parentService=None))
+    feederYbus = utils.calculateHierarchicalSparseYbus(area, [child.sparseYbus for child in children],
+                                                       set().union(*childEquipmentIDs))
+    unpatchedYbus = SparseYbus.fromCsr(list(feederYbus.nodeNames), feederYbus.tocsr().copy())
+    unpatchedYbus.switches = {name: dict(switch) for name, switch in feederYbus.switches.items()}
+    feeder = fakeService(feederYbus, childServices=children)
+    for child in children:
+        child.parentService = feeder
+    switchStates = {}
+    for sender, child in [(feeder, children[0]), (children[1], children[1])]:
+        switchName, switch = next(iter(child.sparseYbus.switches.items()))
+        switchStates[switchName] = not switch["open"]
+        message = {"switches": {switchName: switchStates[switchName]}}
+        service_mod.sendSwitchStateUpdate(sender, RecordingMessageBus(sender.ybusStateLock), "reply", message)
+    # the update is forwarded to the other level on the request pool
+    waitUntil(lambda: feeder.ybusVersion == 2 and all(child.ybusVersion == 1 for child in children))
+    for child in children:
+        for switchName, isOpen in switchStates.items():
+            if switchName in child.sparseYbus.switches:
+                assert child.sparseYbus.switches[switchName]["open"] == isOpen
+    expected = unpatchedYbus.toDict()
+    for switchName, isOpen in switchStates.items():
+        utils.applySwitchState(unpatchedYbus, expected, switchName, isOpen)
+    assertYbusDictsClose(feeder.ybus, expected)
+
+
+def test_child_areas_are_calculated_on_their_own_threads(monkeypatch):
+    childThreads: List[str] = []
+
+    def childService() -> SimpleNamespace:
+        return SimpleNamespace(ybusLock=threading.Lock(),
+                               ybusFuture=None,
+                               updateYbusService=lambda: childThreads.append(threading.current_thread().name))
+
+    def assembleFromChildYbuses(distributedArea, childServices: List, childFutures: List) -> SparseYbus:
+        for childFuture in childFutures:
+            childFuture.result(RESPONSE_TIMEOUT)
+        return SparseYbus()
+
+    monkeypatch.setattr(utils, "initializeCimProfile", lambda distributedArea: None)
+    monkeypatch.setattr(service_mod, "assembleFromChildYbuses", assembleFromChildYbuses)
+    children = [childService() for _ in range(2 * service_mod.YBUS_REQUEST_WORKERS)]
+    # the request pool is kept busy, children queued behind its work would time out
+    release = threading.Event()
+    for _ in range(service_mod.YBUS_REQUEST_WORKERS):
+        service_mod.ybusRequestPool.submit(release.wait)
+    try:
+        feederArea = SimpleNamespace(container=SimpleNamespace(mRID="_FEEDER"))
+        service_mod.loadOrCalculateYbus(feederArea, {}, childServices=children)
+    finally:
+        release.set()
+    assert len(childThreads) == len(children)
+    assert all(threadName.startswith("YbusChild") for threadName in childThreads)
+
+
+@pytest.mark.parametrize("requestType, key, value", [("SwitchStateUpdate", "switches", "SW1"),
+                                                     ("SwitchStateUpdate", "switches", UNKNOWN_SWITCH_STATES),
+                                                     ("YbusDelta", "sinceVersion", "1"),
+                                                     ("LocalYbus", "format", "csv")])
+def test_malformed_requests_are_answered_with_an_error(service: SimpleNamespace, requestType: str, key: str, value):
+    messageBus = RecordingMessageBus(service.ybusStateLock)
+    request(service, messageBus, {"requestType": requestType, key: value})
+    response = messageBus.waitFor(1)[0]
+    assert response["requestType"] == requestType
+    assert "error" in response
+
+
+def test_requests_are_answered_with_an_error_when_the_calculation_fails():
+
+    def updateYbusService():
+        raise RuntimeError("no CIM data")
+
+    service = SimpleNamespace(isYbusInitialized=False,
+                              ybusLock=threading.Lock(),
+                              ybusFuture=None,
+                              updateYbusService=updateYbusService,
+                              downstream_message_bus_def=SimpleNamespace(id="_AREA-1"),
+                              metrics=ServiceMetrics())
+    messageBus = RecordingMessageBus(threading.Lock())
+    request(service, messageBus, {"requestType": "LocalYbus"})
+    assert "error" in messageBus.waitFor(1)[0]
+
+
+class FlakyMessageBus:
+
+    def __init__(self):
+        self.id = "_AREA-1"
+        self.connected = False
+        self.connectCount = 0
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def connect(self):
+        self.connected = True
+        self.connectCount += 1
+
+    def disconnect(self):
+        self.connected = False
+
+
+def test_supervisor_reconnects_a_disconnected_agent(monkeypatch):
+    monkeypatch.setattr(service_mod, "SUPERVISOR_CHECK_SECONDS", 0.01)
+    messageBus = FlakyMessageBus()
+    subscriptions: List[str] = []
+    stopEvent = threading.Event()
+
+    def subscribe(name: str):
+        subscriptions.append(name)
+        # the agent is connected again, so the supervisor can stop after this check
+        stopEvent.set()
+
+    # an agent without the private connect, the supervisor has to get by with the public methods
+    agent = SimpleNamespace(upstream_message_bus=None,
+                            downstream_message_bus=messageBus,
+                            downstream_message_bus_def=messageBus,
+                            disconnect=messageBus.disconnect,
+                            subscribe_to_measurement=lambda: subscribe("measurement"),
+                            subscribe_to_messages=lambda: subscribe("messages"),
+                            subscribe_to_requests=lambda: subscribe("requests"))
+    service_mod.superviseYbusServices([agent], stopEvent)
+    assert messageBus.connected and messageBus.connectCount == 1
+    assert subscriptions == ["measurement", "messages", "requests"]
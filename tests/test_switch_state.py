@@ -0,0 +1,54 @@
+import pytest
+
+import ybus_utils as utils
+from ybus_test_utils import assertYbusDictsClose, rebuildWithSwitchStates, syntheticArea
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_patch_matches_a_rebuild(seed: int):
+    area = syntheticArea(seed)
+    Ybus = utils.calculateSparseYbus(area)
+    ybusDict = Ybus.toDict()
+    switchStates = {switchName: not switch["open"] for switchName, switch in Ybus.switches.items()}
+    for switchName, isOpen in switchStates.items():
+        utils.applySwitchState(Ybus, ybusDict, switchName, isOpen)
+    rebuilt = rebuildWithSwitchStates(area, switchStates)
+    assert Ybus.tocsr().nnz == rebuilt.tocsr().nnz
+    assertYbusDictsClose(Ybus.toDict(), rebuilt.toDict())
+    assertYbusDictsClose(ybusDict, rebuilt.toDict())
+
+
+def test_opening_and_closing_restores_the_ybus():
+    Ybus = utils.calculateSparseYbus(syntheticArea())
+    expected = Ybus.toDict()
+    ybusDict = Ybus.toDict()
+    for switchName, switch in Ybus.switches.items():
+        isOpen = switch["open"]
+        utils.applySwitchState(Ybus, ybusDict, switchName, not isOpen)
+        # the reduced matrix is read in between, so the second patch starts from the patched one
+        Ybus.tocsr()
+        utils.applySwitchState(Ybus, ybusDict, switchName, isOpen)
+    assertYbusDictsClose(Ybus.toDict(), expected)
+    assertYbusDictsClose(ybusDict, expected)
+
+
+def test_changes_record_removed_entries_as_none():
+    Ybus = utils.calculateSparseYbus(syntheticArea())
+    switchName = next(switchName for switchName, switch in Ybus.switches.items() if not switch["open"])
+    bus1, bus2 = Ybus.switches[switchName]["nodes"][0]
+    changes = utils.applySwitchState(Ybus, Ybus.toDict(), switchName, True)
+    assert changes[bus1][bus2] is None
+    assert changes[bus2][bus1] is None
+    assert bus2 not in Ybus.toDict().get(bus1, {})
+
+
+def test_unchanged_state_is_not_patched():
+    Ybus = utils.calculateSparseYbus(syntheticArea())
+    switchName, switch = next(iter(Ybus.switches.items()))
+    assert utils.applySwitchState(Ybus, Ybus.toDict(), switchName, switch["open"]) == {}
+
+
+def test_unknown_switch_raises():
+    Ybus = utils.calculateSparseYbus(syntheticArea())
+    with pytest.raises(KeyError):
+        utils.applySwitchState(Ybus, Ybus.toDict(), "not a switch", True)
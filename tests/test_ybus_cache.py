@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from sparse_ybus import SparseYbus
+from ybus_cache import areaFingerprint, YbusCache
+import ybus_utils as utils
+from ybus_test_utils import syntheticArea
+
+AREA_ID = "_AREA-1"
+
+
+@pytest.fixture(scope="module")
+def feederYbus() -> SparseYbus:
+    return utils.calculateSparseYbus(syntheticArea())
+
+
+def test_load_returns_the_stored_ybus(tmp_path, feederYbus: SparseYbus):
+    cache = YbusCache(str(tmp_path))
+    cache.store(AREA_ID, "fingerprint", feederYbus)
+    Ybus = cache.load(AREA_ID, "fingerprint")
+    assert Ybus.nodeNames == feederYbus.nodeNames
+    assert (Ybus.tocsr() != feederYbus.tocsr()).nnz == 0
+    assert Ybus.switches == feederYbus.switches
+
+
+def test_changed_fingerprint_invalidates_the_entry(tmp_path, feederYbus: SparseYbus):
+    cache = YbusCache(str(tmp_path))
+    cache.store(AREA_ID, "fingerprint", feederYbus)
+    assert cache.load(AREA_ID, "other fingerprint") is None
+    assert not cache.entryPath(AREA_ID).exists()
+    assert cache.load(AREA_ID, "fingerprint") is None
+
+
+def test_unreadable_entry_is_discarded(tmp_path):
+    cache = YbusCache(str(tmp_path))
+    cache.entryPath(AREA_ID).write_bytes(b"not an npz file")
+    assert cache.load(AREA_ID, "fingerprint") is None
+    assert not cache.entryPath(AREA_ID).exists()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, feederYbus: SparseYbus):
+    cache = YbusCache(str(tmp_path))
+    for idx, areaId in enumerate(["_AREA-1", "_AREA-2"]):
+        cache.store(areaId, "fingerprint", feederYbus)
+        os.utime(cache.entryPath(areaId), (idx, idx))
+    # room for two entries, so storing a third one evicts the oldest
+    cache.maxBytes = cache.entryPath("_AREA-1").stat().st_size * 2 + 1
+    cache.load("_AREA-1", "fingerprint")
+    cache.store("_AREA-3", "fingerprint", feederYbus)
+    assert cache.entryPath("_AREA-1").exists()
+    assert not cache.entryPath("_AREA-2").exists()
+    assert cache.entryPath("_AREA-3").exists()
+
+
+def test_fingerprint_ignores_the_topology_order():
+    agentAreaDict = {"addressable_equipment": ["_B", "_A"], "unaddressable_equipment": ["_C", "_D"]}
+    reordered = {"unaddressable_equipment": ["_D", "_C"], "addressable_equipment": ["_A", "_B"]}
+    changed = {"addressable_equipment": ["_A", "_B"], "unaddressable_equipment": ["_C"]}
+    assert areaFingerprint(agentAreaDict) == areaFingerprint(reordered)
+    assert areaFingerprint(agentAreaDict) != areaFingerprint(changed)
+
+
+def test_size_limit_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        YbusCache(str(tmp_path), 0)
@@ -0,0 +1,75 @@
+import copy
+import random
+from typing import Dict, Set
+
+import pytest
+
+from offline_cim import OfflineArea
+import ybus_contributions
+import ybus_utils as utils
+from ybus_test_utils import assertYbusDictsClose, syntheticArea
+
+
+def areaView(model, areaId: str, equipmentIDs: Set[str]) -> utils.EquipmentFilteredArea:
+    area = utils.EquipmentFilteredArea(model, utils.areaEquipmentIDs(model) - equipmentIDs)
+    area.container = utils.cim.Feeder(mRID=areaId)
+    area.connection = None
+    return area
+
+
+def multiAreaModel():
+    model = syntheticArea(3)
+    # a parallel transformer on the same ends stamps the same unique entries as the original one
+    powerTransformer = next(iter(model.graph[utils.cim.PowerTransformer].values()))
+    parallelTransformer = copy.copy(powerTransformer)
+    parallelTransformer.mRID = powerTransformer.mRID + "_parallel"
+    parallelTransformer.name = powerTransformer.name + "_parallel"
+    model.graph[utils.cim.PowerTransformer][parallelTransformer.mRID] = parallelTransformer
+    equipmentIDs = sorted(utils.areaEquipmentIDs(model))
+    random.Random(5).shuffle(equipmentIDs)
+    third = len(equipmentIDs) // 3
+    switchAreas = [set(equipmentIDs[:third]), set(equipmentIDs[third:2 * third]), set(equipmentIDs[2 * third:])]
+    for switchArea in switchAreas:
+        switchArea.difference_update({powerTransformer.mRID, parallelTransformer.mRID})
+    switchAreas[0].add(powerTransformer.mRID)
+    switchAreas[1].add(parallelTransformer.mRID)
+    # a secondary area overlapping two of the switch areas, the feeder area owns everything
+    secondaryArea = set(sorted(switchAreas[0])[::2]) | set(sorted(switchAreas[1])[::3])
+    areas = [areaView(model, "feeder", set(equipmentIDs)), areaView(model, "secondary", secondaryArea)]
+    areas += [areaView(model, f"switch{idx}", equipment) for idx, equipment in enumerate(switchAreas)]
+    return model, areas, [powerTransformer.mRID, parallelTransformer.mRID]
+
+
+@pytest.fixture
+def contributionTable(monkeypatch):
+    model, areas, transformerIDs = multiAreaModel()
+    # the model area holds the non equipment objects the service would fetch for it
+    sharedGraph = {
+        cimClass: objects
+        for cimClass, objects in model.graph.items() if not issubclass(cimClass, utils.cim.Equipment)
+    }
+    monkeypatch.setattr(ybus_contributions, "DistributedArea",
+                        lambda connection, container, distributed: OfflineArea(container, dict(sharedGraph)))
+    return model, areas, transformerIDs, ybus_contributions.YbusContributionTable(areas)
+
+
+def areaOwners(table: ybus_contributions.YbusContributionTable, mRID: str) -> frozenset:
+    return frozenset(areaId for areaId, equipmentIDs in table.areaEquipment.items() if mRID in equipmentIDs)
+
+
+def test_area_ybus_matches_the_area_calculation(contributionTable):
+    model, areas, transformerIDs, table = contributionTable
+    expected: Dict[str, Dict] = {area.container.mRID: utils.calculateSparseYbus(area).toDict() for area in areas}
+    for area in areas:
+        assertYbusDictsClose(table.areaYbus(area.container.mRID).toDict(), expected[area.container.mRID])
+    # the split covers equipment shared by more than two areas, unique transformer entries stamped by two groups and a
+    # capacitor on a bus that the equipment of a switch area without it connects to as well
+    assert any(len(groupOwners) > 2 for groupOwners in table.groupBuffers)
+    assert areaOwners(table, transformerIDs[0]) != areaOwners(table, transformerIDs[1])
+    areaBuses = {areaId: {node.rpartition(".")[0] for node in ybusDict} for areaId, ybusDict in expected.items()}
+    boundaryCapacitors = [
+        mRID for mRID, capacitor in model.graph[utils.cim.LinearShuntCompensator].items()
+        for areaId in ("switch0", "switch1", "switch2") if areaId not in areaOwners(table, mRID)
+        and capacitor.Terminals[0].ConnectivityNode.name.upper() in areaBuses[areaId]
+    ]
+    assert len(boundaryCapacitors) > 0
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from sparse_ybus import SparseYbus
+from ybus_messages import cooMessageToMatrix, ybusResponses, YbusStreamAssembler, ybusToCooMessage
+import ybus_utils as utils
+from ybus_test_utils import syntheticArea
+
+
+@pytest.fixture(scope="module")
+def feederYbus() -> SparseYbus:
+    return utils.calculateSparseYbus(syntheticArea())
+
+
+def test_coo_message_decodes_to_the_full_matrix(feederYbus: SparseYbus):
+    # the message goes through JSON like it does on the message bus
+    message = json.loads(json.dumps(ybusToCooMessage(feederYbus)))
+    nodes, matrix = cooMessageToMatrix(message)
+    assert nodes == feederYbus.nodeNames
+    assert (matrix.tocsr() != feederYbus.tocsr()).nnz == 0
+
+
+def test_coo_decode_rejects_other_formats(feederYbus: SparseYbus):
+    with pytest.raises(ValueError):
+        cooMessageToMatrix({"format": "dict"})
+
+
+@pytest.mark.parametrize("responseFormat", ["dict", "coo"])
+@pytest.mark.parametrize("maxChunkEntries", [1, 97, 1000000])
+def test_stream_reassembles_in_any_order(feederYbus: SparseYbus, responseFormat: str, maxChunkEntries: int):
+    message = {"format": responseFormat, "stream": True, "maxChunkEntries": maxChunkEntries}
+    chunks = [json.loads(json.dumps(chunk)) for chunk in ybusResponses(feederYbus, {}, message)]
+    assembler = YbusStreamAssembler()
+    for chunk in reversed(chunks):
+        assert not assembler.isComplete
+        assembler.add(chunk)
+    assert assembler.isComplete
+    nodes, matrix = assembler.toMatrix()
+    assert nodes == feederYbus.nodeNames
+    assert (matrix.tocsr() != feederYbus.tocsr()).nnz == 0
+    assert json.loads(json.dumps(assembler.toDict())) == json.loads(json.dumps(feederYbus.toDict()))
+
+
+def test_chunks_hold_complete_rows_within_the_entry_limit(feederYbus: SparseYbus):
+    maxChunkEntries = 97
+    message = {"format": "coo", "stream": True, "maxChunkEntries": maxChunkEntries}
+    indptr = feederYbus.tocsr().indptr
+    rowEnd = 0
+    for chunk in ybusResponses(feederYbus, {}, message):
+        assert chunk["rowStart"] == rowEnd
+        rowEnd = chunk["rowEnd"]
+        entryCount = indptr[rowEnd] - indptr[chunk["rowStart"]]
+        assert entryCount <= maxChunkEntries or rowEnd - chunk["rowStart"] == 1
+    assert rowEnd == feederYbus.nodeCount
+
+
+def test_incomplete_stream_raises(feederYbus: SparseYbus):
+    message = {"format": "coo", "stream": True, "maxChunkEntries": 500}
+    assembler = YbusStreamAssembler()
+    assembler.add(next(ybusResponses(feederYbus, {}, message)))
+    with pytest.raises(RuntimeError):
+        assembler.toMatrix()
@@ -0,0 +1,114 @@
+import tracemalloc
+
+import pytest
+
+import ybus_metrics
+from ybus_metrics import LatencyHistogram, ServiceMetrics, StageTimer
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list:
+    # monotonic time of the histograms, moved forward by the tests
+    now = [1000.0]
+    monkeypatch.setattr(ybus_metrics.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def tracing():
+    wasTracing = tracemalloc.is_tracing()
+    ybus_metrics.enableAllocationTracking()
+    yield
+    if not wasTracing:
+        tracemalloc.stop()
+
+
+def test_latencies_are_counted_in_their_buckets(clock: list):
+    histogram = LatencyHistogram()
+    # bucket bounds are inclusive upper bounds, anything above the last one goes into the overflow bucket
+    for seconds in [0.0005, 0.001, 0.0011, 0.003, 0.05, 120.0]:
+        histogram.record(seconds)
+    counts = histogram.snapshot()["counts"]
+    assert len(counts) == len(ybus_metrics.LATENCY_BUCKETS_MS) + 1
+    assert counts[0] == 2
+    assert counts[1] == 1
+    assert counts[2] == 1
+    assert counts[ybus_metrics.LATENCY_BUCKETS_MS.index(50)] == 1
+    assert counts[-1] == 1
+    assert sum(counts) == 6
+
+
+def test_quantiles_come_from_the_sorted_window(clock: list):
+    histogram = LatencyHistogram()
+    for milliseconds in reversed(range(1, 101)):
+        histogram.record(milliseconds / 1000.0)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert (snapshot["p50Ms"], snapshot["p90Ms"], snapshot["p99Ms"], snapshot["maxMs"]) == (51.0, 91.0, 100.0, 100.0)
+
+
+def test_a_single_latency_is_every_quantile(clock: list):
+    histogram = LatencyHistogram()
+    histogram.record(0.0042)
+    snapshot = histogram.snapshot()
+    assert snapshot["p50Ms"] == snapshot["p99Ms"] == snapshot["maxMs"] == 4.2
+
+
+def test_latencies_leave_the_window(clock: list):
+    histogram = LatencyHistogram(windowSeconds=60.0)
+    histogram.record(0.01)
+    clock[0] += 30.0
+    histogram.record(0.02)
+    clock[0] += 45.0
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 1
+    assert snapshot["totalCount"] == 2
+    assert snapshot["maxMs"] == 20.0
+    clock[0] += 30.0
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 0
+    assert snapshot["totalCount"] == 2
+    assert "p50Ms" not in snapshot
+
+
+def test_stage_timer_measures_time():
+    metrics = StageTimer().stop()
+    assert metrics["seconds"] >= 0.0
+    assert metrics["cpuSeconds"] >= 0.0
+
+
+def test_stage_timer_keeps_its_peak_across_nested_timers(tracing):
+    allocationBytes = 8 * 1024 * 1024
+    outer = StageTimer()
+    allocation = bytearray(allocationBytes)
+    del allocation
+    # the inner timer resets the tracemalloc peak, the outer one must still see the earlier allocation
+    inner = StageTimer()
+    innerMetrics = inner.stop()
+    outerMetrics = outer.stop()
+    assert outerMetrics["peakBytes"] >= allocationBytes
+    assert innerMetrics["peakBytes"] < allocationBytes
+
+
+def test_service_metrics_keep_the_latest_calculations():
+    metrics = ServiceMetrics()
+    calculationCount = ybus_metrics.METRICS_CALCULATION_HISTORY + 3
+    for idx in range(calculationCount):
+        summary = {"area": "_AREA-1", "nodes": idx, "stages": [{"stage": "fill"}], "unrelated": True}
+        metrics.recordCalculation({"calculation": idx}, [{"stage": "fetch"}], summary)
+    calculations = metrics.toDict()["calculations"]
+    assert [calculation["calculation"] for calculation in calculations] == list(range(3, calculationCount))
+    assert calculations[-1]["nodes"] == calculationCount - 1
+    assert calculations[-1]["stages"] == [{"stage": "fetch"}, {"stage": "fill"}]
+    assert "unrelated" not in calculations[-1]
+
+
+def test_service_metrics_keep_a_histogram_per_request_type(clock: list):
+    metrics = ServiceMetrics()
+    metrics.recordRequest("LocalYbus", 0.01)
+    metrics.recordRequest("LocalYbus", 0.03)
+    metrics.recordRequest("YbusDelta", 0.002)
+    requests = metrics.toDict()["requests"]
+    assert sorted(requests) == ["LocalYbus", "YbusDelta"]
+    assert requests["LocalYbus"]["count"] == 2
+    assert requests["YbusDelta"]["maxMs"] == 2.0
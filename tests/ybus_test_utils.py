@@ -0,0 +1,32 @@
+from typing import Dict
+
+import pytest
+
+from sparse_ybus import SparseYbus
+from synthetic_feeder import buildSyntheticFeeder, defaultFeederSpec
+import ybus_utils as utils
+
+# small enough to keep the tests fast while still covering every line model, tank, switch and capacitor class
+FEEDER_NODES = 300
+
+
+def syntheticArea(seed: int = 2, nodeCount: int = FEEDER_NODES):
+    return buildSyntheticFeeder(defaultFeederSpec(nodeCount, seed))
+
+
+def rebuildWithSwitchStates(area, switchStates: Dict[str, bool]) -> SparseYbus:
+    # full calculation of the area with the given switches set to the given states instead of their CIM state
+    cimTables = utils.CimTables(area).extractAll()
+    cimTables.switches = [
+        record._replace(is_Open=switchStates.get(record.sw_name, record.is_Open)) for record in cimTables.switches
+    ]
+    return utils.assembleSparseYbus(cimTables)
+
+
+def assertYbusDictsClose(actual: Dict, expected: Dict, tolerance: float = 1e-9):
+    assert actual.keys() == expected.keys()
+    for bus1, row in expected.items():
+        assert actual[bus1].keys() == row.keys(), bus1
+        for bus2, yVal in row.items():
+            expectedVal = pytest.approx(complex(*yVal), rel=tolerance, abs=tolerance)
+            assert complex(*actual[bus1][bus2]) == expectedVal, (bus1, bus2)
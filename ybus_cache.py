@@ -0,0 +1,159 @@
+# Copyright (c) 2023, Battelle Memorial Institute All rights reserved.
+# Battelle Memorial Institute (hereinafter Battelle) hereby grants permission to any person or entity
+# lawfully obtaining a copy of this software and associated documentation files (hereinafter the
+# Software) to redistribute and use the Software in source and binary forms, with or without modification.
+# Such person or entity may use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and may permit others to do so, subject to the following conditions:
+# Redistributions of source code must retain the above copyright notice, this list of conditions and the
+# following disclaimers.
+# Redistributions in binary form must reproduce the above copyright notice, this list of conditions and
+# the following disclaimer in the documentation and/or other materials provided with the distribution.
+# Other than as used herein, neither the name Battelle Memorial Institute or Battelle may be used in any
+# form whatsoever without the express written consent of Battelle.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL
+# BATTELLE OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY,
+# OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# General disclaimer for use with OSS licenses
+
+# This material was prepared as an account of work sponsored by an agency of the United States Government.
+# Neither the United States Government nor the United States Department of Energy, nor Battelle, nor any
+# of their employees, nor any jurisdiction or organization that has cooperated in the development of these
+# materials, makes any warranty, express or implied, or assumes any legal liability or responsibility for
+# the accuracy, completeness, or usefulness or any information, apparatus, product, software, or process
+# disclosed, or represents that its use would not infringe privately owned rights.
+
+# Reference herein to any specific commercial product, process, or service by trade name, trademark, manufacturer,
+# or otherwise does not necessarily constitute or imply its endorsement, recommendation, or favoring by the United
+# States Government or any agency thereof, or Battelle Memorial Institute. The views and opinions of authors expressed
+# herein do not necessarily state or reflect those of the United States Government or any agency thereof.
+
+# PACIFIC NORTHWEST NATIONAL LABORATORY operated by BATTELLE for the
+# UNITED STATES DEPARTMENT OF ENERGY under Contract DE-AC05-76RL01830
+# -------------------------------------------------------------------------------
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Dict, Optional
+
+import numpy as np
+import scipy.sparse as sparse
+
+from sparse_ybus import SparseYbus
+
+logger = logging.getLogger(__name__)
+
+# bump whenever the Ybus calculation changes so entries written by older versions are recomputed
+YBUS_CACHE_VERSION = 2
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def canonicalTopology(value: Any) -> Any:
+    # the topology message lists come back in no particular order so sort them before hashing
+    if isinstance(value, dict):
+        return {str(key): canonicalTopology(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [canonicalTopology(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True, default=str))
+    return value
+
+
+def areaFingerprint(agentAreaDict: Dict) -> str:
+    # fingerprint of the equipment set an area is built from, available before any CIM attributes are fetched
+    canonical = json.dumps(canonicalTopology(agentAreaDict), sort_keys=True, default=str)
+    return hashlib.sha256(f"{YBUS_CACHE_VERSION}:{canonical}".encode("utf-8")).hexdigest()
+
+
+class YbusCache:
+    # One .npz file per area holding the CSR arrays and node names of its Ybus along with the area mRID and the
+    # fingerprint it was calculated for. Entries whose fingerprint no longer matches are discarded on load and the
+    # least recently used entries are evicted once the directory grows past maxBytes.
+
+    def __init__(self, cacheDir: str, maxBytes: int = DEFAULT_MAX_CACHE_BYTES):
+        if maxBytes <= 0:
+            errorStr = f"The Ybus cache size limit must be positive.\nmaxBytes: {maxBytes}"
+            logger.error(errorStr)
+            raise ValueError(errorStr)
+        self.cacheDir = Path(cacheDir)
+        self.cacheDir.mkdir(parents=True, exist_ok=True)
+        self.maxBytes = int(maxBytes)
+
+    def entryPath(self, areaId: str) -> Path:
+        return self.cacheDir / f"{hashlib.sha256(areaId.encode('utf-8')).hexdigest()[:40]}.npz"
+
+    def load(self, areaId: str, fingerprint: str) -> Optional[SparseYbus]:
+        path = self.entryPath(areaId)
+        if not path.is_file():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                if str(entry["areaId"]) != areaId or str(entry["fingerprint"]) != fingerprint:
+                    logger.info(f"The cached Ybus for area id {areaId} is out of date. Discarding it.")
+                    self.invalidate(areaId)
+                    return None
+                nodeNames = entry["nodeNames"].tolist()
+                matrix = sparse.csr_matrix((entry["data"], entry["indices"], entry["indptr"]),
+                                           shape=(len(nodeNames), len(nodeNames)))
+                switches = json.loads(str(entry["switches"]))
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Unable to read the cached Ybus for area id {areaId}. Discarding it.\n{e}")
+            self.invalidate(areaId)
+            return None
+        # mark the entry as recently used for eviction
+        os.utime(path)
+        Ybus = SparseYbus.fromCsr(nodeNames, matrix)
+        Ybus.switches = switches
+        return Ybus
+
+    def store(self, areaId: str, fingerprint: str, Ybus: SparseYbus):
+        matrix = Ybus.tocsr()
+        fd, tmpName = tempfile.mkstemp(dir=self.cacheDir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmpFile:
+                np.savez(tmpFile,
+                         areaId=np.array(areaId),
+                         fingerprint=np.array(fingerprint),
+                         nodeNames=np.array(Ybus.nodeNames, dtype=str),
+                         indptr=matrix.indptr,
+                         indices=matrix.indices,
+                         data=matrix.data,
+                         switches=np.array(json.dumps(Ybus.switches)))
+            # readers only ever see complete entries
+            os.replace(tmpName, self.entryPath(areaId))
+        except OSError as e:
+            logger.warning(f"Unable to write the Ybus cache entry for area id {areaId}.\n{e}")
+            Path(tmpName).unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def invalidate(self, areaId: str):
+        self.entryPath(areaId).unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.cacheDir.glob("*.npz"):
+            path.unlink(missing_ok=True)
+
+    def evict(self):
+        entries = []
+        for path in self.cacheDir.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        totalBytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if totalBytes <= self.maxBytes:
+                break
+            logger.info(f"Evicting {path.name} from the Ybus cache.")
+            path.unlink(missing_ok=True)
+            totalBytes -= size
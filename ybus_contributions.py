@@ -0,0 +1,160 @@
+# Copyright (c) 2023, Battelle Memorial Institute All rights reserved.
+# Battelle Memorial Institute (hereinafter Battelle) hereby grants permission to any person or entity
+# lawfully obtaining a copy of this software and associated documentation files (hereinafter the
+# Software) to redistribute and use the Software in source and binary forms, with or without modification.
+# Such person or entity may use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and may permit others to do so, subject to the following conditions:
+# Redistributions of source code must retain the above copyright notice, this list of conditions and the
+# following disclaimers.
+# Redistributions in binary form must reproduce the above copyright notice, this list of conditions and
+# the following disclaimer in the documentation and/or other materials provided with the distribution.
+# Other than as used herein, neither the name Battelle Memorial Institute or Battelle may be used in any
+# form whatsoever without the express written consent of Battelle.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL
+# BATTELLE OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY,
+# OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# General disclaimer for use with OSS licenses
+
+# This material was prepared as an account of work sponsored by an agency of the United States Government.
+# Neither the United States Government nor the United States Department of Energy, nor Battelle, nor any
+# of their employees, nor any jurisdiction or organization that has cooperated in the development of these
+# materials, makes any warranty, express or implied, or assumes any legal liability or responsibility for
+# the accuracy, completeness, or usefulness or any information, apparatus, product, software, or process
+# disclosed, or represents that its use would not infringe privately owned rights.
+
+# Reference herein to any specific commercial product, process, or service by trade name, trademark, manufacturer,
+# or otherwise does not necessarily constitute or imply its endorsement, recommendation, or favoring by the United
+# States Government or any agency thereof, or Battelle Memorial Institute. The views and opinions of authors expressed
+# herein do not necessarily state or reflect those of the United States Government or any agency thereof.
+
+# PACIFIC NORTHWEST NATIONAL LABORATORY operated by BATTELLE for the
+# UNITED STATES DEPARTMENT OF ENERGY under Contract DE-AC05-76RL01830
+# -------------------------------------------------------------------------------
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import threading
+import time
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from cimgraph.models import DistributedArea
+
+from sparse_ybus import SparseYbus
+import ybus_utils as utils
+
+logger = logging.getLogger(__name__)
+
+
+class EquipmentSubsetArea:
+    # Read-only view of the model area with only the equipment of one area or equipment group. Like
+    # ybus_utils.EquipmentFilteredArea it has just the graph and container that CimTables uses.
+
+    def __init__(self, container, sharedGraph: Dict, equipmentObjects: Dict[type, Dict[str, object]]):
+        self.container = container
+        self.graph = dict(sharedGraph)
+        self.graph.update(equipmentObjects)
+
+
+class YbusContributionTable:
+    # Ybus contributions of every co-located area calculated from a single CIM fetch. The equipment of all the areas
+    # is split into groups by the set of areas that own it and the fill stages of each group run once into their own
+    # stage buffers. The Ybus of an area is assembled from the buffers of the groups it owns, merged stage by stage,
+    # followed by its own shunt stage since shunts only apply to the diagonals of that area.
+
+    def __init__(self, areas: List[DistributedArea]):
+        if len(areas) == 0:
+            errorStr = "A Ybus contribution table needs at least one area."
+            logger.error(errorStr)
+            raise ValueError(errorStr)
+        self.areas: Dict[str, DistributedArea] = {area.container.mRID: area for area in areas}
+        # the model is only fetched on the first request so areas loaded from the Ybus cache never fetch CIM data
+        self.equipmentObjects: Dict[str, Tuple[type, object]] = {}
+        self.areaEquipment: Dict[str, Set[str]] = {}
+        # the non equipment classes fetched for the model, every view shares them
+        self.sharedGraph: Dict[type, Dict[str, object]] = {}
+        self.groupBuffers: Dict[FrozenSet[str], Dict[str, SparseYbus]] = {}
+        self.buildLock = threading.Lock()
+        self.isBuilt = False
+
+    def buildModelArea(self) -> DistributedArea:
+        # one area holding the equipment of every co-located area, sharing the equipment objects of their graphs
+        firstArea = next(iter(self.areas.values()))
+        modelArea = DistributedArea(connection=firstArea.connection, container=firstArea.container, distributed=True)
+        for areaId, area in self.areas.items():
+            equipmentIDs = set()
+            for cimClass, objects in area.graph.items():
+                if issubclass(cimClass, utils.cim.Equipment):
+                    modelArea.graph.setdefault(cimClass, {}).update(objects)
+                    for mRID, obj in objects.items():
+                        self.equipmentObjects[mRID] = (cimClass, obj)
+                    equipmentIDs.update(objects)
+            self.areaEquipment[areaId] = equipmentIDs
+        return modelArea
+
+    def subsetArea(self, container, equipmentIDs: Set[str]) -> EquipmentSubsetArea:
+        equipmentObjects: Dict[type, Dict[str, object]] = {}
+        for mRID in equipmentIDs:
+            cimClass, obj = self.equipmentObjects[mRID]
+            equipmentObjects.setdefault(cimClass, {})[mRID] = obj
+        return EquipmentSubsetArea(container, self.sharedGraph, equipmentObjects)
+
+    def build(self):
+        with self.buildLock:
+            if self.isBuilt:
+                return
+            buildStart = time.perf_counter()
+            modelArea = self.buildModelArea()
+            utils.initializeCimProfile(modelArea)
+            self.sharedGraph = {
+                cimClass: objects
+                for cimClass, objects in modelArea.graph.items() if not issubclass(cimClass, utils.cim.Equipment)
+            }
+            owners: Dict[str, Set[str]] = {}
+            for areaId, equipmentIDs in self.areaEquipment.items():
+                for mRID in equipmentIDs:
+                    owners.setdefault(mRID, set()).add(areaId)
+            groups: Dict[FrozenSet[str], Set[str]] = {}
+            for mRID, areaIds in owners.items():
+                groups.setdefault(frozenset(areaIds), set()).add(mRID)
+            independentStages = [(stageName, fillStage) for stageName, fillStage in utils.ybusFillStages
+                                 if stageName in utils.ybusIndependentStages]
+            # every stage of every group is independent of the others so they all share one pool
+            with ThreadPoolExecutor(max_workers=utils.ybusStageThreads, thread_name_prefix="YbusContribution") as pool:
+                futures: Dict[FrozenSet[str], Dict[str, Future]] = {}
+                for groupOwners, equipmentIDs in groups.items():
+                    groupTables = utils.CimTables(self.subsetArea(modelArea.container, equipmentIDs)).extractAll()
+                    futures[groupOwners] = {
+                        stageName: pool.submit(utils.runFillStage, fillStage, groupTables)
+                        for stageName, fillStage in independentStages
+                    }
+                self.groupBuffers = {
+                    groupOwners: {
+                        stageName: future.result()[0]
+                        for stageName, future in stageFutures.items()
+                    }
+                    for groupOwners, stageFutures in futures.items()
+                }
+            self.isBuilt = True
+            logger.info(f"Ybus contributions of {len(self.areas)} areas were calculated in {len(groups)} equipment "
+                        f"groups in {time.perf_counter() - buildStart:.3f} seconds.")
+
+    def areaYbus(self, areaId: str) -> SparseYbus:
+        if areaId not in self.areas:
+            errorStr = f"Area id {areaId} is not part of the Ybus contribution table."
+            logger.error(errorStr)
+            raise KeyError(errorStr)
+        self.build()
+        areaGroups = [buffers for groupOwners, buffers in self.groupBuffers.items() if areaId in groupOwners]
+        stageBuffers = {
+            stageName: [buffers[stageName] for buffers in areaGroups]
+            for stageName in utils.ybusIndependentStages
+        }
+        areaTables = utils.CimTables(self.subsetArea(self.areas[areaId].container, self.areaEquipment[areaId]))
+        capacity = sum(buffers[stageName].tripletCount for buffers in areaGroups for stageName in buffers)
+        return utils.assembleSparseYbus(areaTables, capacity, stageBuffers=stageBuffers)
@@ -0,0 +1,289 @@
+# Copyright (c) 2023, Battelle Memorial Institute All rights reserved.
+# Battelle Memorial Institute (hereinafter Battelle) hereby grants permission to any person or entity
+# lawfully obtaining a copy of this software and associated documentation files (hereinafter the
+# Software) to redistribute and use the Software in source and binary forms, with or without modification.
+# Such person or entity may use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and may permit others to do so, subject to the following conditions:
+# Redistributions of source code must retain the above copyright notice, this list of conditions and the
+# following disclaimers.
+# Redistributions in binary form must reproduce the above copyright notice, this list of conditions and
+# the following disclaimer in the documentation and/or other materials provided with the distribution.
+# Other than as used herein, neither the name Battelle Memorial Institute or Battelle may be used in any
+# form whatsoever without the express written consent of Battelle.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL
+# BATTELLE OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY,
+# OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# General disclaimer for use with OSS licenses
+
+# This material was prepared as an account of work sponsored by an agency of the United States Government.
+# Neither the United States Government nor the United States Department of Energy, nor Battelle, nor any
+# of their employees, nor any jurisdiction or organization that has cooperated in the development of these
+# materials, makes any warranty, express or implied, or assumes any legal liability or responsibility for
+# the accuracy, completeness, or usefulness or any information, apparatus, product, software, or process
+# disclosed, or represents that its use would not infringe privately owned rights.
+
+# Reference herein to any specific commercial product, process, or service by trade name, trademark, manufacturer,
+# or otherwise does not necessarily constitute or imply its endorsement, recommendation, or favoring by the United
+# States Government or any agency thereof, or Battelle Memorial Institute. The views and opinions of authors expressed
+# herein do not necessarily state or reflect those of the United States Government or any agency thereof.
+
+# PACIFIC NORTHWEST NATIONAL LABORATORY operated by BATTELLE for the
+# UNITED STATES DEPARTMENT OF ENERGY under Contract DE-AC05-76RL01830
+# -------------------------------------------------------------------------------
+
+import base64
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sparse
+
+from sparse_ybus import csrToDict, SparseYbus
+
+logger = logging.getLogger(__name__)
+
+# response formats a LocalYbus request can ask for with its "format" key
+DICT_FORMAT = "dict"
+COO_FORMAT = "coo"
+ybusResponseFormats = [DICT_FORMAT, COO_FORMAT]
+# explicit little endian dtypes so the arrays decode the same on every platform
+INDEX_DTYPE = "<i4"
+VALUE_DTYPE = "<f8"
+# matrix entries per chunk when a LocalYbus request asks for a stream without giving maxChunkEntries
+DEFAULT_CHUNK_ENTRIES = 50000
+
+
+def encodeArray(array: np.ndarray, dtype: str) -> str:
+    return base64.b64encode(np.ascontiguousarray(array, dtype=dtype).tobytes()).decode("ascii")
+
+
+def decodeArray(encoded: str, dtype: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype=dtype)
+
+
+def ybusToCooMessage(Ybus: SparseYbus) -> Dict:
+    # The node names are listed once and every entry in the upper triangle of the symmetric matrix is given by its row
+    # and column index into them along with packed real and imaginary parts.
+    matrix = sparse.triu(Ybus.tocsr(), format="coo")
+    return {
+        "format": COO_FORMAT,
+        "nodes": list(Ybus.nodeNames),
+        "shape": list(matrix.shape),
+        "symmetric": True,
+        "indexDtype": INDEX_DTYPE,
+        "valueDtype": VALUE_DTYPE,
+        "row": encodeArray(matrix.row, INDEX_DTYPE),
+        "col": encodeArray(matrix.col, INDEX_DTYPE),
+        "real": encodeArray(matrix.data.real, VALUE_DTYPE),
+        "imag": encodeArray(matrix.data.imag, VALUE_DTYPE)
+    }
+
+
+def cooMessageToMatrix(message: Dict) -> Tuple[List[str], sparse.coo_matrix]:
+    # client side decode of a coo formatted LocalYbus response into the full matrix
+    if message.get("format") != COO_FORMAT:
+        errorStr = f"The Ybus message is not in the {COO_FORMAT} format.\nformat: {message.get('format')}"
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+    indexDtype = message.get("indexDtype", INDEX_DTYPE)
+    valueDtype = message.get("valueDtype", VALUE_DTYPE)
+    rows = decodeArray(message["row"], indexDtype)
+    cols = decodeArray(message["col"], indexDtype)
+    values = decodeArray(message["real"], valueDtype) + 1j * decodeArray(message["imag"], valueDtype)
+    if message.get("symmetric", False):
+        offDiagonal = rows != cols
+        rows, cols = np.concatenate((rows, cols[offDiagonal])), np.concatenate((cols, rows[offDiagonal]))
+        values = np.concatenate((values, values[offDiagonal]))
+    return message["nodes"], sparse.coo_matrix((values, (rows, cols)), shape=tuple(message["shape"]))
+
+
+def validateResponseFormat(responseFormat: str):
+    if responseFormat not in ybusResponseFormats:
+        errorStr = f"Unsupported Ybus response format, {responseFormat}. Valid formats are {ybusResponseFormats}."
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+
+
+def ybusResponse(Ybus: SparseYbus, ybusDict: Dict, message: Dict) -> Dict:
+    responseFormat = message.get("format", DICT_FORMAT)
+    validateResponseFormat(responseFormat)
+    if responseFormat == COO_FORMAT:
+        return ybusToCooMessage(Ybus)
+    return ybusDict
+
+
+def ybusResponses(Ybus: SparseYbus, ybusDict: Dict, message: Dict) -> Iterator[Dict]:
+    # every message sent back for a LocalYbus request, one per chunk when the request sets "stream"
+    if not message.get("stream", False):
+        yield ybusResponse(Ybus, ybusDict, message)
+        return
+    responseFormat = message.get("format", DICT_FORMAT)
+    validateResponseFormat(responseFormat)
+    maxChunkEntries = message.get("maxChunkEntries", DEFAULT_CHUNK_ENTRIES)
+    if not isinstance(maxChunkEntries, int) or maxChunkEntries < 1:
+        errorStr = f"maxChunkEntries is not a positive integer.\nvalue: {maxChunkEntries}"
+        logger.error(errorStr)
+        raise ValueError(errorStr)
+    yield from ybusChunks(Ybus, responseFormat, maxChunkEntries)
+
+
+def ybusSubmatrixResponse(Ybus: SparseYbus, message: Dict) -> Dict:
+    # YbusSubmatrix: the rows of the nodes named in "nodes", of every node of the buses in "buses" and of every node
+    # starting with one of "busPrefixes". With "induced" set only the columns of those nodes are kept.
+    selectors = {}
+    for key in ["nodes", "buses", "busPrefixes"]:
+        selectors[key] = message.get(key, [])
+        if not isinstance(selectors[key], list):
+            errorStr = f"YbusSubmatrix {key} is not a list.\ntype: {type(selectors[key])}"
+            logger.error(errorStr)
+            raise TypeError(errorStr)
+    responseFormat = message.get("format", DICT_FORMAT)
+    validateResponseFormat(responseFormat)
+    prefixes = [f"{bus}." for bus in selectors["buses"]] + selectors["busPrefixes"]
+    rowIdx = Ybus.selectNodes(selectors["nodes"], prefixes)
+    rows, cols, values = Ybus.submatrix(rowIdx, bool(message.get("induced", False)))
+    nodeNames = Ybus.nodeNames
+    if responseFormat == DICT_FORMAT:
+        ybusDict: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        for row, col, yVal in zip(rows.tolist(), cols.tolist(), values.tolist()):
+            ybusDict.setdefault(nodeNames[row], {})[nodeNames[col]] = (yVal.real, yVal.imag)
+        return ybusDict
+    # rows and columns are renumbered against their own node lists
+    colIdx = np.unique(cols)
+    return {
+        "format": COO_FORMAT,
+        "rowNodes": [nodeNames[idx] for idx in rowIdx],
+        "colNodes": [nodeNames[idx] for idx in colIdx.tolist()],
+        "shape": [len(rowIdx), len(colIdx)],
+        "indexDtype": INDEX_DTYPE,
+        "valueDtype": VALUE_DTYPE,
+        "row": encodeArray(np.searchsorted(np.asarray(rowIdx, dtype=np.int64), rows), INDEX_DTYPE),
+        "col": encodeArray(np.searchsorted(colIdx, cols), INDEX_DTYPE),
+        "real": encodeArray(values.real, VALUE_DTYPE),
+        "imag": encodeArray(values.imag, VALUE_DTYPE)
+    }
+
+
+def rowBlockBounds(indptr: np.ndarray, maxChunkEntries: int) -> List[int]:
+    # greedy row blocks holding at most maxChunkEntries entries each unless a single row alone is larger
+    rowCount = len(indptr) - 1
+    bounds = [0]
+    while bounds[-1] < rowCount:
+        start = bounds[-1]
+        end = int(np.searchsorted(indptr, indptr[start] + maxChunkEntries, side="right")) - 1
+        bounds.append(min(max(end, start + 1), rowCount))
+    if rowCount == 0:
+        bounds.append(0)
+    return bounds
+
+
+def ybusChunks(Ybus: SparseYbus, responseFormat: str, maxChunkEntries: int) -> Iterator[Dict]:
+    # Each chunk holds complete rows of the matrix along with the names of those rows. Chunks are built one at a
+    # time as they are sent so only a single chunk is ever encoded in memory.
+    matrix = Ybus.tocsr()
+    nodeNames = Ybus.nodeNames
+    bounds = rowBlockBounds(matrix.indptr, maxChunkEntries)
+    chunkCount = len(bounds) - 1
+    for chunkIndex in range(chunkCount):
+        rowStart = bounds[chunkIndex]
+        rowEnd = bounds[chunkIndex + 1]
+        block = matrix[rowStart:rowEnd]
+        chunk = {
+            "format": responseFormat,
+            "stream": True,
+            "chunkIndex": chunkIndex,
+            "chunkCount": chunkCount,
+            "shape": list(matrix.shape),
+            "rowStart": rowStart,
+            "rowEnd": rowEnd,
+            "nodes": nodeNames[rowStart:rowEnd]
+        }
+        if responseFormat == COO_FORMAT:
+            block = block.tocoo()
+            chunk.update({
+                "indexDtype": INDEX_DTYPE,
+                "valueDtype": VALUE_DTYPE,
+                "row": encodeArray(block.row + rowStart, INDEX_DTYPE),
+                "col": encodeArray(block.col, INDEX_DTYPE),
+                "real": encodeArray(block.data.real, VALUE_DTYPE),
+                "imag": encodeArray(block.data.imag, VALUE_DTYPE)
+            })
+        else:
+            chunk["ybus"] = csrToDict(nodeNames, block, rowStart)
+        yield chunk
+
+
+class YbusStreamAssembler:
+    # Client side reassembly of a streamed LocalYbus response. Chunks may be added in any order and are decoded as
+    # they arrive so the encoded messages can be dropped right away.
+
+    def __init__(self):
+        self.chunkCount: Optional[int] = None
+        self.responseFormat: Optional[str] = None
+        self.shape: Optional[Tuple[int, int]] = None
+        self.nodeBlocks: Dict[int, List[str]] = {}
+        self.ybus: Dict = {}
+        self.rows: List[np.ndarray] = []
+        self.cols: List[np.ndarray] = []
+        self.values: List[np.ndarray] = []
+
+    @property
+    def isComplete(self) -> bool:
+        return self.chunkCount is not None and len(self.nodeBlocks) == self.chunkCount
+
+    def add(self, chunk: Dict):
+        if not chunk.get("stream", False):
+            errorStr = "The Ybus message is not part of a stream."
+            logger.error(errorStr)
+            raise ValueError(errorStr)
+        chunkIndex = chunk["chunkIndex"]
+        if chunkIndex in self.nodeBlocks:
+            return
+        self.chunkCount = chunk["chunkCount"]
+        self.responseFormat = chunk["format"]
+        self.shape = tuple(chunk["shape"])
+        self.nodeBlocks[chunkIndex] = chunk["nodes"]
+        if self.responseFormat == COO_FORMAT:
+            indexDtype = chunk.get("indexDtype", INDEX_DTYPE)
+            valueDtype = chunk.get("valueDtype", VALUE_DTYPE)
+            self.rows.append(decodeArray(chunk["row"], indexDtype))
+            self.cols.append(decodeArray(chunk["col"], indexDtype))
+            self.values.append(decodeArray(chunk["real"], valueDtype) + 1j * decodeArray(chunk["imag"], valueDtype))
+        else:
+            self.ybus.update(chunk["ybus"])
+
+    def nodes(self) -> List[str]:
+        return [node for chunkIndex in sorted(self.nodeBlocks) for node in self.nodeBlocks[chunkIndex]]
+
+    def toDict(self) -> Dict:
+        if self.responseFormat == COO_FORMAT:
+            return csrToDict(self.nodes(), self.toMatrix()[1].tocsr())
+        return self.ybus
+
+    def toMatrix(self) -> Tuple[List[str], sparse.coo_matrix]:
+        if not self.isComplete:
+            errorStr = f"Only {len(self.nodeBlocks)} of {self.chunkCount} Ybus chunks have been received."
+            logger.error(errorStr)
+            raise RuntimeError(errorStr)
+        nodes = self.nodes()
+        if self.responseFormat != COO_FORMAT:
+            nodeIndex = {node: idx for idx, node in enumerate(nodes)}
+            dictRows: List[int] = []
+            dictCols: List[int] = []
+            dictValues: List[complex] = []
+            for bus1, row in self.ybus.items():
+                for bus2, yVal in row.items():
+                    dictRows.append(nodeIndex[bus1])
+                    dictCols.append(nodeIndex[bus2])
+                    dictValues.append(complex(yVal[0], yVal[1]))
+            return nodes, sparse.coo_matrix((dictValues, (dictRows, dictCols)), shape=self.shape)
+        rows = np.concatenate(self.rows) if self.rows else np.empty(0, dtype=INDEX_DTYPE)
+        cols = np.concatenate(self.cols) if self.cols else np.empty(0, dtype=INDEX_DTYPE)
+        values = np.concatenate(self.values) if self.values else np.empty(0, dtype=complex)
+        return nodes, sparse.coo_matrix((values, (rows, cols)), shape=self.shape)
@@ -0,0 +1,183 @@
+# Copyright (c) 2023, Battelle Memorial Institute All rights reserved.
+# Battelle Memorial Institute (hereinafter Battelle) hereby grants permission to any person or entity
+# lawfully obtaining a copy of this software and associated documentation files (hereinafter the
+# Software) to redistribute and use the Software in source and binary forms, with or without modification.
+# Such person or entity may use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+# the Software, and may permit others to do so, subject to the following conditions:
+# Redistributions of source code must retain the above copyright notice, this list of conditions and the
+# following disclaimers.
+# Redistributions in binary form must reproduce the above copyright notice, this list of conditions and
+# the following disclaimer in the documentation and/or other materials provided with the distribution.
+# Other than as used herein, neither the name Battelle Memorial Institute or Battelle may be used in any
+# form whatsoever without the express written consent of Battelle.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL
+# BATTELLE OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY,
+# OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE
+# GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+# AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
+# OF THE POSSIBILITY OF SUCH DAMAGE.
+# General disclaimer for use with OSS licenses
+
+# This material was prepared as an account of work sponsored by an agency of the United States Government.
+# Neither the United States Government nor the United States Department of Energy, nor Battelle, nor any
+# of their employees, nor any jurisdiction or organization that has cooperated in the development of these
+# materials, makes any warranty, express or implied, or assumes any legal liability or responsibility for
+# the accuracy, completeness, or usefulness or any information, apparatus, product, software, or process
+# disclosed, or represents that its use would not infringe privately owned rights.
+
+# Reference herein to any specific commercial product, process, or service by trade name, trademark, manufacturer,
+# or otherwise does not necessarily constitute or imply its endorsement, recommendation, or favoring by the United
+# States Government or any agency thereof, or Battelle Memorial Institute. The views and opinions of authors expressed
+# herein do not necessarily state or reflect those of the United States Government or any agency thereof.
+
+# PACIFIC NORTHWEST NATIONAL LABORATORY operated by BATTELLE for the
+# UNITED STATES DEPARTMENT OF ENERGY under Contract DE-AC05-76RL01830
+# -------------------------------------------------------------------------------
+
+from bisect import bisect_left
+from collections import deque
+import logging
+import threading
+import time
+import tracemalloc
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of the request latency histogram buckets in milliseconds, slower requests go into one last bucket
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+# request latencies older than this drop out of the histograms
+LATENCY_WINDOW_SECONDS = 900.0
+MAX_LATENCY_SAMPLES = 10000
+# number of Ybus calculations whose metrics are kept per area
+METRICS_CALCULATION_HISTORY = 10
+
+# timers measuring the allocation peak, which is shared by all of them
+tracingLock = threading.Lock()
+runningTimers: Set["StageTimer"] = set()
+
+
+def foldTracedPeak():
+    if not tracemalloc.is_tracing():
+        return
+    peak = tracemalloc.get_traced_memory()[1]
+    for timer in runningTimers:
+        timer.allocatedPeak = max(timer.allocatedPeak, peak)
+
+
+def enableAllocationTracking():
+    # tracemalloc slows down every allocation, so peak allocations are only measured when asked for
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        logger.info("Tracing memory allocations for the Ybus metrics.")
+
+
+class StageTimer:
+    # Wall time, CPU time of the calling thread and, while tracemalloc is tracing, the peak allocation from
+    # construction until stop. Timers may be nested or run on several threads at once. The allocation peak is process
+    # wide though, so a stage that overlaps with another one also counts the other one's allocations.
+
+    def __init__(self):
+        self.isTracing = tracemalloc.is_tracing()
+        if self.isTracing:
+            with tracingLock:
+                # every running timer keeps the peak reached so far before it is reset for this one
+                foldTracedPeak()
+                self.allocatedStart = tracemalloc.get_traced_memory()[0]
+                self.allocatedPeak = self.allocatedStart
+                tracemalloc.reset_peak()
+                runningTimers.add(self)
+        self.cpuStart = time.thread_time()
+        self.wallStart = time.perf_counter()
+
+    def stop(self) -> Dict[str, float]:
+        metrics = {
+            "seconds": round(time.perf_counter() - self.wallStart, 6),
+            "cpuSeconds": round(time.thread_time() - self.cpuStart, 6)
+        }
+        if self.isTracing:
+            with tracingLock:
+                foldTracedPeak()
+                runningTimers.discard(self)
+            metrics["peakBytes"] = max(self.allocatedPeak - self.allocatedStart, 0)
+        return metrics
+
+
+class LatencyHistogram:
+    # Request latencies of the last LATENCY_WINDOW_SECONDS, bucketed when the histogram is read.
+
+    def __init__(self, windowSeconds: float = LATENCY_WINDOW_SECONDS):
+        self.windowSeconds = windowSeconds
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=MAX_LATENCY_SAMPLES)
+        self.totalCount = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append((time.monotonic(), seconds))
+            self.totalCount += 1
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            windowStart = time.monotonic() - self.windowSeconds
+            while len(self.samples) > 0 and self.samples[0][0] < windowStart:
+                self.samples.popleft()
+            latencies = sorted(seconds * 1000.0 for _, seconds in self.samples)
+            totalCount = self.totalCount
+        counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        for latency in latencies:
+            counts[bisect_left(LATENCY_BUCKETS_MS, latency)] += 1
+        histogram = {
+            "windowSeconds": self.windowSeconds,
+            "count": len(latencies),
+            "totalCount": totalCount,
+            "bucketsMs": list(LATENCY_BUCKETS_MS),
+            "counts": counts
+        }
+        if len(latencies) > 0:
+            for name, quantile in (("p50Ms", 0.5), ("p90Ms", 0.9), ("p99Ms", 0.99)):
+                histogram[name] = round(latencies[min(int(quantile * len(latencies)), len(latencies) - 1)], 3)
+            histogram["maxMs"] = round(latencies[-1], 3)
+        return histogram
+
+
+class ServiceMetrics:
+    # Metrics of one service's Ybus calculations and of the requests it served, returned by a Metrics request.
+
+    def __init__(self):
+        self.calculations: Deque[Dict] = deque(maxlen=METRICS_CALCULATION_HISTORY)
+        self.requestLatencies: Dict[str, LatencyHistogram] = {}
+        self.lock = threading.Lock()
+
+    def recordCalculation(self, updateMetrics: Dict, stages: List[Dict], summary: Optional[Dict] = None):
+        # stages are measured by the service itself, summary is the one the Ybus calculation left on the Ybus
+        summary = summary or {}
+        calculation = {"time": round(time.time(), 3), **updateMetrics}
+        for key in ("area", "nodes", "entries", "triplets", "stageThreads"):
+            if key in summary:
+                calculation[key] = summary[key]
+        calculation["stages"] = stages + summary.get("stages", [])
+        calculation["tables"] = summary.get("tables", [])
+        with self.lock:
+            self.calculations.append(calculation)
+
+    def recordRequest(self, requestType: str, seconds: float):
+        with self.lock:
+            histogram = self.requestLatencies.setdefault(requestType, LatencyHistogram())
+        histogram.record(seconds)
+
+    def toDict(self) -> Dict:
+        with self.lock:
+            calculations = list(self.calculations)
+            requestLatencies = dict(self.requestLatencies)
+        return {
+            "allocationTracking": tracemalloc.is_tracing(),
+            "calculations": calculations,
+            "requests": {
+                requestType: histogram.snapshot()
+                for requestType, histogram in requestLatencies.items()
+            }
+        }
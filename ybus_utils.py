@@ -37,11 +37,15 @@
 # UNITED STATES DEPARTMENT OF ENERGY under Contract DE-AC05-76RL01830
 # -------------------------------------------------------------------------------
 
-import copy
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cached_property
 import json
 import logging
 import math
-from typing import Dict, List
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
 from cimgraph.data_profile import CIM_PROFILE
 from cimgraph.models import DistributedArea
@@ -49,6 +53,9 @@ import cimgraph.utils as cimUtils
 import gridappsd.field_interface.agents.agents as agents_mod
 import numpy as np
 
+from sparse_ybus import ADD, SHUNT, SparseYbus, UNIQUE
+from ybus_metrics import StageTimer
+
 # TODO: query gridappsd-python for correct cim_profile instead of hardcoding it.
 cim_profile = CIM_PROFILE.RC4_2021.value
 agents_mod.set_cim_profile(cim_profile, iec61970_301=7)
@@ -61,6 +68,8 @@ class ComplexEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, complex):
             return [obj.real, obj.imag]
+        elif isinstance(obj, SparseYbus):
+            return obj.toDict()
         elif isinstance(obj, np.ndarray):
             dims = obj.shape
             rv = []
@@ -115,964 +124,651 @@ def initializeCimProfile(distributedArea: DistributedArea):
     distributedArea.get_all_edges(cim.RatioTapChanger)
 
 
-def perLengthPhaseImpedanceLineConfigs(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {}).keys()
-    perLengthImpedances = distributedArea.graph.get(cim.PerLengthPhaseImpedance, {})
-    desiredInfo = {}
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing perLengthPhaseImpedanceLineConfigs query for distributed area: {distributedAreaID}")
-    for perLengthImpedance in perLengthImpedances.values():
-        configIsValid = False
-        for line in perLengthImpedance.ACLineSegments:
-            if line.mRID in acLineSegments:
-                configIsValid = True
-                break
-        if configIsValid:
-            for phaseImpedanceData in perLengthImpedance.PhaseImpedanceData:    # type: ignore
-                desiredInfo["line_config"] = {"value": perLengthImpedance.name}    # type: ignore
-                desiredInfo["count"] = {"value": perLengthImpedance.conductorCount}    # type: ignore
-                desiredInfo["r_ohm_per_m"] = {"value": phaseImpedanceData.r}
-                desiredInfo["x_ohm_per_m"] = {"value": phaseImpedanceData.x}
-                desiredInfo["row"] = {"value": phaseImpedanceData.row}
-                desiredInfo["col"] = {"value": phaseImpedanceData.column}
-                dictContainsNone = False
-                nullAttributes = []
-                for i, v in desiredInfo.items():
-                    if v["value"] is None:
-                        dictContainsNone = True
-                        nullAttributes.append(i)
-                if len(nullAttributes) > 0:
-                    logger.debug(f"perLengthPhaseImpedanceLineConfigs():PerLengthImpedance:{perLengthImpedance.name} "
-                                 "contained the following Null attributes:\n"
-                                 f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                    nullAttributes.clear()
-                if len(desiredInfo) > 0 and not dictContainsNone:
-                    rv.append(copy.deepcopy(desiredInfo))
-                desiredInfo.clear()
-    logger.debug(f'perLengthPhaseImpdenaceLineConfigs for {distributedAreaID} returns: '
-                 f'{json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
+class PhaseImpedanceConfigRecord(NamedTuple):
+    line_config: str
+    count: int
+    r_ohm_per_m: float
+    x_ohm_per_m: float
+    row: int
+    col: int
+
 
+class PhaseImpedanceLineRecord(NamedTuple):
+    line_name: str
+    length: float
+    line_config: str
+    bus1: str
+    bus2: str
+    phase: str
+
+
+class SequenceImpedanceConfigRecord(NamedTuple):
+    line_config: str
+    r1_ohm_per_m: float
+    x1_ohm_per_m: float
+    r0_ohm_per_m: float
+    x0_ohm_per_m: float
 
-def perLengthPhaseImpedanceLineNames(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {})
-    desiredInfo = {}
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing perLengthPhaseImpedanceLineNames query for distributed area: {distributedAreaID}")
-    for line in acLineSegments.values():
-        if isinstance(line.PerLengthImpedance, cim.PerLengthPhaseImpedance):    # type: ignore
-            for acLineSegmentPhase in line.ACLineSegmentPhases:    # type: ignore
-                desiredInfo["line_name"] = {"value": line.name}    # type: ignore
-                desiredInfo["length"] = {"value": line.length}    # type: ignore
-                desiredInfo["line_config"] = {"value": line.PerLengthImpedance.name}    # type: ignore
-                for terminal in line.Terminals:    # type: ignore
-                    if int(terminal.sequenceNumber) == 1:
-                        desiredInfo["bus1"] = {"value": terminal.ConnectivityNode.name}
-                    elif int(terminal.sequenceNumber) == 2:
-                        desiredInfo["bus2"] = {"value": terminal.ConnectivityNode.name}
-                desiredInfo["phase"] = {"value": acLineSegmentPhase.phase.value}
-                dictContainsNone = False
-                nullAttributes = []
-                for i, v in desiredInfo.items():
-                    if v["value"] is None:
-                        dictContainsNone = True
-                        nullAttributes.append(i)
-                if len(nullAttributes) > 0:
-                    logger.debug(f"perLengthPhaseImpedanceLineNames():ACLineSegment:{line.name} contained the "
-                                 f"following Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                    nullAttributes.clear()
-                if len(desiredInfo) > 0 and not dictContainsNone:
-                    rv.append(copy.deepcopy(desiredInfo))
-                desiredInfo.clear()
-    logger.debug(f'perLengthPhaseImpedanceLineNames for {distributedAreaID} returns: '
-                 f'{json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
 
+class SequenceImpedanceLineRecord(NamedTuple):
+    line_name: str
+    length: float
+    line_config: str
+    bus1: str
+    bus2: str
 
-def perLengthSequenceImpedanceLineConfigs(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing perLengthSequenceImpedanceLineConfigs query for distributed area: {distributedAreaID}")
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {}).keys()
-    perLengthSequenceImpedances = distributedArea.graph.get(cim.PerLengthSequenceImpedance, {})
-    desiredInfo = {}
-    for sequenceImpedance in perLengthSequenceImpedances.values():
-        sequenceImpedanceIsValid = False
-        for line in sequenceImpedance.ACLineSegments:
-            if line.mRID in acLineSegments:
-                sequenceImpedanceIsValid = True
-                break
-        if sequenceImpedanceIsValid:    # type: ignore
-            desiredInfo["line_config"] = {"value": sequenceImpedance.name}    # type: ignore
-            desiredInfo["r1_ohm_per_m"] = {"value": sequenceImpedance.r}    # type: ignore
-            desiredInfo["x1_ohm_per_m"] = {"value": sequenceImpedance.x}    # type: ignore
-            desiredInfo["r0_ohm_per_m"] = {"value": sequenceImpedance.r0}    # type: ignore
-            desiredInfo["x0_ohm_per_m"] = {"value": sequenceImpedance.x0}    # type: ignore
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug("perLengthSequenceImpedanceLineConfigs():perLenghtSequenceImpedance:"
-                             f"{sequenceImpedance.name} contained the following Null attributes:\n"
-                             f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'perLengthSequenceImpedanceLineConfigs for {distributedAreaID} returns: '
-                 f'{json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
 
+class AcLineSegmentLineRecord(NamedTuple):
+    line_name: str
+    length: float
+    bus1: str
+    bus2: str
+    r1_Ohm: float
+    x1_Ohm: float
+    r0_Ohm: float
+    x0_Ohm: float
 
-def perLengthSequenceImpedanceLineNames(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing perLengthSequenceImpedanceLineNames query for distributed area: {distributedAreaID}")
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {})
-    desiredInfo = {}
-    for line in acLineSegments.values():
-        if isinstance(line.PerLengthImpedance, cim.PerLengthSequenceImpedance):    # type: ignore
-            desiredInfo["line_name"] = {"value": line.name}    # type: ignore
-            desiredInfo["length"] = {"value": line.length}    # type: ignore
-            desiredInfo["line_config"] = {"value": line.PerLengthImpedance.name}    # type: ignore
-            for terminal in line.Terminals:    # type: ignore
-                if int(terminal.sequenceNumber) == 1:
-                    desiredInfo["bus1"] = {"value": terminal.ConnectivityNode.name}
-                elif int(terminal.sequenceNumber) == 2:
-                    desiredInfo["bus2"] = {"value": terminal.ConnectivityNode.name}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"perLengthSequenceImpedanceLineNames():ACLineSegment:{line.name} contained the following "
-                             f"Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'perLengthSequenceImpedanceLineNames for {distributedAreaID} returns: '
-                 f'{json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
 
+class WireSpacingRecord(NamedTuple):
+    wire_spacing_info: str
+    cable: bool
+    seq: int
+    xCoord: float
+    yCoord: float
 
-def acLineSegmentLineNames(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing acLineSegmentLineNames query for distributed area: {distributedAreaID}")
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {})
-    desiredInfo = {}
-    for line in acLineSegments.values():
-        desiredInfo["line_name"] = {"value": line.name}    # type: ignore
-        desiredInfo["length"] = {"value": line.length}    # type: ignore
-        for terminal in line.Terminals:    # type: ignore
-            if int(terminal.sequenceNumber) == 1:
-                desiredInfo["bus1"] = {"value": terminal.ConnectivityNode.name}
-            elif int(terminal.sequenceNumber) == 2:
-                desiredInfo["bus2"] = {"value": terminal.ConnectivityNode.name}
-        desiredInfo["r1_Ohm"] = {"value": line.r}    # type: ignore
-        desiredInfo["x1_Ohm"] = {"value": line.x}    # type: ignore
-        desiredInfo["r0_Ohm"] = {"value": line.r0}    # type: ignore
-        desiredInfo["x0_Ohm"] = {"value": line.x0}    # type: ignore
-        dictContainsNone = False
-        nullAttributes = []
-        for i, v in desiredInfo.items():
-            if v["value"] is None:
-                dictContainsNone = True
-                nullAttributes.append(i)
-        if len(nullAttributes) > 0:
-            logger.debug(f"acLineSegmentLineNames():ACLineSegment:{line.name} contained the following Null attributes:"
-                         f"\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-            nullAttributes.clear()
-        if len(desiredInfo) > 0 and not dictContainsNone:
-            rv.append(copy.deepcopy(desiredInfo))
-        desiredInfo.clear()
-    logger.debug(f'acLineSegmentLineNames for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
 
+class OverheadWireRecord(NamedTuple):
+    wire_cn_ts: str
+    gmr: float
+    r25: float
 
-def wireInfoSpacing(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing wireInfoSpacing query for distributed area: {distributedAreaID}")
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {})
-    wireSpacingInfos = distributedArea.graph.get(cim.WireSpacingInfo, {})
-    desiredInfo = {}
-    for wireSpacingInfo in wireSpacingInfos.values():
-        infoIsValid = False
-        for line in wireSpacingInfo.ACLineSegments:
-            if line.mRID in acLineSegments.keys():
-                infoIsValid = True
-                break
-        if infoIsValid:
-            for p in wireSpacingInfo.WirePositions:    # type: ignore
-                desiredInfo["wire_spacing_info"] = {"value": wireSpacingInfo.name}    # type: ignore
-                desiredInfo["cable"] = {"value": wireSpacingInfo.isCable}    # type: ignore
-                desiredInfo["seq"] = {"value": p.sequenceNumber}
-                desiredInfo["xCoord"] = {"value": p.xCoord}
-                desiredInfo["yCoord"] = {"value": p.yCoord}
-                dictContainsNone = False
-                nullAttributes = []
-                for i, v in desiredInfo.items():
-                    if v["value"] is None:
-                        dictContainsNone = True
-                        nullAttributes.append(i)
-                if len(nullAttributes) > 0:
-                    logger.debug(f"wireInfoSpacing():WireSpacingInfo:{wireSpacingInfo.name} contained the following "
-                                 f"Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                    nullAttributes.clear()
-                if len(desiredInfo) > 0 and not dictContainsNone:
-                    rv.append(copy.deepcopy(desiredInfo))
-                desiredInfo.clear()
-    logger.debug(f'wireInfoSpacing for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
 
+class ConcentricNeutralWireRecord(NamedTuple):
+    wire_cn_ts: str
+    gmr: float
+    r25: float
+    diameter_jacket: float
+    strand_count: int
+    strand_radius: float
+    strand_gmr: float
+    strand_rdc: float
 
-def wireInfoOverhead(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing wireInfoOverhead query for distributed area: {distributedAreaID}")
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {})
-    overheadWireInfos = distributedArea.graph.get(cim.OverheadWireInfo, {})
-    desiredInfo = {}
-    for overheadWireInfo in overheadWireInfos.values():
-        infoIsValid = False
-        for line in acLineSegments.values():
-            for segmentPhase in line.ACLineSegmentPhases:
-                if isinstance(segmentPhase.WireInfo, cim.OverheadWireInfo):
-                    if overheadWireInfo.mRID == segmentPhase.WireInfo.mRID:
-                        infoIsValid = True
-                        break
-            if infoIsValid:
-                break
-        if infoIsValid:
-            desiredInfo["wire_cn_ts"] = {"value": overheadWireInfo.name}
-            desiredInfo["gmr"] = {"value": overheadWireInfo.gmr}
-            desiredInfo["r25"] = {"value": overheadWireInfo.rAC25}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"wireInfoOverhead():ACLineSegment:{line.name} contained the following Null attributes:\n"
-                             f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'wireInfoOverhead for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
 
+class TapeShieldWireRecord(NamedTuple):
+    wire_cn_ts: str
+    gmr: float
+    r25: float
+    diameter_screen: float
+    tapethickness: float
 
-def wireInfoConcentricNeutral(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing wireInfoConcentricNeutral query for distributed area: {distributedAreaID}")
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {})
-    concentricNeutralWireInfos = distributedArea.graph.get(cim.ConcentricNeutralCableInfo, {})
-    desiredInfo = {}
-    for concentricNeutralWireInfo in concentricNeutralWireInfos.values():
-        infoIsValid = False
-        for line in acLineSegments.values():
-            for segmentPhase in line.ACLineSegmentPhases:
-                if isinstance(segmentPhase.WireInfo, cim.ConcentricNeutralCableInfo):
-                    if concentricNeutralWireInfo.mRID == segmentPhase.WireInfo.mRID:
-                        infoIsValid = True
-                        break
-            if infoIsValid:
-                break
-        if infoIsValid:
-            desiredInfo["wire_cn_ts"] = {"value": concentricNeutralWireInfo.name}
-            desiredInfo["gmr"] = {"value": concentricNeutralWireInfo.gmr}
-            desiredInfo["r25"] = {"value": concentricNeutralWireInfo.rAC25}
-            desiredInfo["diameter_jacket"] = {"value": concentricNeutralWireInfo.diameterOverJacket}
-            desiredInfo["strand_count"] = {"value": concentricNeutralWireInfo.neutralStrandCount}
-            desiredInfo["strand_radius"] = {"value": concentricNeutralWireInfo.neutralStrandRadius}
-            desiredInfo["strand_gmr"] = {"value": concentricNeutralWireInfo.neutralStrandGmr}
-            desiredInfo["strand_rdc"] = {"value": concentricNeutralWireInfo.neutralStrandRDC20}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"wireInfoConcentricNeutral():ConcentricNeutralCableInfo:{concentricNeutralWireInfo.name} "
-                             "contained the following Null attributes:\n"
-                             f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'wireInfoConcentricNeutral for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
 
+class WireInfoLineRecord(NamedTuple):
+    line_name: str
+    length: float
+    bus1: str
+    bus2: str
+    wire_spacing_info: str
+    wire_cn_ts: str
+    phase: str
+    wireinfo: str
+
+
+class PowerTransformerImpedanceRecord(NamedTuple):
+    xfmr_name: str
+    mesh_x_ohm: float
+
+
+class PowerTransformerEndRecord(NamedTuple):
+    xfmr_name: str
+    connection: str
+    end_number: int
+    bus: str
+    ratedS: float
+    ratedU: int
+    r_ohm: float
+
+
+class PowerTransformerAdmittanceRecord(NamedTuple):
+    xfmr_name: str
+    b_S: float
+    g_S: float
+
+
+class TransformerTankRatedRecord(NamedTuple):
+    xfmr_name: str
+    connection: str
+    enum: int
+    ratedS: float
+    ratedU: int
+    r_ohm: float
+
+
+class TransformerTankSctRecord(NamedTuple):
+    xfmr_name: str
+    enum: int
+    gnum: int
+    leakage_z: float
 
-def wireInfoTapeShield(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing wireInfoTapeShield query for distributed area: {distributedAreaID}")
-    acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {})
-    tapeShieldWireInfos = distributedArea.graph.get(cim.TapeShieldCableInfo, {})
-    desiredInfo = {}
-    for tapeShieldWireInfo in tapeShieldWireInfos.values():
-        infoIsValid = False
-        for line in acLineSegments.values():
-            for segmentPhase in line.ACLineSegmentPhases:
-                if isinstance(segmentPhase.WireInfo, cim.TapeShieldCableInfo):
-                    if tapeShieldWireInfo.mRID == segmentPhase.WireInfo.mRID:
-                        infoIsValid = True
-                        break
-            if infoIsValid:
-                break
-        if infoIsValid:    # type: ignore
-            desiredInfo["wire_cn_ts"] = {"value": tapeShieldWireInfo.name}
-            desiredInfo["gmr"] = {"value": tapeShieldWireInfo.gmr}
-            desiredInfo["r25"] = {"value": tapeShieldWireInfo.rAC25}
-            desiredInfo["diameter_screen"] = {"value": tapeShieldWireInfo.diameterOverScreen}
-            desiredInfo["tapethickness"] = {"value": tapeShieldWireInfo.tapeThickness}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"wireInfoTapeShield():TapeShieldCableInfo:{tapeShieldWireInfo.name} contained the "
-                             f"following Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'wireInfoTapeShield for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
+
+class TransformerTankEndRecord(NamedTuple):
+    xfmr_name: str
+    enum: int
+    bus: str
+    baseV: float
+    phase: str
 
 
-def wireInfoLineNames(distributedArea) -> List[Dict]:
-    rv = []
-    rvDict = {}
+class TransformerTankNltRecord(NamedTuple):
+    xfmr_name: str
+    noloadloss_kW: float
+    i_exciting: float
+
+
+class SwitchRecord(NamedTuple):
+    sw_name: str
+    is_Open: bool
+    bus1: str
+    bus2: str
+    phases_side1: str
+
+
+class ShuntRecord(NamedTuple):
+    cap_name: str
+    b_per_section: float
+    bus: str
+    phase: str    # 'ABC' when the capacitor has no phases
+
+
+def parseBool(value) -> bool:
+    # CIM booleans come through as 'true'/'false' strings, don't depend on lowercase
+    if isinstance(value, bool):
+        return value
+    return str(value).upper() == 'TRUE'
+
+
+# converters for the record field annotations, str fields are kept as they come from the graph
+recordConverters = {float: float, int: int, bool: parseBool, str: lambda value: value}
+recordFieldConverters = {}
+
+
+def makeRecord(recordType, queryName: str, className: str, name: str, *values):
+    # build a typed record from raw CIM attribute values, returns None when any of them are Null
+    if any(value is None for value in values):
+        if logger.isEnabledFor(logging.DEBUG):
+            nullAttributes = [field for field, value in zip(recordType._fields, values) if value is None]
+            logger.debug(f"{queryName}():{className}:{name} contained the following Null attributes:\n"
+                         f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
+        return None
+    converters = recordFieldConverters.get(recordType)
+    if converters is None:
+        converters = [recordConverters[fieldType] for fieldType in recordType.__annotations__.values()]
+        recordFieldConverters[recordType] = converters
+    return recordType(*[converter(value) for converter, value in zip(converters, values)])
+
+
+def terminalBuses(equipment) -> Tuple[Optional[str], Optional[str]]:
+    bus1 = bus2 = None
+    for terminal in equipment.Terminals:    # type: ignore
+        if int(terminal.sequenceNumber) == 1:
+            bus1 = terminal.ConnectivityNode.name
+        elif int(terminal.sequenceNumber) == 2:
+            bus2 = terminal.ConnectivityNode.name
+    return bus1, bus2
+
+
+def logQueryTable(queryName: str, distributedAreaID: str, rv: List):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f'{queryName} for {distributedAreaID} returns: '
+                     f'{json.dumps([record._asdict() for record in rv],indent=4,sort_keys=True)}')
+
+
+class LineTables(NamedTuple):
+    phaseImpedanceConfigs: List[PhaseImpedanceConfigRecord]
+    phaseImpedanceLines: List[PhaseImpedanceLineRecord]
+    sequenceImpedanceConfigs: List[SequenceImpedanceConfigRecord]
+    sequenceImpedanceLines: List[SequenceImpedanceLineRecord]
+    acLineSegmentLines: List[AcLineSegmentLineRecord]
+    wireSpacings: List[WireSpacingRecord]
+    overheadWires: List[OverheadWireRecord]
+    concentricNeutralWires: List[ConcentricNeutralWireRecord]
+    tapeShieldWires: List[TapeShieldWireRecord]
+    wireInfoLines: List[WireInfoLineRecord]
+
+
+class PowerTransformerTables(NamedTuple):
+    impedances: List[PowerTransformerImpedanceRecord]
+    ends: List[PowerTransformerEndRecord]
+    admittances: List[PowerTransformerAdmittanceRecord]
+
+
+class TransformerTankTables(NamedTuple):
+    rated: List[TransformerTankRatedRecord]
+    shortCircuitTests: List[TransformerTankSctRecord]
+    ends: List[TransformerTankEndRecord]
+    noLoadTests: List[TransformerTankNltRecord]
+
+
+def appendRecord(rv: List, record):
+    if record is not None:
+        rv.append(record)
+
+
+def extractLineTables(distributedArea: DistributedArea) -> LineTables:
     distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing wireInfoLineNames query for distributed area: {distributedAreaID}")
+    logger.debug(f"extracting ACLineSegment tables for distributed area: {distributedAreaID}")
     acLineSegments = distributedArea.graph.get(cim.ACLineSegment, {})
-    desiredInfo = {}
+    phaseImpedanceLines = []
+    sequenceImpedanceLines = []
+    acLineSegmentLines = []
+    wireInfoLineDict = {}
+    usedWireInfos = {cim.OverheadWireInfo: set(), cim.ConcentricNeutralCableInfo: set(), cim.TapeShieldCableInfo: set()}
+    # single walk over the area's lines feeding every line table
     for line in acLineSegments.values():
+        bus1, bus2 = terminalBuses(line)
+        perLengthImpedance = line.PerLengthImpedance    # type: ignore
+        if isinstance(perLengthImpedance, cim.PerLengthPhaseImpedance):
+            for acLineSegmentPhase in line.ACLineSegmentPhases:    # type: ignore
+                appendRecord(
+                    phaseImpedanceLines,
+                    makeRecord(PhaseImpedanceLineRecord, "perLengthPhaseImpedanceLineNames", "ACLineSegment", line.name,
+                               line.name, line.length, perLengthImpedance.name, bus1, bus2,
+                               acLineSegmentPhase.phase.value))
+        elif isinstance(perLengthImpedance, cim.PerLengthSequenceImpedance):
+            appendRecord(
+                sequenceImpedanceLines,
+                makeRecord(SequenceImpedanceLineRecord, "perLengthSequenceImpedanceLineNames", "ACLineSegment",
+                           line.name, line.name, line.length, perLengthImpedance.name, bus1, bus2))
+        appendRecord(
+            acLineSegmentLines,
+            makeRecord(AcLineSegmentLineRecord, "acLineSegmentLineNames", "ACLineSegment", line.name, line.name,
+                       line.length, bus1, bus2, line.r, line.x, line.r0, line.x0))
+        if isinstance(line.WireSpacingInfo, cim.WireSpacingInfo):
+            wireSpacingInfoName = line.WireSpacingInfo.name    # type: ignore
+        else:
+            wireSpacingInfoName = None
         for acLineSegmentPhase in line.ACLineSegmentPhases:    # type: ignore
-            desiredInfo["line_name"] = {"value": line.name}    # type: ignore
-            desiredInfo["length"] = {"value": line.length}    # type: ignore
-            for terminal in line.Terminals:    # type: ignore
-                if int(terminal.sequenceNumber) == 1:
-                    desiredInfo["bus1"] = {"value": terminal.ConnectivityNode.name}
-                elif int(terminal.sequenceNumber) == 2:
-                    desiredInfo["bus2"] = {"value": terminal.ConnectivityNode.name}
-            if isinstance(line.WireSpacingInfo, cim.WireSpacingInfo):
-                desiredInfo["wire_spacing_info"] = {"value": line.WireSpacingInfo.name}    # type: ignore
-            else:
-                desiredInfo["wire_spacing_info"] = {"value": None}    # type: ignore
-            if isinstance(acLineSegmentPhase.WireInfo, cim.WireInfo):
-                desiredInfo["wire_cn_ts"] = {"value": acLineSegmentPhase.WireInfo.name}
-            else:
-                desiredInfo["wire_cn_ts"] = {"value": None}
-            desiredInfo["phase"] = {"value": acLineSegmentPhase.phase.value}
-            desiredInfo["wireinfo"] = {"value": type(acLineSegmentPhase.WireInfo).__name__}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"wireInfoLineNames():ACLineSegment:{line.name} contained the following Null attributes:\n"
-                             f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                if desiredInfo["line_name"]["value"] not in rvDict.keys():
-                    rvDict[desiredInfo["line_name"]["value"]] = {
-                        "A": None,
-                        "B": None,
-                        "C": None,
-                        "s1": None,
-                        "s2": None,
-                        "N": None
-                    }
-                rvDict[desiredInfo["line_name"]["value"]][desiredInfo["phase"]["value"]] = copy.deepcopy(desiredInfo)
-                desiredInfo.clear()
-    for k in rvDict.keys():
+            wireInfo = acLineSegmentPhase.WireInfo
+            for wireInfoClass, usedWireInfoIds in usedWireInfos.items():
+                if isinstance(wireInfo, wireInfoClass):
+                    usedWireInfoIds.add(wireInfo.mRID)
+            record = makeRecord(WireInfoLineRecord, "wireInfoLineNames", "ACLineSegment", line.name, line.name,
+                                line.length, bus1, bus2, wireSpacingInfoName,
+                                wireInfo.name if isinstance(wireInfo, cim.WireInfo) else None,
+                                acLineSegmentPhase.phase.value,
+                                type(wireInfo).__name__)
+            if record is not None:
+                if line.name not in wireInfoLineDict:
+                    wireInfoLineDict[line.name] = {"A": None, "B": None, "C": None, "s1": None, "s2": None, "N": None}
+                wireInfoLineDict[line.name][record.phase] = record
+    # wire info lines are ordered by phase within each line
+    wireInfoLines = []
+    for phases in wireInfoLineDict.values():
         for phs in ["A", "B", "C", "s1", "s2", "N"]:
-            if rvDict[k][phs] is not None:
-                rv.append(copy.deepcopy(rvDict[k][phs]))
-    logger.debug(f'wireInfoLineNames for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
-
-
-def powerTransformerEndXfmrImpedances(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
+            if phases[phs] is not None:
+                wireInfoLines.append(phases[phs])
+    # line configurations are only kept when a line in the area uses them
+    phaseImpedanceConfigs = []
+    for perLengthImpedance in distributedArea.graph.get(cim.PerLengthPhaseImpedance, {}).values():
+        if any(line.mRID in acLineSegments for line in perLengthImpedance.ACLineSegments):
+            for phaseImpedanceData in perLengthImpedance.PhaseImpedanceData:    # type: ignore
+                appendRecord(
+                    phaseImpedanceConfigs,
+                    makeRecord(PhaseImpedanceConfigRecord, "perLengthPhaseImpedanceLineConfigs", "PerLengthImpedance",
+                               perLengthImpedance.name, perLengthImpedance.name, perLengthImpedance.conductorCount,
+                               phaseImpedanceData.r, phaseImpedanceData.x, phaseImpedanceData.row,
+                               phaseImpedanceData.column))
+    sequenceImpedanceConfigs = []
+    for sequenceImpedance in distributedArea.graph.get(cim.PerLengthSequenceImpedance, {}).values():
+        if any(line.mRID in acLineSegments for line in sequenceImpedance.ACLineSegments):
+            appendRecord(
+                sequenceImpedanceConfigs,
+                makeRecord(SequenceImpedanceConfigRecord, "perLengthSequenceImpedanceLineConfigs",
+                           "PerLengthSequenceImpedance", sequenceImpedance.name, sequenceImpedance.name,
+                           sequenceImpedance.r, sequenceImpedance.x, sequenceImpedance.r0, sequenceImpedance.x0))
+    wireSpacings = []
+    for wireSpacingInfo in distributedArea.graph.get(cim.WireSpacingInfo, {}).values():
+        if any(line.mRID in acLineSegments for line in wireSpacingInfo.ACLineSegments):
+            for p in wireSpacingInfo.WirePositions:    # type: ignore
+                appendRecord(
+                    wireSpacings,
+                    makeRecord(WireSpacingRecord, "wireInfoSpacing", "WireSpacingInfo", wireSpacingInfo.name,
+                               wireSpacingInfo.name, wireSpacingInfo.isCable, p.sequenceNumber, p.xCoord, p.yCoord))
+    # wire infos are only kept when a line phase in the area uses them
+    overheadWires = []
+    for overheadWireInfo in distributedArea.graph.get(cim.OverheadWireInfo, {}).values():
+        if overheadWireInfo.mRID in usedWireInfos[cim.OverheadWireInfo]:
+            appendRecord(
+                overheadWires,
+                makeRecord(OverheadWireRecord, "wireInfoOverhead", "OverheadWireInfo", overheadWireInfo.name,
+                           overheadWireInfo.name, overheadWireInfo.gmr, overheadWireInfo.rAC25))
+    concentricNeutralWires = []
+    for cnWireInfo in distributedArea.graph.get(cim.ConcentricNeutralCableInfo, {}).values():
+        if cnWireInfo.mRID in usedWireInfos[cim.ConcentricNeutralCableInfo]:
+            appendRecord(
+                concentricNeutralWires,
+                makeRecord(ConcentricNeutralWireRecord, "wireInfoConcentricNeutral", "ConcentricNeutralCableInfo",
+                           cnWireInfo.name, cnWireInfo.name, cnWireInfo.gmr, cnWireInfo.rAC25,
+                           cnWireInfo.diameterOverJacket, cnWireInfo.neutralStrandCount, cnWireInfo.neutralStrandRadius,
+                           cnWireInfo.neutralStrandGmr, cnWireInfo.neutralStrandRDC20))
+    tapeShieldWires = []
+    for tsWireInfo in distributedArea.graph.get(cim.TapeShieldCableInfo, {}).values():
+        if tsWireInfo.mRID in usedWireInfos[cim.TapeShieldCableInfo]:
+            appendRecord(
+                tapeShieldWires,
+                makeRecord(TapeShieldWireRecord, "wireInfoTapeShield", "TapeShieldCableInfo", tsWireInfo.name,
+                           tsWireInfo.name, tsWireInfo.gmr, tsWireInfo.rAC25, tsWireInfo.diameterOverScreen,
+                           tsWireInfo.tapeThickness))
+    tables = LineTables(phaseImpedanceConfigs, phaseImpedanceLines, sequenceImpedanceConfigs, sequenceImpedanceLines,
+                        acLineSegmentLines, wireSpacings, overheadWires, concentricNeutralWires, tapeShieldWires,
+                        wireInfoLines)
+    for name, rv in tables._asdict().items():
+        logQueryTable(name, distributedAreaID, rv)
+    return tables
+
+
+def extractPowerTransformerTables(distributedArea: DistributedArea) -> PowerTransformerTables:
     distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing powerTransformerEndXfmrImpedances query for distributed area: {distributedAreaID}")
-    powerTransformers = distributedArea.graph.get(cim.PowerTransformer, {})
-    desiredInfo = {}
+    logger.debug(f"extracting PowerTransformer tables for distributed area: {distributedAreaID}")
+    # index the mesh impedances by their from end once instead of scanning all of them for every transformer
+    meshImpedancesByFromEnd = {}
     transformerMeshImpedances = distributedArea.graph.get(cim.TransformerMeshImpedance, {})
-    for powerTransformer in powerTransformers.values():
-        transformerEnds = []
+    for meshIdx, transformerMeshImpedance in enumerate(transformerMeshImpedances.values()):
+        fromEndID = transformerMeshImpedance.FromTransformerEnd.mRID    # type: ignore
+        meshImpedancesByFromEnd.setdefault(fromEndID, []).append((meshIdx, transformerMeshImpedance))
+    impedances = []
+    ends = []
+    admittances = []
+    for powerTransformer in distributedArea.graph.get(cim.PowerTransformer, {}).values():
+        xfmr_name = powerTransformer.name    # type: ignore
+        transformerEnds = set()
         for transformerEnd in powerTransformer.PowerTransformerEnd:
-            transformerEnds.append(transformerEnd.mRID)
-        for transformerMeshImpedance in transformerMeshImpedances.values():
-            if transformerMeshImpedance.FromTransformerEnd.mRID in transformerEnds:    # type: ignore
-                for toTransformerEnd in transformerMeshImpedance.ToTransformerEnd:    # type: ignore
-                    if toTransformerEnd.mRID in transformerEnds:    # type: ignore
-                        desiredInfo["xfmr_name"] = {"value": powerTransformer.name}    # type: ignore
-                        desiredInfo["mesh_x_ohm"] = {"value": transformerMeshImpedance.x}    # type: ignore
-                        dictContainsNone = False
-                        nullAttributes = []
-                        for i, v in desiredInfo.items():
-                            if v["value"] is None:
-                                dictContainsNone = True
-                                nullAttributes.append(i)
-                        if len(nullAttributes) > 0:
-                            logger.debug("powerTransformerEndXfmrImpedances():PowerTransformer:"
-                                         f"{powerTransformer.name} contained the following Null attributes:\n"
-                                         f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                            nullAttributes.clear()
-                        if len(desiredInfo) > 0 and not dictContainsNone:
-                            rv.append(copy.deepcopy(desiredInfo))
-                        desiredInfo.clear()
-    logger.debug(f'powerTransformerEndXfmrImpedances for {distributedAreaID} returns: '
-                 f'{json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
-
-
-def powerTransformerEndXfmrNames(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing powerTransformerEndXfmrNames query for distributed area: {distributedAreaID}")
-    powerTransformers = distributedArea.graph.get(cim.PowerTransformer, {})
-    desiredInfo = {}
-    for powerTransformer in powerTransformers.values():
+            transformerEnds.add(transformerEnd.mRID)
+        meshImpedances = {}
+        for transformerEndID in transformerEnds:
+            for meshIdx, transformerMeshImpedance in meshImpedancesByFromEnd.get(transformerEndID, []):
+                meshImpedances[meshIdx] = transformerMeshImpedance
+        for meshIdx in sorted(meshImpedances):
+            transformerMeshImpedance = meshImpedances[meshIdx]
+            for toTransformerEnd in transformerMeshImpedance.ToTransformerEnd:    # type: ignore
+                if toTransformerEnd.mRID in transformerEnds:    # type: ignore
+                    appendRecord(
+                        impedances,
+                        makeRecord(PowerTransformerImpedanceRecord, "powerTransformerEndXfmrImpedances",
+                                   "PowerTransformer", xfmr_name, xfmr_name, transformerMeshImpedance.x))
         for powerTransformerEnd in powerTransformer.PowerTransformerEnd:    # type: ignore
-            desiredInfo["xfmr_name"] = {"value": powerTransformer.name}    # type: ignore
+            connection = None
             if isinstance(powerTransformerEnd.connectionKind, cim.WindingConnection):
-                desiredInfo["connection"] = {"value": powerTransformerEnd.connectionKind.value}
-            else:
-                desiredInfo["connection"] = {"value": None}
-            desiredInfo["end_number"] = {"value": powerTransformerEnd.endNumber}
+                connection = powerTransformerEnd.connectionKind.value
+            bus = None
             if isinstance(powerTransformerEnd.Terminal, cim.Terminal) and isinstance(
                     powerTransformerEnd.Terminal.ConnectivityNode, cim.ConnectivityNode):
-                desiredInfo["bus"] = {"value": powerTransformerEnd.Terminal.ConnectivityNode.name}
-            else:
-                desiredInfo["bus"] = {"value": None}
-            desiredInfo["ratedS"] = {"value": powerTransformerEnd.ratedS}
-            desiredInfo["ratedU"] = {"value": powerTransformerEnd.ratedU}
-            desiredInfo["r_ohm"] = {"value": powerTransformerEnd.r}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"powerTransformerEndXfmrNames():PowerTransformer:{powerTransformer.name} contained the "
-                             f"following Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'powerTransformerEndXfmrNames for {distributedAreaID} returns: '
-                 f'{json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
-
-
-def transformerTankXfmrRated(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing transformerTankXfmrRated query for distributed area: {distributedAreaID}")
-    transformerTanks = distributedArea.graph.get(cim.TransformerTank, {})
-    desiredInfo = {}
-    for transformerTank in transformerTanks.values():
-        transformerTankInfo = transformerTank.TransformerTankInfo    # type: ignore
-        if transformerTankInfo is not None:
-            for transformerEndInfo in transformerTankInfo.TransformerEndInfos:
-                desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-                desiredInfo["connection"] = {"value": transformerEndInfo.connectionKind.value}
-                desiredInfo["enum"] = {"value": transformerEndInfo.endNumber}
-                desiredInfo["ratedS"] = {"value": transformerEndInfo.ratedS}
-                desiredInfo["ratedU"] = {"value": transformerEndInfo.ratedU}
-                desiredInfo["r_ohm"] = {"value": transformerEndInfo.r}
-                dictContainsNone = False
-                nullAttributes = []
-                for i, v in desiredInfo.items():
-                    if v["value"] is None:
-                        dictContainsNone = True
-                        nullAttributes.append(i)
-                if len(nullAttributes) > 0:
-                    logger.debug(f"transformerTankXfmrRated():TransformerTank:{transformerTank.name} contained the "
-                                 f"following Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                    nullAttributes.clear()
-                if len(desiredInfo) > 0 and not dictContainsNone:
-                    rv.append(copy.deepcopy(desiredInfo))
-                desiredInfo.clear()
-        else:
-            for asset in transformerTank.Assets:
-                if isinstance(asset.AssetInfo, cim.TransformerTankInfo):
-                    for transformerEndInfo in asset.AssetInfo.TransformerEndInfos:
-                        desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-                        desiredInfo["connection"] = {"value": transformerEndInfo.connectionKind.value}
-                        desiredInfo["enum"] = {"value": transformerEndInfo.endNumber}
-                        desiredInfo["ratedS"] = {"value": transformerEndInfo.ratedS}
-                        desiredInfo["ratedU"] = {"value": transformerEndInfo.ratedU}
-                        desiredInfo["r_ohm"] = {"value": transformerEndInfo.r}
-                        dictContainsNone = False
-                        nullAttributes = []
-                        for i, v in desiredInfo.items():
-                            if v["value"] is None:
-                                dictContainsNone = True
-                                nullAttributes.append(i)
-                        if len(nullAttributes) > 0:
-                            logger.debug(f"transformerTankXfmrRated():TransformerTank:{transformerTank.name} contained "
-                                         "the following Null attributes:\n"
-                                         f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                            nullAttributes.clear()
-                        if len(desiredInfo) > 0 and not dictContainsNone:
-                            rv.append(copy.deepcopy(desiredInfo))
-                        desiredInfo.clear()
-    logger.debug(f'transformerTankXfmrRated for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
-
-
-def transformerTankXfmrSct(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing transformerTankXfmrSct query for distributed area: {distributedAreaID}")
-    transformerTanks = distributedArea.graph.get(cim.TransformerTank, {})
-    desiredInfo = {}
-    for transformerTank in transformerTanks.values():
-        transformerTankInfo = transformerTank.TransformerTankInfo    # type: ignore
-        if transformerTankInfo is not None:
-            for transformerEndInfo in transformerTankInfo.TransformerEndInfos:
-                for shortCircuitTest in transformerEndInfo.EnergisedEndShortCircuitTests:
-                    for groundedEnd in shortCircuitTest.GroundedEnds:
-                        desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-                        desiredInfo["enum"] = {"value": shortCircuitTest.EnergisedEnd.endNumber}
-                        desiredInfo["gnum"] = {"value": groundedEnd.endNumber}
-                        desiredInfo["leakage_z"] = {"value": shortCircuitTest.leakageImpedance}
-                        dictContainsNone = False
-                        nullAttributes = []
-                        for i, v in desiredInfo.items():
-                            if v["value"] is None:
-                                dictContainsNone = True
-                                nullAttributes.append(i)
-                        if len(nullAttributes) > 0:
-                            logger.debug(f"transformerTankXfmrSct():TransformerTank:{transformerTank.name} contained "
-                                         "the following Null attributes:\n"
-                                         f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                            nullAttributes.clear()
-                        if len(desiredInfo) > 0 and not dictContainsNone:
-                            if desiredInfo not in rv:
-                                rv.append(copy.deepcopy(desiredInfo))
-                        desiredInfo.clear()
-                for shortCircuitTest in transformerEndInfo.GroundedEndShortCircuitTests:
-                    for groundedEnd in shortCircuitTest.GroundedEnds:
-                        desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-                        desiredInfo["enum"] = {"value": shortCircuitTest.EnergisedEnd.endNumber}
-                        desiredInfo["gnum"] = {"value": groundedEnd.endNumber}
-                        desiredInfo["leakage_z"] = {"value": shortCircuitTest.leakageImpedance}
-                        dictContainsNone = False
-                        nullAttributes = []
-                        for i, v in desiredInfo.items():
-                            if v["value"] is None:
-                                dictContainsNone = True
-                                nullAttributes.append(i)
-                        if len(nullAttributes) > 0:
-                            logger.debug(f"transformerTankXfmrSct():TransformerTank:{transformerTank.name} contained "
-                                         "the following Null attributes:\n"
-                                         f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                            nullAttributes.clear()
-                        if len(desiredInfo) > 0 and not dictContainsNone:
-                            if desiredInfo not in rv:
-                                rv.append(copy.deepcopy(desiredInfo))
-                        desiredInfo.clear()
-        else:
-            for asset in transformerTank.Assets:
-                if isinstance(asset.AssetInfo, cim.TransformerTankInfo):
-                    for transformerEndInfo in asset.AssetInfo.TransformerEndInfos:
-                        for shortCircuitTest in transformerEndInfo.EnergisedEndShortCircuitTests:
-                            for groundedEnd in shortCircuitTest.GroundedEnds:
-                                desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-                                desiredInfo["enum"] = {"value": shortCircuitTest.EnergisedEnd.endNumber}
-                                desiredInfo["gnum"] = {"value": groundedEnd.endNumber}
-                                desiredInfo["leakage_z"] = {"value": shortCircuitTest.leakageImpedance}
-                                dictContainsNone = False
-                                nullAttributes = []
-                                for i, v in desiredInfo.items():
-                                    if v["value"] is None:
-                                        dictContainsNone = True
-                                        nullAttributes.append(i)
-                                if len(nullAttributes) > 0:
-                                    logger.debug(f"transformerTankXfmrSct():TransformerTank:{transformerTank.name} "
-                                                 "contained the following Null attributes:\n"
-                                                 f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                                    nullAttributes.clear()
-                                if len(desiredInfo) > 0 and not dictContainsNone:
-                                    if desiredInfo not in rv:
-                                        rv.append(copy.deepcopy(desiredInfo))
-                                desiredInfo.clear()
-                        for shortCircuitTest in transformerEndInfo.GroundedEndShortCircuitTests:
-                            for groundedEnd in shortCircuitTest.GroundedEnds:
-                                desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-                                desiredInfo["enum"] = {"value": shortCircuitTest.EnergisedEnd.endNumber}
-                                desiredInfo["gnum"] = {"value": groundedEnd.endNumber}
-                                desiredInfo["leakage_z"] = {"value": shortCircuitTest.leakageImpedance}
-                                dictContainsNone = False
-                                nullAttributes = []
-                                for i, v in desiredInfo.items():
-                                    if v["value"] is None:
-                                        dictContainsNone = True
-                                        nullAttributes.append(i)
-                                if len(nullAttributes) > 0:
-                                    logger.debug(f"transformerTankXfmrSct():TransformerTank:{transformerTank.name} "
-                                                 "contained the following Null attributes:\n"
-                                                 f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                                    nullAttributes.clear()
-                                if len(desiredInfo) > 0 and not dictContainsNone:
-                                    if desiredInfo not in rv:
-                                        rv.append(copy.deepcopy(desiredInfo))
-                                desiredInfo.clear()
-    logger.debug(f'transformerTankXfmrSct for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
-
-
-def transformerTankXfmrNames(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
+                bus = powerTransformerEnd.Terminal.ConnectivityNode.name
+            appendRecord(
+                ends,
+                makeRecord(PowerTransformerEndRecord, "powerTransformerEndXfmrNames", "PowerTransformer", xfmr_name,
+                           xfmr_name, connection, powerTransformerEnd.endNumber, bus, powerTransformerEnd.ratedS,
+                           powerTransformerEnd.ratedU, powerTransformerEnd.r))
+        for powerTransformerEnd in powerTransformer.PowerTransformerEnd:    # type: ignore
+            if powerTransformerEnd.CoreAdmittance is not None:
+                appendRecord(
+                    admittances,
+                    makeRecord(PowerTransformerAdmittanceRecord, "powerTransformerEndXfmrAdmittances",
+                               "PowerTransformer", xfmr_name, xfmr_name, powerTransformerEnd.CoreAdmittance.b,
+                               powerTransformerEnd.CoreAdmittance.g))
+    tables = PowerTransformerTables(impedances, ends, admittances)
+    for name, rv in tables._asdict().items():
+        logQueryTable(name, distributedAreaID, rv)
+    return tables
+
+
+def transformerTankEndInfos(transformerTank) -> List:
+    # the TransformerEndInfos either hang off the tank's TransformerTankInfo or off one of its Assets
+    transformerTankInfo = transformerTank.TransformerTankInfo    # type: ignore
+    if transformerTankInfo is not None:
+        return list(transformerTankInfo.TransformerEndInfos)
+    transformerEndInfos = []
+    for asset in transformerTank.Assets:
+        if isinstance(asset.AssetInfo, cim.TransformerTankInfo):
+            transformerEndInfos.extend(asset.AssetInfo.TransformerEndInfos)
+    return transformerEndInfos
+
+
+def extractTransformerTankTables(distributedArea: DistributedArea) -> TransformerTankTables:
     distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing transformerTankXfmrNames query for distributed area: {distributedAreaID}")
-    transformerTanks = distributedArea.graph.get(cim.TransformerTank, {})
-    desiredInfo = {}
-    for transformerTank in transformerTanks.values():
+    logger.debug(f"extracting TransformerTank tables for distributed area: {distributedAreaID}")
+    rated = []
+    shortCircuitTests = []
+    # records are hashable on (xfmr_name, enum, gnum, leakage_z) so duplicates are dropped without rescanning the list
+    seenShortCircuitTests = set()
+    ends = []
+    noLoadTests = []
+    for transformerTank in distributedArea.graph.get(cim.TransformerTank, {}).values():
+        xfmr_name = transformerTank.name    # type: ignore
+        transformerEndInfos = transformerTankEndInfos(transformerTank)
+        for transformerEndInfo in transformerEndInfos:
+            appendRecord(
+                rated,
+                makeRecord(TransformerTankRatedRecord, "transformerTankXfmrRated", "TransformerTank", xfmr_name,
+                           xfmr_name, transformerEndInfo.connectionKind.value, transformerEndInfo.endNumber,
+                           transformerEndInfo.ratedS, transformerEndInfo.ratedU, transformerEndInfo.r))
+        for transformerEndInfo in transformerEndInfos:
+            for shortCircuitTest in list(transformerEndInfo.EnergisedEndShortCircuitTests) + list(
+                    transformerEndInfo.GroundedEndShortCircuitTests):
+                for groundedEnd in shortCircuitTest.GroundedEnds:
+                    record = makeRecord(TransformerTankSctRecord, "transformerTankXfmrSct", "TransformerTank",
+                                        xfmr_name, xfmr_name, shortCircuitTest.EnergisedEnd.endNumber,
+                                        groundedEnd.endNumber, shortCircuitTest.leakageImpedance)
+                    if record is not None and record not in seenShortCircuitTests:
+                        seenShortCircuitTests.add(record)
+                        shortCircuitTests.append(record)
         for transformerTankEnd in transformerTank.TransformerTankEnds:    # type: ignore
-            desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-            desiredInfo["enum"] = {"value": transformerTankEnd.endNumber}
-            desiredInfo["bus"] = {"value": transformerTankEnd.Terminal.ConnectivityNode.name}
-            desiredInfo["baseV"] = {"value": transformerTankEnd.BaseVoltage.nominalVoltage}
-            desiredInfo["phase"] = {"value": transformerTankEnd.phases.value}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"transformerTankXfmrNames():TransformerTank:{transformerTank.name} contained the "
-                             f"following Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'transformerTankXfmrNames for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
-
-
-def switchingEquipmentSwitchNames(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
+            appendRecord(
+                ends,
+                makeRecord(TransformerTankEndRecord, "transformerTankXfmrNames", "TransformerTank", xfmr_name,
+                           xfmr_name, transformerTankEnd.endNumber, transformerTankEnd.Terminal.ConnectivityNode.name,
+                           transformerTankEnd.BaseVoltage.nominalVoltage, transformerTankEnd.phases.value))
+        for transformerEndInfo in transformerEndInfos:
+            for noLoadTest in transformerEndInfo.EnergisedEndNoLoadTests:
+                appendRecord(
+                    noLoadTests,
+                    makeRecord(TransformerTankNltRecord, "transformerTankXfmrNlt", "TransformerTank", xfmr_name,
+                               xfmr_name, noLoadTest.loss, noLoadTest.excitingCurrent))
+    tables = TransformerTankTables(rated, shortCircuitTests, ends, noLoadTests)
+    for name, rv in tables._asdict().items():
+        logQueryTable(name, distributedAreaID, rv)
+    return tables
+
+
+# every switching equipment class that is stamped into the Ybus as a switch
+switchClasses = [
+    cim.LoadBreakSwitch, cim.Recloser, cim.Breaker, cim.Fuse, cim.Sectionaliser, cim.Jumper, cim.Disconnector,
+    cim.GroundDisconnector
+]
+
+
+def extractSwitchTable(distributedArea: DistributedArea) -> List[SwitchRecord]:
     distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing switchingEquipmentSwitchNames query for distributed area: {distributedAreaID}")
-    loadBreakSwitches = distributedArea.graph.get(cim.LoadBreakSwitch, {})
-    reclosers = distributedArea.graph.get(cim.Recloser, {})
-    breakers = distributedArea.graph.get(cim.Breaker, {})
-    fuses = distributedArea.graph.get(cim.Fuse, {})
-    sectionalisers = distributedArea.graph.get(cim.Sectionaliser, {})
-    jumpers = distributedArea.graph.get(cim.Jumper, {})
-    disconnectors = distributedArea.graph.get(cim.Disconnector, {})
-    groundDisconnectors = distributedArea.graph.get(cim.GroundDisconnector, {})
-    switchEquipment = {
-        **loadBreakSwitches,
-        **reclosers,
-        **breakers,
-        **fuses,
-        **sectionalisers,
-        **jumpers,
-        **disconnectors,
-        **groundDisconnectors
-    }
-    desiredInfo = {}
+    logger.debug(f"extracting switching equipment table for distributed area: {distributedAreaID}")
+    switchEquipment = {}
+    for switchClass in switchClasses:
+        switchEquipment.update(distributedArea.graph.get(switchClass, {}))
+    rv = []
     for switchEq in switchEquipment.values():
+        bus1, bus2 = terminalBuses(switchEq)
         if len(switchEq.SwitchPhase) > 0:
+            phasesSide1 = []
             for switchPhase in switchEq.SwitchPhase:    # type: ignore
-                desiredInfo["sw_name"] = {"value": switchEq.name}    # type: ignore
-                desiredInfo["is_Open"] = {"value": switchEq.open}    # type: ignore
-                for terminal in switchEq.Terminals:    # type: ignore
-                    if int(terminal.sequenceNumber) == 1:
-                        desiredInfo["bus1"] = {"value": terminal.ConnectivityNode.name}
-                    if int(terminal.sequenceNumber) == 2:
-                        desiredInfo["bus2"] = {"value": terminal.ConnectivityNode.name}
                 if switchPhase.phaseSide1 is not None:
-                    desiredInfo["phases_side1"] = {"value": switchPhase.phaseSide1.value}
+                    phasesSide1.append(switchPhase.phaseSide1.value)
                 else:
-                    desiredInfo["phases_side1"] = {"value": None}
-                dictContainsNone = False
-                nullAttributes = []
-                for i, v in desiredInfo.items():
-                    if v["value"] is None:
-                        dictContainsNone = True
-                        nullAttributes.append(i)
-                if len(nullAttributes) > 0:
-                    logger.debug(f"switchingEquipmentSwitchNames():Switch:{switchEq.name} contained the following Null "
-                                 f"attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                    nullAttributes.clear()
-                if len(desiredInfo) > 0 and not dictContainsNone:
-                    rv.append(copy.deepcopy(desiredInfo))
-                desiredInfo.clear()
+                    phasesSide1.append(None)
         else:
-            desiredInfo["sw_name"] = {"value": switchEq.name}    # type: ignore
-            desiredInfo["is_Open"] = {"value": switchEq.open}    # type: ignore
-            for terminal in switchEq.Terminals:    # type: ignore
-                if int(terminal.sequenceNumber) == 1:
-                    desiredInfo["bus1"] = {"value": terminal.ConnectivityNode.name}
-                if int(terminal.sequenceNumber) == 2:
-                    desiredInfo["bus2"] = {"value": terminal.ConnectivityNode.name}
-            desiredInfo["phases_side1"] = {"value": ''}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"switchingEquipmentSwitchNames():Switch:{switchEq.name} contained the following Null "
-                             f"attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'switchingEquipmentSwitchNames for {distributedAreaID} returns: '
-                 f'{json.dumps(rv,indent=4,sort_keys=True)}')
+            phasesSide1 = ['']
+        for phaseSide1 in phasesSide1:
+            appendRecord(
+                rv,
+                makeRecord(SwitchRecord, "switchingEquipmentSwitchNames", "Switch", switchEq.name, switchEq.name,
+                           switchEq.open, bus1, bus2, phaseSide1))
+    logQueryTable("switches", distributedAreaID, rv)
     return rv
 
 
-def shuntElementCapNames(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
+def extractShuntTable(distributedArea: DistributedArea) -> List[ShuntRecord]:
     distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing shuntElementCapNames query for distributed area: {distributedAreaID}")
-    linearShuntCompensators = distributedArea.graph.get(cim.LinearShuntCompensator, {})
-    desiredInfo = {}
-    for linearShuntCompensator in linearShuntCompensators.values():
-        if len(linearShuntCompensator.ShuntCompensatorPhase) > 0:
-            for shuntCompensatorPhase in linearShuntCompensator.ShuntCompensatorPhase:    # type: ignore
-                desiredInfo["cap_name"] = {"value": linearShuntCompensator.name}    # type: ignore
-                desiredInfo["b_per_section"] = {"value": linearShuntCompensator.bPerSection}    # type: ignore
-                for terminal in linearShuntCompensator.Terminals:
-                    if int(terminal.sequenceNumber) == 1:
-                        desiredInfo["bus"] = {"value": terminal.ConnectivityNode.name}    # type: ignore
-                    else:
-                        desiredInfo["bus"] = {"value": None}
-                if shuntCompensatorPhase.phase is not None:
-                    desiredInfo["phase"] = {"value": shuntCompensatorPhase.phase.value}
-                dictContainsNone = False
-                nullAttributes = []
-                for i, v in desiredInfo.items():
-                    if v["value"] is None:
-                        dictContainsNone = True
-                        nullAttributes.append(i)
-                if len(nullAttributes) > 0:
-                    logger.debug(f"shuntElementCapNames():Capacitor:{linearShuntCompensator.name} contained the "
-                                 f"following Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                    nullAttributes.clear()
-                if len(desiredInfo) > 0 and not dictContainsNone:
-                    rv.append(copy.deepcopy(desiredInfo))
-                desiredInfo.clear()
-        else:
-            desiredInfo["cap_name"] = {"value": linearShuntCompensator.name}    # type: ignore
-            desiredInfo["b_per_section"] = {"value": linearShuntCompensator.bPerSection}    # type: ignore
-            for terminal in linearShuntCompensator.Terminals:
-                if int(terminal.sequenceNumber) == 1:
-                    desiredInfo["bus"] = {"value": terminal.ConnectivityNode.name}    # type: ignore
-                else:
-                    desiredInfo["bus"] = {"value": None}
-            dictContainsNone = False
-            nullAttributes = []
-            for i, v in desiredInfo.items():
-                if v["value"] is None:
-                    dictContainsNone = True
-                    nullAttributes.append(i)
-            if len(nullAttributes) > 0:
-                logger.debug(f"shuntElementCapNames():Capacitor:{linearShuntCompensator.name} contained the following "
-                             f"Null attributes:\n{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                nullAttributes.clear()
-            if len(desiredInfo) > 0 and not dictContainsNone:
-                rv.append(copy.deepcopy(desiredInfo))
-            desiredInfo.clear()
-    logger.debug(f'shuntElementCapNames for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
-
-
-def transformerTankXfmrNlt(distributedArea: DistributedArea) -> List[Dict]:
+    logger.debug(f"extracting LinearShuntCompensator table for distributed area: {distributedAreaID}")
     rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing transformerTankXfmrNlt query for distributed area: {distributedAreaID}")
-    powerTransformers = distributedArea.graph.get(cim.PowerTransformer, {})
-    transformerTanks = distributedArea.graph.get(cim.TransformerTank, {})
-    desiredInfo = {}
-    for transformerTank in transformerTanks.values():
-        transformerTankInfo = transformerTank.TransformerTankInfo    # type: ignore
-        if transformerTankInfo is not None:
-            for transformerEndInfo in transformerTankInfo.TransformerEndInfos:
-                for noLoadTest in transformerEndInfo.EnergisedEndNoLoadTests:
-                    desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-                    desiredInfo["noloadloss_kW"] = {"value": noLoadTest.loss}
-                    desiredInfo["i_exciting"] = {"value": noLoadTest.excitingCurrent}
-                    dictContainsNone = False
-                    nullAttributes = []
-                    for i, v in desiredInfo.items():
-                        if v["value"] is None:
-                            dictContainsNone = True
-                            nullAttributes.append(i)
-                    if len(nullAttributes) > 0:
-                        logger.debug(f"transformerTankXfmrNlt():TransformerTank:{transformerTank.name} contained the "
-                                     "following Null attributes:\n"
-                                     f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                        nullAttributes.clear()
-                    if len(desiredInfo) > 0 and not dictContainsNone:
-                        rv.append(copy.deepcopy(desiredInfo))
-                    desiredInfo.clear()
+    for linearShuntCompensator in distributedArea.graph.get(cim.LinearShuntCompensator, {}).values():
+        bus = None
+        for terminal in linearShuntCompensator.Terminals:
+            if int(terminal.sequenceNumber) == 1:
+                bus = terminal.ConnectivityNode.name
+            else:
+                bus = None
+        if len(linearShuntCompensator.ShuntCompensatorPhase) > 0:
+            shuntPhases = linearShuntCompensator.ShuntCompensatorPhase
         else:
-            for asset in transformerTank.Assets:
-                if isinstance(asset.AssetInfo, cim.TransformerTankInfo):
-                    for transformerEndInfo in asset.AssetInfo.TransformerEndInfos:
-                        for noLoadTest in transformerEndInfo.EnergisedEndNoLoadTests:
-                            desiredInfo["xfmr_name"] = {"value": transformerTank.name}    # type: ignore
-                            desiredInfo["noloadloss_kW"] = {"value": noLoadTest.loss}
-                            desiredInfo["i_exciting"] = {"value": noLoadTest.excitingCurrent}
-                            dictContainsNone = False
-                            nullAttributes = []
-                            for i, v in desiredInfo.items():
-                                if v["value"] is None:
-                                    dictContainsNone = True
-                                    nullAttributes.append(i)
-                            if len(nullAttributes) > 0:
-                                logger.debug(f"transformerTankXfmrNlt():TransformerTank:{transformerTank.name} "
-                                             "contained the following Null attributes:\n"
-                                             f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                                nullAttributes.clear()
-                            if len(desiredInfo) > 0 and not dictContainsNone:
-                                rv.append(copy.deepcopy(desiredInfo))
-                            desiredInfo.clear()
-
-    logger.debug(f'transformerTankXfmrNlt for {distributedAreaID} returns: {json.dumps(rv,indent=4,sort_keys=True)}')
+            shuntPhases = [None]
+        for shuntCompensatorPhase in shuntPhases:    # type: ignore
+            # no phase specified indicates 3-phase
+            phase = 'ABC'
+            if shuntCompensatorPhase is not None and shuntCompensatorPhase.phase is not None:
+                phase = shuntCompensatorPhase.phase.value
+            appendRecord(
+                rv,
+                makeRecord(ShuntRecord, "shuntElementCapNames", "Capacitor", linearShuntCompensator.name,
+                           linearShuntCompensator.name, linearShuntCompensator.bPerSection, bus, phase))
+    logQueryTable("shunts", distributedAreaID, rv)
     return rv
 
 
-def powerTransformerEndXfmrAdmittances(distributedArea: DistributedArea) -> List[Dict]:
-    rv = []
-    distributedAreaID = distributedArea.container.mRID
-    logger.debug(f"performing powerTransformerEndXfmrAdmittances query for distributed area: {distributedAreaID}")
-    powerTransformers = distributedArea.graph.get(cim.PowerTransformer, {})
-    desiredInfo = {}
-    for powerTransformer in powerTransformers.values():
-        for powerTransformerEnd in powerTransformer.PowerTransformerEnd:    # type: ignore
-            if powerTransformerEnd.CoreAdmittance is not None:
-                desiredInfo["xfmr_name"] = {"value": powerTransformer.name}    # type: ignore
-                desiredInfo["b_S"] = {"value": powerTransformerEnd.CoreAdmittance.b}
-                desiredInfo["g_S"] = {"value": powerTransformerEnd.CoreAdmittance.g}
-                dictContainsNone = False
-                nullAttributes = []
-                for i, v in desiredInfo.items():
-                    if v["value"] is None:
-                        dictContainsNone = True
-                        nullAttributes.append(i)
-                if len(nullAttributes) > 0:
-                    logger.debug(f"powerTransformerEndXfmrAdmittances():PowerTransformer:{powerTransformer.name} "
-                                 "contained the following Null attributes:\n"
-                                 f"{json.dumps(nullAttributes, indent=4, sort_keys=True)}")
-                    nullAttributes.clear()
-                if len(desiredInfo) > 0 and not dictContainsNone:
-                    rv.append(copy.deepcopy(desiredInfo))
-                desiredInfo.clear()
-    logger.debug(f'powerTransformerEndXfmrAdmittances for {distributedAreaID} returns: '
-                 f'{json.dumps(rv,indent=4,sort_keys=True)}')
-    return rv
+class CimTables:
+    # Tables of the CIM data used by the Ybus fill stages. Each group of tables is extracted with a single walk over
+    # its CIM classes the first time a fill stage asks for it and is shared by every fill stage after that.
+
+    def __init__(self, distributedArea: DistributedArea):
+        self.distributedArea = distributedArea
+        self.areaID = distributedArea.container.mRID
+        # time, rows and peak allocation of every extracted group of tables in extraction order
+        self.tableMetrics: List[Dict] = []
+
+    def extractTables(self, tableGroup: str, extract):
+        timer = StageTimer()
+        tables = extract(self.distributedArea)
+        rowCount = sum(len(table) for table in tables) if isinstance(tables, tuple) else len(tables)
+        self.tableMetrics.append({"table": tableGroup, **timer.stop(), "rows": rowCount})
+        return tables
+
+    @cached_property
+    def lines(self) -> LineTables:
+        return self.extractTables("lines", extractLineTables)
+
+    @cached_property
+    def powerTransformers(self) -> PowerTransformerTables:
+        return self.extractTables("powerTransformers", extractPowerTransformerTables)
+
+    @cached_property
+    def transformerTanks(self) -> TransformerTankTables:
+        return self.extractTables("transformerTanks", extractTransformerTankTables)
+
+    @cached_property
+    def switches(self) -> List[SwitchRecord]:
+        return self.extractTables("switches", extractSwitchTable)
+
+    @cached_property
+    def shunts(self) -> List[ShuntRecord]:
+        return self.extractTables("shunts", extractShuntTable)
+
+    def extractAll(self) -> "CimTables":
+        # extracts every group of tables on the calling thread, so fill stages running on other threads only read
+        # finished tables instead of racing to extract the same group
+        for tableGroup in ("lines", "powerTransformers", "transformerTanks", "switches", "shunts"):
+            getattr(self, tableGroup)
+        return self
+
+    def materialize(self) -> "CimTables":
+        # extract every table and drop the reference to the area so the tables can be pickled on their own
+        self.extractAll()
+        self.distributedArea = None
+        return self
+
+
+# the fill stages stamp against the integer node ids of SparseYbus.nodeId, node names are only rendered from them
+# when the Ybus is serialized
+def fillYbusUnique(node1: int, node2: int, Yval: complex, Ybus: SparseYbus):
+    if Yval == 0j:
+        return
+    Ybus.stamp(node1, node2, Yval, UNIQUE)
 
 
-def fillYbusUnique(bus1: str, bus2: str, Yval: float, Ybus: Dict):
+def fillYbusAdd(node1: int, node2: int, Yval: complex, Ybus: SparseYbus):
     if Yval == 0j:
         return
-    if bus1 not in Ybus:
-        Ybus[bus1] = {}
-    if bus2 not in Ybus:
-        Ybus[bus2] = {}
-    if bus2 in Ybus[bus1]:
-        logger.warn(f'Unexpected existing value found for Ybus[{bus1}][{bus2}] when filling model value')
-    Ybus[bus1][bus2] = Ybus[bus2][bus1] = Yval
+    Ybus.stamp(node1, node2, Yval, ADD)
 
 
-def fillYbusAdd(bus1: str, bus2: str, Yval: float, Ybus: Dict):
+def fillYbusUniqueUpperLines(node1: int, node2: int, Yval: complex, Ybus: SparseYbus):
     if Yval == 0j:
         return
-    if bus1 not in Ybus:
-        Ybus[bus1] = {}
-    if bus2 not in Ybus:
-        Ybus[bus2] = {}
-    if bus2 in Ybus[bus1]:
-        Ybus[bus1][bus2] += Yval
-        Ybus[bus2][bus1] = Ybus[bus1][bus2]
-    else:
-        Ybus[bus1][bus2] = Ybus[bus2][bus1] = Yval
+    # the bus of node1 with the phase of node2 and the bus of node2 with the phase of node1
+    node3, node4 = Ybus.crossPhaseNodes(node1, node2)
+    Ybus.stamp(node1, node2, Yval, UNIQUE)
+    Ybus.stamp(node3, node4, Yval, UNIQUE)
 
 
-def fillYbusUniqueUpperLines(bus1: str, bus2: str, Yval: float, Ybus: Dict):
+def fillYbusNoSwapLines(node1: int, node2: int, Yval: complex, Ybus: SparseYbus):
+    fillYbusUnique(node2, node1, Yval, Ybus)
+    fillYbusAdd(node1, node1, -Yval, Ybus)
+    fillYbusAdd(node2, node2, -Yval, Ybus)
+
+
+def fillYbusSwapLines(node1: int, node2: int, Yval: complex, Ybus: SparseYbus):
     if Yval == 0j:
         return
-    if bus1 not in Ybus:
-        Ybus[bus1] = {}
-    if bus2 not in Ybus:
-        Ybus[bus2] = {}
-    if bus2 in Ybus[bus1]:
-        logger.warn('Unexpected existing value found for Ybus[{bus1}][{bus2}] when filling line model value')
-    # extract the node and phase from bus1 and bus2
-    node1, phase1 = bus1.split('.')
-    node2, phase2 = bus2.split('.')
-    bus3 = node1 + '.' + phase2
-    bus4 = node2 + '.' + phase1
-    if bus3 not in Ybus:
-        Ybus[bus3] = {}
-    if bus4 not in Ybus:
-        Ybus[bus4] = {}
-    Ybus[bus1][bus2] = Ybus[bus2][bus1] = Ybus[bus3][bus4] = Ybus[bus4][bus3] = Yval
-
-
-def fillYbusNoSwapLines(bus1: str, bus2: str, Yval: float, Ybus: Dict):
-    fillYbusUnique(bus2, bus1, Yval, Ybus)
-    fillYbusAdd(bus1, bus1, -Yval, Ybus)
-    fillYbusAdd(bus2, bus2, -Yval, Ybus)
-
-
-def fillYbusSwapLines(bus1: str, bus2: str, Yval: float, Ybus: Dict):
-    fillYbusUniqueUpperLines(bus2, bus1, Yval, Ybus)
-    # extract the node and phase from bus1 and bus2
-    node1, phase1 = bus1.split('.')
-    node2, phase2 = bus2.split('.')
+    fillYbusUniqueUpperLines(node2, node1, Yval, Ybus)
     # mix-and-match nodes and phases for filling Ybus
-    fillYbusAdd(bus1, node1 + '.' + phase2, -Yval, Ybus)
-    fillYbusAdd(node2 + '.' + phase1, bus2, -Yval, Ybus)
+    node3, node4 = Ybus.crossPhaseNodes(node2, node1)
+    fillYbusAdd(node1, node4, -Yval, Ybus)
+    fillYbusAdd(node3, node2, -Yval, Ybus)
+
+
+def fillYbusLineYcomp(nodes1: List[int], nodes2: List[int], Ycomp: np.ndarray, Ybus: SparseYbus):
+    # the lower triangle of a line's Ycomp row by row, pairing the phases of both ends
+    for row, node1 in enumerate(nodes1):
+        for col in range(row):
+            fillYbusSwapLines(node1, nodes2[col], Ycomp[row, col], Ybus)
+        fillYbusNoSwapLines(node1, nodes2[row], Ycomp[row, row], Ybus)
+
+
+# node phases of the 3-phase buses that lines and transformers connect to
+threePhases = ('1', '2', '3')
 
 
-def fillYbusPerLengthPhaseImpedanceLines(distributedArea, Ybus: Dict):
-    bindings = perLengthPhaseImpedanceLineConfigs(distributedArea)
+def negatedLineAdmittances(lenZabcs: List[np.ndarray]) -> List[np.ndarray]:
+    # invert the length scaled impedance matrices with a single np.linalg.inv call per conductor count instead of
+    # one LAPACK call per line, then negate them so they can be used as Ycomp
+    Ycomps: List[np.ndarray] = [np.empty((0, 0), dtype=complex)] * len(lenZabcs)
+    groups: Dict[int, List[int]] = {}
+    for i, lenZabc in enumerate(lenZabcs):
+        groups.setdefault(lenZabc.shape[0], []).append(i)
+    for idxs in groups.values():
+        invZabcs = np.linalg.inv(np.stack([lenZabcs[i] for i in idxs]))
+        for i, invZabc in zip(idxs, invZabcs):
+            Ycomps[i] = invZabc * -1
+    return Ycomps
+
+
+def fillYbusPerLengthPhaseImpedanceLines(cimTables: CimTables, Ybus: SparseYbus):
+    bindings = cimTables.lines.phaseImpedanceConfigs
     if len(bindings) == 0:
         return
     Zabc = {}
     for obj in bindings:
-        line_config = obj['line_config']['value']
-        count = int(obj['count']['value'])
-        row = int(obj['row']['value'])
-        col = int(obj['col']['value'])
-        r_ohm_per_m = float(obj['r_ohm_per_m']['value'])
-        x_ohm_per_m = float(obj['x_ohm_per_m']['value'])
+        line_config = obj.line_config
+        count = obj.count
+        row = obj.row
+        col = obj.col
+        r_ohm_per_m = obj.r_ohm_per_m
+        x_ohm_per_m = obj.x_ohm_per_m
         if line_config not in Zabc:
             if count == 1:
                 Zabc[line_config] = np.zeros((1, 1), dtype=complex)
@@ -1083,163 +779,106 @@ def fillYbusPerLengthPhaseImpedanceLines(distributedArea, Ybus: Dict):
         Zabc[line_config][row - 1, col - 1] = complex(r_ohm_per_m, x_ohm_per_m)
         if row != col:
             Zabc[line_config][col - 1, row - 1] = complex(r_ohm_per_m, x_ohm_per_m)
-    bindings = perLengthPhaseImpedanceLineNames(distributedArea)
+    bindings = cimTables.lines.phaseImpedanceLines
     if len(bindings) == 0:
         return
-    bindingsSorted = sorted(bindings, key=lambda d: (d["line_name"]["value"], d["phase"]["value"]))
+    bindingsSorted = sorted(bindings, key=lambda d: (d.line_name, d.phase))
+    # invert each distinct per-length impedance matrix once, every line then only scales it by 1/length
+    lineConfigs = sorted({obj.line_config for obj in bindings} & Zabc.keys())
+    perLengthYcomps = dict(zip(lineConfigs, negatedLineAdmittances([Zabc[config] for config in lineConfigs])))
     # map line_name query phase values to nodelist indexes
-    ybusPhaseIdx = {'A': '.1', 'B': '.2', 'C': '.3', 's1': '.1', 's2': '.2'}
+    ybusPhaseIdx = {'A': '1', 'B': '2', 'C': '3', 's1': '1', 's2': '2'}
     last_name = ''
+    # the buses and phase of every phase read so far for the current line
+    pairs = [('', '', '')] * 3
     for obj in bindingsSorted:
-        line_name = obj['line_name']['value']
-        bus1 = obj['bus1']['value'].upper()
-        bus2 = obj['bus2']['value'].upper()
-        length = float(obj['length']['value'])
-        line_config = obj['line_config']['value']
-        phase = obj['phase']['value']
+        line_name = obj.line_name
+        bus1 = obj.bus1.upper()
+        bus2 = obj.bus2.upper()
+        length = obj.length
+        line_config = obj.line_config
+        phase = obj.phase
         if line_name != last_name and line_config in Zabc:
             last_name = line_name
             line_idx = 0
-            # multiply by scalar length
-            lenZabc = Zabc[line_config] * length
-            # invert the matrix
-            invZabc = np.linalg.inv(lenZabc)
-            # test if the inverse * original = identity
-            # identityTest = np.dot(lenZabc, invZabc)
-            # logger.debug('identity test for ' + line_name + ': ' + str(identityTest))
-            # negate the matrix and assign it to Ycomp
-            Ycomp = invZabc * -1
+            # inv(Zabc * length) == inv(Zabc) / length
+            Ycomp = perLengthYcomps[line_config] / length
         # we now have the negated inverted matrix for comparison
         line_idx += 1
-        if Ycomp.size == 1:
-            fillYbusNoSwapLines(bus1 + ybusPhaseIdx[phase], bus2 + ybusPhaseIdx[phase], Ycomp[0, 0], Ybus)
-        elif Ycomp.size == 4:
-            if line_idx == 1:
-                pair_i0b1 = bus1 + ybusPhaseIdx[phase]
-                pair_i0b2 = bus2 + ybusPhaseIdx[phase]
-            else:
-                pair_i1b1 = bus1 + ybusPhaseIdx[phase]
-                pair_i1b2 = bus2 + ybusPhaseIdx[phase]
-                fillYbusNoSwapLines(pair_i0b1, pair_i0b2, Ycomp[0, 0], Ybus)
-                fillYbusSwapLines(pair_i1b1, pair_i0b2, Ycomp[1, 0], Ybus)
-                fillYbusNoSwapLines(pair_i1b1, pair_i1b2, Ycomp[1, 1], Ybus)
-        elif Ycomp.size == 9:
-            if line_idx == 1:
-                pair_i0b1 = bus1 + ybusPhaseIdx[phase]
-                pair_i0b2 = bus2 + ybusPhaseIdx[phase]
-            elif line_idx == 2:
-                pair_i1b1 = bus1 + ybusPhaseIdx[phase]
-                pair_i1b2 = bus2 + ybusPhaseIdx[phase]
-            else:
-                pair_i2b1 = bus1 + ybusPhaseIdx[phase]
-                pair_i2b2 = bus2 + ybusPhaseIdx[phase]
-                fillYbusNoSwapLines(pair_i0b1, pair_i0b2, Ycomp[0, 0], Ybus)
-                fillYbusSwapLines(pair_i1b1, pair_i0b2, Ycomp[1, 0], Ybus)
-                fillYbusNoSwapLines(pair_i1b1, pair_i1b2, Ycomp[1, 1], Ybus)
-                fillYbusSwapLines(pair_i2b1, pair_i0b2, Ycomp[2, 0], Ybus)
-                fillYbusSwapLines(pair_i2b1, pair_i1b2, Ycomp[2, 1], Ybus)
-                fillYbusNoSwapLines(pair_i2b1, pair_i2b2, Ycomp[2, 2], Ybus)
-
-
-def fillYbusPerLengthSequenceImpedanceLines(distributedArea: DistributedArea, Ybus: Dict):
-    bindings = perLengthSequenceImpedanceLineConfigs(distributedArea)
+        # the last phase of a line, and any phase past the size of Ycomp, stamps the line with the phases read before it
+        phaseCount = Ycomp.shape[0]
+        pairs[min(line_idx, phaseCount) - 1] = (bus1, bus2, ybusPhaseIdx[phase])
+        if line_idx >= phaseCount:
+            fillYbusLineYcomp([Ybus.nodeId(pairBus1, pairPhase) for pairBus1, _, pairPhase in pairs[:phaseCount]],
+                              [Ybus.nodeId(pairBus2, pairPhase) for _, pairBus2, pairPhase in pairs[:phaseCount]],
+                              Ycomp, Ybus)
+
+
+def fillYbusPerLengthSequenceImpedanceLines(cimTables: CimTables, Ybus: SparseYbus):
+    bindings = cimTables.lines.sequenceImpedanceConfigs
     if len(bindings) == 0:
         return
     Zabc = {}
     for obj in bindings:
-        line_config = obj['line_config']['value']
-        r1 = float(obj['r1_ohm_per_m']['value'])
-        x1 = float(obj['x1_ohm_per_m']['value'])
-        r0 = float(obj['r0_ohm_per_m']['value'])
-        x0 = float(obj['x0_ohm_per_m']['value'])
+        line_config = obj.line_config
+        r1 = obj.r1_ohm_per_m
+        x1 = obj.x1_ohm_per_m
+        r0 = obj.r0_ohm_per_m
+        x0 = obj.x0_ohm_per_m
         Zs = complex((r0 + 2.0 * r1) / 3.0, (x0 + 2.0 * x1) / 3.0)
         Zm = complex((r0 - r1) / 3.0, (x0 - x1) / 3.0)
         Zabc[line_config] = np.array([(Zs, Zm, Zm), (Zm, Zs, Zm), (Zm, Zm, Zs)], dtype=complex)
-    bindings = perLengthSequenceImpedanceLineNames(distributedArea)
+    bindings = cimTables.lines.sequenceImpedanceLines
     if len(bindings) == 0:
         return
+    # invert each distinct per-length impedance matrix once, every line then only scales it by 1/length
+    lineConfigs = sorted({obj.line_config for obj in bindings})
+    perLengthYcomps = dict(zip(lineConfigs, negatedLineAdmittances([Zabc[config] for config in lineConfigs])))
     for obj in bindings:
-        line_name = obj['line_name']['value']
-        bus1 = obj['bus1']['value'].upper()
-        bus2 = obj['bus2']['value'].upper()
-        length = float(obj['length']['value'])
-        line_config = obj['line_config']['value']
-        # multiply by scalar length
-        lenZabc = Zabc[line_config] * length
-        # invert the matrix
-        invZabc = np.linalg.inv(lenZabc)
-        # test if the inverse * original = identity
-        # identityTest = np.dot(lenZabc, invZabc)
-        # logger.debug('identity test for ' + line_name + ': ' + str(identityTest))
-        # negate the matrix and assign it to Ycomp
-        Ycomp = invZabc * -1
-        fillYbusNoSwapLines(bus1 + '.1', bus2 + '.1', Ycomp[0, 0], Ybus)
-        fillYbusSwapLines(bus1 + '.2', bus2 + '.1', Ycomp[1, 0], Ybus)
-        fillYbusNoSwapLines(bus1 + '.2', bus2 + '.2', Ycomp[1, 1], Ybus)
-        fillYbusSwapLines(bus1 + '.3', bus2 + '.1', Ycomp[2, 0], Ybus)
-        fillYbusSwapLines(bus1 + '.3', bus2 + '.2', Ycomp[2, 1], Ybus)
-        fillYbusNoSwapLines(bus1 + '.3', bus2 + '.3', Ycomp[2, 2], Ybus)
-
-
-def fillYbusACLineSegmentLines(distributedArea: DistributedArea, Ybus: Dict):
-    bindings = acLineSegmentLineNames(distributedArea)
+        bus1 = obj.bus1.upper()
+        bus2 = obj.bus2.upper()
+        length = obj.length
+        # inv(Zabc * length) == inv(Zabc) / length
+        Ycomp = perLengthYcomps[obj.line_config] / length
+        fillYbusLineYcomp(Ybus.nodeIds(bus1, threePhases), Ybus.nodeIds(bus2, threePhases), Ycomp, Ybus)
+
+
+def fillYbusACLineSegmentLines(cimTables: CimTables, Ybus: SparseYbus):
+    bindings = cimTables.lines.acLineSegmentLines
     if len(bindings) == 0:
         return
+    lenZabcs = []
     for obj in bindings:
-        # logger.debug(obj.keys())
-        line_name = obj['line_name']['value']
-        bus1 = obj['bus1']['value'].upper()
-        bus2 = obj['bus2']['value'].upper()
-        length = float(obj['length']['value'])
-        r1 = float(obj['r1_Ohm']['value'])
-        x1 = float(obj['x1_Ohm']['value'])
-        r0 = float(obj['r0_Ohm']['value'])
-        x0 = float(obj['x0_Ohm']['value'])
+        length = obj.length
+        r1 = obj.r1_Ohm
+        x1 = obj.x1_Ohm
+        r0 = obj.r0_Ohm
+        x0 = obj.x0_Ohm
         Zs = complex((r0 + 2.0 * r1) / 3.0, (x0 + 2.0 * x1) / 3.0)
         Zm = complex((r0 - r1) / 3.0, (x0 - x1) / 3.0)
         Zabc = np.array([(Zs, Zm, Zm), (Zm, Zs, Zm), (Zm, Zm, Zs)], dtype=complex)
         # multiply by scalar length
-        lenZabc = Zabc * length
+        lenZabcs.append(Zabc * length)
         # lenZabc = Zabc * length * 3.3 # Kludge to get arount units issue (ft vs. m)
-        # invert the matrix
-        invZabc = np.linalg.inv(lenZabc)
-        # test if the inverse * original = identity
-        # identityTest = np.dot(lenZabc, invZabc)
-        # logger.debug('identity test for ' + line_name + ': ' + str(identityTest))
-        # negate the matrix and assign it to Ycomp
-        Ycomp = invZabc * -1
-        fillYbusNoSwapLines(bus1 + '.1', bus2 + '.1', Ycomp[0, 0], Ybus)
-        fillYbusSwapLines(bus1 + '.2', bus2 + '.1', Ycomp[1, 0], Ybus)
-        fillYbusNoSwapLines(bus1 + '.2', bus2 + '.2', Ycomp[1, 1], Ybus)
-        fillYbusSwapLines(bus1 + '.3', bus2 + '.1', Ycomp[2, 0], Ybus)
-        fillYbusSwapLines(bus1 + '.3', bus2 + '.2', Ycomp[2, 1], Ybus)
-        fillYbusNoSwapLines(bus1 + '.3', bus2 + '.3', Ycomp[2, 2], Ybus)
-
-
-def CN_dist_R(dim, i, j, wire_spacing_info, wire_cn_ts, XCoord, YCoord, CN_strand_count, CN_strand_rdc, CN_strand_gmr,
-              CN_strand_radius, CN_diameter_jacket):
-    dist = (CN_diameter_jacket[wire_cn_ts] - CN_strand_radius[wire_cn_ts] * 2.0) / 2.0
-    return dist
+    Ycomps = negatedLineAdmittances(lenZabcs)
+    for obj, Ycomp in zip(bindings, Ycomps):
+        bus1 = obj.bus1.upper()
+        bus2 = obj.bus2.upper()
+        fillYbusLineYcomp(Ybus.nodeIds(bus1, threePhases), Ybus.nodeIds(bus2, threePhases), Ycomp, Ybus)
 
 
-def CN_dist_D(dim, i, j, wire_spacing_info, wire_cn_ts, XCoord, YCoord, CN_strand_count, CN_strand_rdc, CN_strand_gmr,
-              CN_strand_radius, CN_diameter_jacket):
-    ii, jj = CN_dist_ij[dim][i][j]
-    dist = math.sqrt(
-        math.pow(XCoord[wire_spacing_info][ii] - XCoord[wire_spacing_info][jj], 2) +
-        math.pow(YCoord[wire_spacing_info][ii] - YCoord[wire_spacing_info][jj], 2))
-    return dist
+def CN_dist_R(distances: np.ndarray, ij: Optional[Tuple[int, int]], cnRadius: float, strandCount: int) -> float:
+    return cnRadius
+
+
+def CN_dist_D(distances: np.ndarray, ij: Optional[Tuple[int, int]], cnRadius: float, strandCount: int) -> float:
+    return distances[ij]
 
 
-def CN_dist_DR(dim, i, j, wire_spacing_info, wire_cn_ts, XCoord, YCoord, CN_strand_count, CN_strand_rdc, CN_strand_gmr,
-               CN_strand_radius, CN_diameter_jacket):
-    ii, jj = CN_dist_ij[dim][i][j]
-    d = math.sqrt(
-        math.pow(XCoord[wire_spacing_info][ii] - XCoord[wire_spacing_info][jj], 2) +
-        math.pow(YCoord[wire_spacing_info][ii] - YCoord[wire_spacing_info][jj], 2))
-    k = CN_strand_count[wire_cn_ts]
-    R = (CN_diameter_jacket[wire_cn_ts] - CN_strand_radius[wire_cn_ts] * 2.0) / 2.0
-    dist = math.pow(math.pow(d, k) - math.pow(R, k), 1.0 / k)
+def CN_dist_DR(distances: np.ndarray, ij: Optional[Tuple[int, int]], cnRadius: float, strandCount: int) -> float:
+    d = distances[ij]
+    k = strandCount
+    dist = math.pow(math.pow(d, k) - math.pow(cnRadius, k), 1.0 / k)
 
     return dist
 
@@ -1322,123 +961,207 @@ CN_dist_ij[3][6][4] = (3, 1)
 CN_dist_func[3][6][5] = CN_dist_D
 CN_dist_ij[3][6][5] = (3, 2)
 
-
-def diagZprim(wireinfo: str, wire_cn_ts, neutralFlag, R25, GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr,
-              CN_strand_radius, CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen):
+# Zprim size for the wire info type and wire position count of the spacing of the first phase of a line
+zprimSizes = {
+    ('OverheadWireInfo', 2): 2,
+    ('OverheadWireInfo', 3): 3,
+    ('OverheadWireInfo', 4): 4,
+    ('ConcentricNeutralCableInfo', 1): 2,
+    ('ConcentricNeutralCableInfo', 2): 4,
+    ('ConcentricNeutralCableInfo', 3): 6,
+    ('TapeShieldCableInfo', 2): 3
+}
+
+
+class WireInfoTerms(NamedTuple):
+    # wire position distances of every spacing and the Carson's equation inputs of every wire in an area
+    positionCounts: Dict[str, int]
+    distances: Dict[str, np.ndarray]
+    r25: Dict[str, float]
+    gmr: Dict[str, float]
+    cnRadius: Dict[str, float]
+    cnStrandCount: Dict[str, int]
+    cnNeutralR: Dict[str, float]
+    cnNeutralGmr: Dict[str, float]
+    tsShieldR: Dict[str, float]
+    tsShieldGmr: Dict[str, float]
+
+
+def wireInfoTerms(lineTables: LineTables) -> WireInfoTerms:
+    coords = {}
+    for obj in lineTables.wireSpacings:
+        coords.setdefault(obj.wire_spacing_info, {})[obj.seq] = (obj.xCoord, obj.yCoord)
+    positionCounts = {}
+    distances = {}
+    for wire_spacing_info, positions in coords.items():
+        positionCounts[wire_spacing_info] = len(positions)
+        # rows and columns are the 1-based sequence numbers the CN_dist tables use
+        xy = np.full((max(positions) + 1, 2), np.nan)
+        for seq, position in positions.items():
+            xy[seq] = position
+        delta = xy[:, np.newaxis, :] - xy[np.newaxis, :, :]
+        distances[wire_spacing_info] = np.sqrt(np.sum(delta * delta, axis=2))
+    r25 = {}
+    gmr = {}
+    for obj in lineTables.overheadWires + lineTables.concentricNeutralWires + lineTables.tapeShieldWires:
+        r25[obj.wire_cn_ts] = obj.r25
+        gmr[obj.wire_cn_ts] = obj.gmr
+    cnWires = [obj.wire_cn_ts for obj in lineTables.concentricNeutralWires]
+    cnTable = np.array([(obj.diameter_jacket, obj.strand_count, obj.strand_radius, obj.strand_gmr, obj.strand_rdc)
+                        for obj in lineTables.concentricNeutralWires],
+                       dtype=float).reshape(-1, 5)
+    diameterJacket, strandCount, strandRadius, strandGmr, strandRdc = cnTable.T
+    cnRadius = (diameterJacket - strandRadius * 2.0) / 2.0
+    cnNeutralGmr = np.power(strandGmr * strandCount * np.power(cnRadius, strandCount - 1), 1.0 / strandCount)
+    tsWires = [obj.wire_cn_ts for obj in lineTables.tapeShieldWires]
+    tsTable = np.array([(obj.diameter_screen, obj.tapethickness) for obj in lineTables.tapeShieldWires],
+                       dtype=float).reshape(-1, 2)
+    diameterScreen, tapeThickness = tsTable.T
+    ds = diameterScreen + 2.0 * tapeThickness
+    tsShieldR = 0.3183 * 2.3718e-8 / (ds * tapeThickness * math.sqrt(50.0 / (100.0 - 20.0)))
+    return WireInfoTerms(positionCounts, distances, r25, gmr, dict(zip(cnWires, cnRadius)),
+                         dict(zip(cnWires, strandCount)), dict(zip(cnWires, strandRdc / strandCount)),
+                         dict(zip(cnWires, cnNeutralGmr)), dict(zip(tsWires, tsShieldR)),
+                         dict(zip(tsWires, 0.5 * (ds - tapeThickness))))
+
+
+def zprimDiagTerms(wireinfo: str, wire_cn_ts: str, neutralFlag: bool, terms: WireInfoTerms) -> Tuple[float, float]:
+    # resistance and geometric mean radius of a Zprim diagonal
     if wireinfo == 'ConcentricNeutralCableInfo' and neutralFlag:
-        R = (CN_diameter_jacket[wire_cn_ts] - CN_strand_radius[wire_cn_ts] * 2.0) / 2.0
-        k = CN_strand_count[wire_cn_ts]
-        dist = math.pow(CN_strand_gmr[wire_cn_ts] * k * math.pow(R, k - 1), 1.0 / k)
-        Zprim = complex(CN_strand_rdc[wire_cn_ts] / k + Rg, X0 * math.log(1.0 / dist) + Xg)
+        return terms.cnNeutralR[wire_cn_ts], terms.cnNeutralGmr[wire_cn_ts]
     # this situation won't normally occur so we are just using neutralFlag to recognize the
     # row 2 diagonal for the shield calculation vs. row1 and row3 that are handled below
     elif wireinfo == 'TapeShieldCableInfo' and neutralFlag:
-        T = TS_tape_thickness[wire_cn_ts]
-        ds = TS_diameter_screen[wire_cn_ts] + 2.0 * T
-        Rshield = 0.3183 * 2.3718e-8 / (ds * T * math.sqrt(50.0 / (100.0 - 20.0)))
-        Dss = 0.5 * (ds - T)
-        Zprim = complex(Rshield + Rg, X0 * math.log(1.0 / Dss) + Xg)
-    else:
-        Zprim = complex(R25[wire_cn_ts] + Rg, X0 * math.log(1.0 / GMR[wire_cn_ts]) + Xg)
-    return Zprim
+        return terms.tsShieldR[wire_cn_ts], terms.tsShieldGmr[wire_cn_ts]
+    return terms.r25[wire_cn_ts], terms.gmr[wire_cn_ts]
 
 
-def offDiagZprim(i, j, wireinfo, wire_spacing_info, wire_cn_ts, XCoord, YCoord, R25, GMR, CN_strand_count,
-                 CN_strand_rdc, CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                 TS_diameter_screen):
+def zprimOffDiagTerms(i: int, j: int, wireinfo: str, wire_spacing_info: str, wire_cn_ts: str,
+                      terms: WireInfoTerms) -> Tuple[float, float]:
+    # resistance and distance of the 1-based Zprim off diagonal (i, j)
     if wireinfo == 'OverheadWireInfo':
-        dist = math.sqrt(
-            math.pow(XCoord[wire_spacing_info][i] - XCoord[wire_spacing_info][j], 2) +
-            math.pow(YCoord[wire_spacing_info][i] - YCoord[wire_spacing_info][j], 2))
+        dist = terms.distances[wire_spacing_info][i, j]
     elif wireinfo == 'ConcentricNeutralCableInfo':
-        dim = len(XCoord[wire_spacing_info])    # 1=2x2, 2=4x4, 3=6x6
-        dist = CN_dist_func[dim][i][j](dim, i, j, wire_spacing_info, wire_cn_ts, XCoord, YCoord, CN_strand_count,
-                                       CN_strand_rdc, CN_strand_gmr, CN_strand_radius, CN_diameter_jacket)
+        dim = terms.positionCounts[wire_spacing_info]    # 1=2x2, 2=4x4, 3=6x6
+        dist = CN_dist_func[dim][i][j](terms.distances[wire_spacing_info], CN_dist_ij.get(dim, {}).get(i, {}).get(j),
+                                       terms.cnRadius[wire_cn_ts], terms.cnStrandCount[wire_cn_ts])
     elif wireinfo == 'TapeShieldCableInfo':
         # this should only be hit for i==2
-        T = TS_tape_thickness[wire_cn_ts]
-        ds = TS_diameter_screen[wire_cn_ts] + 2.0 * T
-        dist = 0.5 * (ds - T)
-    Zprim = complex(Rg, X0 * math.log(1.0 / dist) + Xg)
-    return Zprim
-
-
-def fillYbusWireInfoAndWireSpacingInfoLines(distributedArea: DistributedArea, Ybus: Dict):
-    # WireSpacingInfo query
-    bindings = wireInfoSpacing(distributedArea)
-    XCoord = {}
-    YCoord = {}
-    for obj in bindings:
-        wire_spacing_info = obj['wire_spacing_info']['value']
-        cableFlag = obj['cable']['value'].upper() == 'TRUE'    # don't depend on lowercase
-        seq = int(obj['seq']['value'])
-        if wire_spacing_info not in XCoord.keys():
-            XCoord[wire_spacing_info] = {}
-        if wire_spacing_info not in YCoord.keys():
-            YCoord[wire_spacing_info] = {}
-        XCoord[wire_spacing_info][seq] = float(obj['xCoord']['value'])
-        YCoord[wire_spacing_info][seq] = float(obj['yCoord']['value'])
-    # OverheadWireInfo specific query
-    bindings = wireInfoOverhead(distributedArea)
-    GMR = {}
-    R25 = {}
-    for obj in bindings:
-        wire_cn_ts = obj['wire_cn_ts']['value']
-        GMR[wire_cn_ts] = float(obj['gmr']['value'])
-        R25[wire_cn_ts] = float(obj['r25']['value'])
-    # ConcentricNeutralCableInfo specific query
-    bindings = wireInfoConcentricNeutral(distributedArea)
-    CN_diameter_jacket = {}
-    CN_strand_count = {}
-    CN_strand_radius = {}
-    CN_strand_gmr = {}
-    CN_strand_rdc = {}
-    for obj in bindings:
-        wire_cn_ts = obj['wire_cn_ts']['value']
-        GMR[wire_cn_ts] = float(obj['gmr']['value'])
-        R25[wire_cn_ts] = float(obj['r25']['value'])
-        CN_diameter_jacket[wire_cn_ts] = float(obj['diameter_jacket']['value'])
-        CN_strand_count[wire_cn_ts] = int(obj['strand_count']['value'])
-        CN_strand_radius[wire_cn_ts] = float(obj['strand_radius']['value'])
-        CN_strand_gmr[wire_cn_ts] = float(obj['strand_gmr']['value'])
-        CN_strand_rdc[wire_cn_ts] = float(obj['strand_rdc']['value'])
-    # TapeShieldCableInfo specific query
-    bindings = wireInfoTapeShield(distributedArea)
-    TS_diameter_screen = {}
-    TS_tape_thickness = {}
-    for obj in bindings:
-        wire_cn_ts = obj['wire_cn_ts']['value']
-        GMR[wire_cn_ts] = float(obj['gmr']['value'])
-        R25[wire_cn_ts] = float(obj['r25']['value'])
-        TS_diameter_screen[wire_cn_ts] = float(obj['diameter_screen']['value'])
-        TS_tape_thickness[wire_cn_ts] = float(obj['tapethickness']['value'])
+        dist = terms.tsShieldGmr[wire_cn_ts]
+    return 0.0, dist
+
+
+def zprimRowCells(cells: Dict, row: int, neutralFlag: bool, wireinfo: str, wire_spacing_info: str, wire_cn_ts: str,
+                  terms: WireInfoTerms):
+    # the 0-based Zprim row up to and including its diagonal
+    for col in range(row):
+        cells[row, col] = zprimOffDiagTerms(row + 1, col + 1, wireinfo, wire_spacing_info, wire_cn_ts, terms)
+    cells[row, row] = zprimDiagTerms(wireinfo, wire_cn_ts, neutralFlag, terms)
+
+
+def wireInfoZprimCells(rows: Tuple, terms: WireInfoTerms) -> Optional[Tuple[int, Dict]]:
+    # Replays the phase by phase Zprim fill for the rows of one line. Cells are (resistance, distance) pairs of the
+    # lower triangle and a later phase overwrites the cells an earlier one wrote, so every quirk of the fill is kept:
+    # the neutral rows of a concentric neutral cable use the wire of its last phase and the neutral of a tape shield
+    # cable goes in row 3 with the shield distance in both of its off diagonals.
+    dim = terms.positionCounts[rows[0][0]]
+    size = zprimSizes.get((rows[0][3], dim))
+    if size is None:
+        return None
+    cells = {}
+    for phaseIdx, (wire_spacing_info, phase, wire_cn_ts, wireinfo, isTapeLine) in enumerate(rows):
+        wire = (wireinfo, wire_spacing_info, wire_cn_ts, terms)
+        if phaseIdx == 0:
+            cells[0, 0] = zprimDiagTerms(wireinfo, wire_cn_ts, False, terms)
+            if (wireinfo == 'ConcentricNeutralCableInfo' and dim == 1) or wireinfo == 'TapeShieldCableInfo':
+                zprimRowCells(cells, 1, True, *wire)
+        elif phaseIdx == 1:
+            if not isTapeLine:
+                zprimRowCells(cells, 1, False, *wire)
+            if wireinfo == 'ConcentricNeutralCableInfo' and dim == 2:
+                for row in (2, 3):
+                    zprimRowCells(cells, row, True, *wire)
+            elif isTapeLine:
+                # coordinates for neutral are stored in index 2 for TapeShieldCableInfo
+                cells[2, 0] = cells[2, 1] = zprimOffDiagTerms(2, 1, *wire)
+                cells[2, 2] = zprimDiagTerms(wireinfo, wire_cn_ts, True, terms)
+        elif phaseIdx == 2:
+            zprimRowCells(cells, 2, False, *wire)
+            if wireinfo == 'ConcentricNeutralCableInfo':
+                for row in (3, 4, 5):
+                    zprimRowCells(cells, row, True, *wire)
+        elif phaseIdx == 3:
+            zprimRowCells(cells, 3, True, *wire)
+    # anything short of the full lower triangle was left uninitialized by the fill
+    if set(cells) != {(row, col) for row in range(size) for col in range(row + 1)}:
+        return None
+    return size, cells
+
+
+def wireInfoPerLengthYcomps(zprimKeys: Iterable[Tuple], terms: WireInfoTerms) -> Dict[Tuple, np.ndarray]:
+    # Kron reduced, inverted and negated per-length matrices of every distinct line layout. Layouts with the same Zprim
+    # size and phase count are reduced together as one stack of matrices.
+    batches = {}
+    for zprimKey in zprimKeys:
+        phaseCount, rows = zprimKey
+        # only 1, 2 and 3 phase lines are stamped into the Ybus
+        if not 1 <= phaseCount <= 3:
+            continue
+        layout = wireInfoZprimCells(rows, terms)
+        if layout is None:
+            logger.warning(f"Skipping wire info lines with phases {[row[1] for row in rows]} on wire spacing "
+                           f"{rows[0][0]}. Their Zprim can't be built from the wire infos {[row[3] for row in rows]}.")
+            continue
+        size, cells = layout
+        batches.setdefault((size, phaseCount), []).append((zprimKey, cells))
+    perLengthYcomps = {}
+    for (size, phaseCount), batch in batches.items():
+        cellIdx = []
+        cellTerms = []
+        for batchIdx, (_, cells) in enumerate(batch):
+            for (row, col), rd in cells.items():
+                cellIdx.append((batchIdx, row, col))
+                cellTerms.append(rd)
+        batchIdx, row, col = np.array(cellIdx).T
+        resistance, dist = np.array(cellTerms, dtype=float).T
+        # Carson's self and mutual impedances of every cell in the batch at once
+        Zprim = np.zeros((len(batch), size, size), dtype=complex)
+        Zprim[batchIdx, row, col] = Zprim[batchIdx, col, row] = (resistance + Rg) + 1j * (X0 * np.log(1.0 / dist) + Xg)
+        # create the Z-hat matrices to then compute Zabc for Ybus comparisons
+        Zij = Zprim[:, :phaseCount, :phaseCount]
+        Zin = Zprim[:, :phaseCount, phaseCount:]
+        Znj = Zprim[:, phaseCount:, :phaseCount]
+        invZnn = np.linalg.inv(Zprim[:, phaseCount:, phaseCount:])
+        # finally, compute Zabc from Z-hat matrices
+        Zabc = np.subtract(Zij, np.matmul(np.matmul(Zin, invZnn), Znj))
+        # invert the matrices and negate them
+        Ycomps = np.linalg.inv(Zabc) * -1
+        for batchIdx, (zprimKey, _) in enumerate(batch):
+            perLengthYcomps[zprimKey] = Ycomps[batchIdx]
+    return perLengthYcomps
+
+
+def fillYbusWireInfoAndWireSpacingInfoLines(cimTables: CimTables, Ybus: SparseYbus):
     # line_names query for all types
-    bindings = wireInfoLineNames(distributedArea)
+    bindings = cimTables.lines.wireInfoLines
     if len(bindings) == 0:
         return
-    bindingsSorted = sorted(bindings, key=lambda d: (d["line_name"]["value"], d["phase"]["value"]))
+    terms = wireInfoTerms(cimTables.lines)
+    bindingsSorted = sorted(bindings, key=lambda d: (d.line_name, d.phase))
     # map line_name query phase values to nodelist indexes
-    ybusPhaseIdx = {'A': '.1', 'B': '.2', 'C': '.3', 'N': '.4', 's1': '.1', 's2': '.2'}
-    # map between 0-base numpy array indices and 1-based formulas so everything lines up
-    i1 = j1 = 0
-    i2 = j2 = 1
-    i3 = j3 = 2
-    i4 = j4 = 3
-    i5 = j5 = 4
-    i6 = j6 = 5
+    ybusPhaseIdx = {'A': '1', 'B': '2', 'C': '3', 'N': '4', 's1': '1', 's2': '2'}
     tape_line = None
     tape_skip = False
-    phaseIdx = 0
-    CN_done = False
+    # Zprim rows and Ybus node pairs of the phases read since the last completed line
+    rows = []
+    pairs = []
+    # the Zprim key, node pairs and length of every completed line
+    lineLayouts = []
     for obj in bindingsSorted:
-        line_name = obj['line_name']['value']
-        bus1 = obj['bus1']['value'].upper()
-        bus2 = obj['bus2']['value'].upper()
-        length = float(obj['length']['value'])
-        wire_spacing_info = obj['wire_spacing_info']['value']
-        phase = obj['phase']['value']
-        wire_cn_ts = obj['wire_cn_ts']['value']
-        wireinfo = obj['wireinfo']['value']
+        line_name = obj.line_name
+        wire_spacing_info = obj.wire_spacing_info
+        phase = obj.phase
+        wireinfo = obj.wireinfo
         # TapeShieldCableInfo is special so it needs some special processing
         # first, the wireinfo isn't always TapeShieldCableInfo so need to match on line_name instead
         # second, only a single phase is implemented so need a way to skip processing multiple phases
@@ -1449,297 +1172,226 @@ def fillYbusWireInfoAndWireSpacingInfoLines(distributedArea: DistributedArea, Yb
         else:
             tape_line = None
             tape_skip = False
+        phaseIdx = len(rows)
         if phaseIdx == 0:
-            pair_i0b1 = bus1 + ybusPhaseIdx[phase]
-            pair_i0b2 = bus2 + ybusPhaseIdx[phase]
-            dim = len(XCoord[wire_spacing_info])
-            if wireinfo == 'OverheadWireInfo':
-                if dim == 2:
-                    Zprim = np.empty((2, 2), dtype=complex)
-                elif dim == 3:
-                    Zprim = np.empty((3, 3), dtype=complex)
-                elif dim == 4:
-                    Zprim = np.empty((4, 4), dtype=complex)
-            elif wireinfo == 'ConcentricNeutralCableInfo':
-                if dim == 1:
-                    Zprim = np.empty((2, 2), dtype=complex)
-                elif dim == 2:
-                    Zprim = np.empty((4, 4), dtype=complex)
-                elif dim == 3:
-                    Zprim = np.empty((6, 6), dtype=complex)
-            elif wireinfo == 'TapeShieldCableInfo':
-                if dim == 2:
-                    Zprim = np.empty((3, 3), dtype=complex)
-                else:
-                    tape_skip = True
-                    continue
-            # row 1
-            Zprim[i1,
-                  j1] = diagZprim(wireinfo, wire_cn_ts, False, R25, GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr,
-                                  CN_strand_radius, CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen)
-            if wireinfo == 'ConcentricNeutralCableInfo' and dim == 1:
-                CN_done = True
-                # row 2
-                Zprim[i2, j1] = Zprim[i1, j2] = offDiagZprim(2, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i2, j2] = diagZprim(wireinfo, wire_cn_ts, True, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-            elif wireinfo == 'TapeShieldCableInfo':
-                # row 2
-                Zprim[i2, j1] = Zprim[i1, j2] = offDiagZprim(2, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                # neutralFlag is passed as True as a flag indicating to use the 2nd row shield calculation
-                Zprim[i2, j2] = diagZprim(wireinfo, wire_cn_ts, True, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-        elif phaseIdx == 1:
-            pair_i1b1 = bus1 + ybusPhaseIdx[phase]
-            pair_i1b2 = bus2 + ybusPhaseIdx[phase]
-            # row 2
-            if line_name != tape_line:
-                Zprim[i2, j1] = Zprim[i1, j2] = offDiagZprim(2, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i2, j2] = diagZprim(wireinfo, wire_cn_ts, False, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-            if wireinfo == 'ConcentricNeutralCableInfo' and dim == 2:
-                CN_done = True
-                # row 3
-                Zprim[i3, j1] = Zprim[i1, j3] = offDiagZprim(3, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i3, j2] = Zprim[i2, j3] = offDiagZprim(3, 2, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i3, j3] = diagZprim(wireinfo, wire_cn_ts, True, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-                # row 4
-                Zprim[i4, j1] = Zprim[i1, j4] = offDiagZprim(4, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i4, j2] = Zprim[i2, j4] = offDiagZprim(4, 2, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i4, j3] = Zprim[i3, j4] = offDiagZprim(4, 3, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i4, j4] = diagZprim(wireinfo, wire_cn_ts, True, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-            elif line_name == tape_line:
-                # row 3
-                # coordinates for neutral are stored in index 2 for TapeShieldCableInfo
-                Zprim[i3, j1] = Zprim[i1, j3] = Zprim[i3, j2] = Zprim[i2, j3] = offDiagZprim(
-                    2, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord, YCoord, R25, GMR, CN_strand_count,
-                    CN_strand_rdc, CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                    TS_diameter_screen)
-                Zprim[i3, j3] = diagZprim(wireinfo, wire_cn_ts, True, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-        elif phaseIdx == 2:
-            pair_i2b1 = bus1 + ybusPhaseIdx[phase]
-            pair_i2b2 = bus2 + ybusPhaseIdx[phase]
-            # row 3
-            Zprim[i3,
-                  j1] = Zprim[i1,
-                              j3] = offDiagZprim(3, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord, YCoord, R25,
-                                                 GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr, CN_strand_radius,
-                                                 CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen)
-            Zprim[i3,
-                  j2] = Zprim[i2,
-                              j3] = offDiagZprim(3, 2, wireinfo, wire_spacing_info, wire_cn_ts, XCoord, YCoord, R25,
-                                                 GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr, CN_strand_radius,
-                                                 CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen)
-            Zprim[i3,
-                  j3] = diagZprim(wireinfo, wire_cn_ts, False, R25, GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr,
-                                  CN_strand_radius, CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen)
-            if wireinfo == 'ConcentricNeutralCableInfo':
-                CN_done = True
-                # row 4
-                Zprim[i4, j1] = Zprim[i1, j4] = offDiagZprim(4, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i4, j2] = Zprim[i2, j4] = offDiagZprim(4, 2, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i4, j3] = Zprim[i3, j4] = offDiagZprim(4, 3, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i4, j4] = diagZprim(wireinfo, wire_cn_ts, True, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-                # row 5
-                Zprim[i5, j1] = Zprim[i1, j5] = offDiagZprim(5, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i5, j2] = Zprim[i2, j5] = offDiagZprim(5, 2, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i5, j3] = Zprim[i3, j5] = offDiagZprim(5, 3, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i5, j4] = Zprim[i4, j5] = offDiagZprim(5, 4, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i5, j5] = diagZprim(wireinfo, wire_cn_ts, True, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-                # row 6
-                Zprim[i6, j1] = Zprim[i1, j6] = offDiagZprim(6, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i6, j2] = Zprim[i2, j6] = offDiagZprim(6, 2, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i6, j3] = Zprim[i3, j6] = offDiagZprim(6, 3, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i6, j4] = Zprim[i4, j6] = offDiagZprim(6, 4, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i6, j5] = Zprim[i5, j6] = offDiagZprim(6, 5, wireinfo, wire_spacing_info, wire_cn_ts, XCoord,
-                                                             YCoord, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                                             CN_strand_gmr, CN_strand_radius, CN_diameter_jacket,
-                                                             TS_tape_thickness, TS_diameter_screen)
-                Zprim[i6, j6] = diagZprim(wireinfo, wire_cn_ts, True, R25, GMR, CN_strand_count, CN_strand_rdc,
-                                          CN_strand_gmr, CN_strand_radius, CN_diameter_jacket, TS_tape_thickness,
-                                          TS_diameter_screen)
-        elif phaseIdx == 3:
-            # this can only be phase 'N' so no need to store 'pair' values
-            # row 4
-            Zprim[i4,
-                  j1] = Zprim[i1,
-                              j4] = offDiagZprim(4, 1, wireinfo, wire_spacing_info, wire_cn_ts, XCoord, YCoord, R25,
-                                                 GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr, CN_strand_radius,
-                                                 CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen)
-            Zprim[i4,
-                  j2] = Zprim[i2,
-                              j4] = offDiagZprim(4, 2, wireinfo, wire_spacing_info, wire_cn_ts, XCoord, YCoord, R25,
-                                                 GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr, CN_strand_radius,
-                                                 CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen)
-            Zprim[i4,
-                  j3] = Zprim[i3,
-                              j4] = offDiagZprim(4, 3, wireinfo, wire_spacing_info, wire_cn_ts, XCoord, YCoord, R25,
-                                                 GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr, CN_strand_radius,
-                                                 CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen)
-            Zprim[i4,
-                  j4] = diagZprim(wireinfo, wire_cn_ts, phase, R25, GMR, CN_strand_count, CN_strand_rdc, CN_strand_gmr,
-                                  CN_strand_radius, CN_diameter_jacket, TS_tape_thickness, TS_diameter_screen)
+            dim = terms.positionCounts[wire_spacing_info]
+            if wireinfo == 'TapeShieldCableInfo' and dim != 2:
+                tape_skip = True
+                continue
+        rows.append((wire_spacing_info, phase, obj.wire_cn_ts, wireinfo, line_name == tape_line))
+        if phaseIdx < 3:
+            pairs.append((obj.bus1.upper(), obj.bus2.upper(), ybusPhaseIdx[phase]))
+        CN_done = wireinfo == 'ConcentricNeutralCableInfo' and (phaseIdx == 2 or (phaseIdx, dim) in ((0, 1), (1, 2)))
         # for OverheadWireInfo, take advantage that there is always a phase N
         # and it's always the last item processed for a line_name so a good way
         # to know when to trigger the Ybus comparison code
         # for ConcentricNeutralCableInfo, a flag is the easiest
-        if (wireinfo == 'OverheadWireInfo' and phase == 'N') or (wireinfo == 'ConcentricNeutralCableInfo' and CN_done):
-            if wireinfo == 'ConcentricNeutralCableInfo':
-                # the Z-hat slicing below is based on having an 'N' phase so need to
-                # account for that when it doesn't exist
-                phaseIdx += 1
-                CN_done = False
-            # create the Z-hat matrices to then compute Zabc for Ybus comparisons
-            Zij = Zprim[:phaseIdx, :phaseIdx]
-            Zin = Zprim[:phaseIdx, phaseIdx:]
-            Znj = Zprim[phaseIdx:, :phaseIdx]
-            # Znn = Zprim[phaseIdx:,phaseIdx:]
-            invZnn = np.linalg.inv(Zprim[phaseIdx:, phaseIdx:])
-            # finally, compute Zabc from Z-hat matrices
-            Zabc = np.subtract(Zij, np.matmul(np.matmul(Zin, invZnn), Znj))
-            # multiply by scalar length
-            lenZabc = Zabc * length
-            # invert the matrix
-            invZabc = np.linalg.inv(lenZabc)
-            # test if the inverse * original = identity
-            # identityTest = np.dot(lenZabc, invZabc)
-            # logger.debug('identity test for ' + line_name + ': ' + str(identityTest))
-            # negate the matrix and assign it to Ycomp
-            Ycomp = invZabc * -1
-            if Ycomp.size == 1:
-                fillYbusNoSwapLines(pair_i0b1, pair_i0b2, Ycomp[0, 0], Ybus)
-            elif Ycomp.size == 4:
-                fillYbusNoSwapLines(pair_i0b1, pair_i0b2, Ycomp[0, 0], Ybus)
-                fillYbusSwapLines(pair_i1b1, pair_i0b2, Ycomp[1, 0], Ybus)
-                fillYbusNoSwapLines(pair_i1b1, pair_i1b2, Ycomp[1, 1], Ybus)
-            elif Ycomp.size == 9:
-                fillYbusNoSwapLines(pair_i0b1, pair_i0b2, Ycomp[0, 0], Ybus)
-                fillYbusSwapLines(pair_i1b1, pair_i0b2, Ycomp[1, 0], Ybus)
-                fillYbusNoSwapLines(pair_i1b1, pair_i1b2, Ycomp[1, 1], Ybus)
-                fillYbusSwapLines(pair_i2b1, pair_i0b2, Ycomp[2, 0], Ybus)
-                fillYbusSwapLines(pair_i2b1, pair_i1b2, Ycomp[2, 1], Ybus)
-                fillYbusNoSwapLines(pair_i2b1, pair_i2b2, Ycomp[2, 2], Ybus)
-            phaseIdx = 0
+        if (wireinfo == 'OverheadWireInfo' and phase == 'N') or CN_done:
+            # the Z-hat slicing is based on having an 'N' phase so need to
+            # account for that when it doesn't exist
+            phaseCount = len(rows) if CN_done else phaseIdx
+            lineLayouts.append(((phaseCount, tuple(rows)), pairs[:phaseCount], obj.length))
+            rows = []
+            pairs = []
+    perLengthYcomps = wireInfoPerLengthYcomps({zprimKey for zprimKey, _, _ in lineLayouts}, terms)
+    for zprimKey, pairs, length in lineLayouts:
+        if zprimKey not in perLengthYcomps:
+            continue
+        # inv(Zabc * length) == inv(Zabc) / length
+        Ycomp = perLengthYcomps[zprimKey] / length
+        fillYbusLineYcomp([Ybus.nodeId(bus1, phase) for bus1, _, phase in pairs],
+                          [Ybus.nodeId(bus2, phase) for _, bus2, phase in pairs], Ycomp, Ybus)
+
+
+# initialize different variations of B upfront and then figure out later
+# which to use for each transformer
+transformerB = {}
+# 3-phase
+transformerB['3p'] = np.zeros((6, 3))
+transformerB['3p'][0, 0] = transformerB['3p'][2, 1] = transformerB['3p'][4, 2] = 1.0
+transformerB['3p'][1, 0] = transformerB['3p'][3, 1] = transformerB['3p'][5, 2] = -1.0
+# 1-phase, 2-windings
+transformerB['2w'] = np.zeros((2, 1))
+transformerB['2w'][0, 0] = 1.0
+transformerB['2w'][1, 0] = -1.0
+# 1-phase, 3-windings
+transformerB['3w'] = np.zeros((3, 2))
+transformerB['3w'][0, 0] = transformerB['3w'][0, 1] = transformerB['3w'][2, 1] = 1.0
+transformerB['3w'][1, 0] = -1.0
+# initialize Y and D matrices, also constant, used to set A for
+# 3-phase transformers
+Y1_3p = np.zeros((4, 12))
+Y1_3p[0, 0] = Y1_3p[1, 4] = Y1_3p[2, 8] = Y1_3p[3, 1] = Y1_3p[3, 5] = Y1_3p[3, 9] = 1.0
+Y2_3p = np.zeros((4, 12))
+Y2_3p[0, 2] = Y2_3p[1, 6] = Y2_3p[2, 10] = Y2_3p[3, 3] = Y2_3p[3, 7] = Y2_3p[3, 11] = 1.0
+D1_3p = np.zeros((4, 12))
+D1_3p[0, 0] = D1_3p[0, 9] = D1_3p[1, 1] = D1_3p[1, 4] = D1_3p[2, 5] = D1_3p[2, 8] = 1.0
+D2_3p = np.zeros((4, 12))
+D2_3p[0, 2] = D2_3p[0, 11] = D2_3p[1, 3] = D2_3p[1, 6] = D2_3p[2, 7] = D2_3p[2, 10] = 1.0
+# initialize A for each transformer variation
+transformerA = {}
+transformerA['2w'] = np.identity(4)
+transformerA['3w'] = np.identity(6)
+transformerA['3p_YY'] = np.vstack((Y1_3p, Y2_3p))
+transformerA['3p_DD'] = np.vstack((D1_3p, D2_3p))
+transformerA['3p_YD'] = np.vstack((Y1_3p, D2_3p))
+transformerA['3p_DY'] = np.vstack((D1_3p, Y2_3p))
+
+# rows and columns of Ycomp that are kept for the Ybus: 3-phase drops 4 and 8, split phase drops 2, 4 and 5 and
+# 1-phase, 2-winding drops 2 and 4
+transformerReducedRows = {'3p': [0, 1, 2, 4, 5, 6], '3w': [0, 2, 5], '2w': [0, 2]}
+
+# reduced Ycomp per (Akey, design), least recently used first
+TRANSFORMER_YCOMP_CACHE_SIZE = 4096
+transformerYcompCache: OrderedDict = OrderedDict()
+transformerYcompLock = threading.Lock()
+
+
+def transformerYcompBatch(Akey: str, designs: List[Tuple]) -> np.ndarray:
+    # Reduced Ycomp of every design of one transformer class as a single (T, k, k) stack. A design holds the per
+    # winding ratings, resistances and leakage impedances, the only inputs besides the winding type and connection
+    # in Akey.
+    Bkey = Akey[:2]
+    T = len(designs)
+    ratedS, ratedU, r_ohm, leakage_z = (np.array(values, dtype=float) for values in zip(*designs))
+    # note that division is always floating point in Python 3 even if
+    # operands are integer
+    zBaseP = (ratedU[:, 0] * ratedU[:, 0]) / ratedS[:, 0]
+    r_ohm_pu = r_ohm[:, 0] / zBaseP
+    mesh_x_ohm_pu = leakage_z[:, 0] / zBaseP
+    if Bkey == '3p':
+        zsc_1V = (2.0 * r_ohm_pu + 1j * mesh_x_ohm_pu) * (3.0 / ratedS[:, 0])
+        # initialize ZB
+        ZB = np.zeros((T, 3, 3), dtype=complex)
+        ZB[:, 0, 0] = ZB[:, 1, 1] = ZB[:, 2, 2] = zsc_1V
+        # initialize N
+        if Akey[3] == 'Y':
+            Vp = ratedU[:, 0] / math.sqrt(3.0)
         else:
-            phaseIdx += 1
-
-
-def fillYbus6x6Xfmrs(bus1: str, bus2: str, DY_flag: bool, Ycomp: np.ndarray, Ybus: Dict):
+            Vp = ratedU[:, 0]
+        if Akey[4] == 'Y':
+            Vs = ratedU[:, 1] / math.sqrt(3.0)
+        else:
+            Vs = ratedU[:, 1]
+        N = np.zeros((T, 12, 6))
+        N[:, [0, 4, 8], [0, 2, 4]] = (1.0 / Vp)[:, np.newaxis]
+        N[:, [1, 5, 9], [0, 2, 4]] = (-1.0 / Vp)[:, np.newaxis]
+        N[:, [2, 6, 10], [1, 3, 5]] = (1.0 / Vs)[:, np.newaxis]
+        N[:, [3, 7, 11], [1, 3, 5]] = (-1.0 / Vs)[:, np.newaxis]
+    elif Bkey == '3w':
+        zBaseS = (ratedU[:, 1] * ratedU[:, 1]) / ratedS[:, 1]
+        zsc_1V = (3.0 * r_ohm_pu + 1j * mesh_x_ohm_pu) * (1.0 / ratedS[:, 0])
+        zod_1V = (2.0 * r_ohm[:, 1] + 1j * leakage_z[:, 1]) / zBaseS * (1.0 / ratedS[:, 1])
+        # initialize ZB
+        ZB = np.zeros((T, 2, 2), dtype=complex)
+        ZB[:, 0, 0] = ZB[:, 1, 1] = zsc_1V
+        ZB[:, 1, 0] = ZB[:, 0, 1] = 0.5 * (zsc_1V + zsc_1V - zod_1V)
+        # initialize N
+        Vp = ratedU[:, 0]
+        Vs1 = ratedU[:, 1]
+        Vs2 = ratedU[:, 2]
+        N = np.zeros((T, 6, 3))
+        N[:, 0, 0] = 1.0 / Vp
+        N[:, 1, 0] = -1.0 / Vp
+        N[:, 2, 1] = 1.0 / Vs1
+        N[:, 3, 1] = -1.0 / Vs1
+        N[:, 4, 2] = -1.0 / Vs2
+        N[:, 5, 2] = 1.0 / Vs2
+    else:
+        zsc_1V = (2.0 * r_ohm_pu + 1j * mesh_x_ohm_pu) * (1.0 / ratedS[:, 0])
+        # initialize ZB
+        ZB = zsc_1V.reshape(T, 1, 1)
+        # initialize N
+        Vp = ratedU[:, 0]
+        Vs = ratedU[:, 1]
+        N = np.zeros((T, 4, 2))
+        N[:, 0, 0] = 1.0 / Vp
+        N[:, 1, 0] = -1.0 / Vp
+        N[:, 2, 1] = 1.0 / Vs
+        N[:, 3, 1] = -1.0 / Vs
+    # only the rows of A that survive the reduction are needed
+    A = transformerA[Akey][transformerReducedRows[Bkey]]
+    B = transformerB[Bkey]
+    # compute Ycomp = A x N x B x inv(ZB) x B' x N' x A'
+    # A x N x B is real so B' x N' x A' is just its transpose
+    ANB = np.einsum('ij,tjk,kl->til', A, N, B, optimize=True)
+    return np.einsum('tik,tkl,tjl->tij', ANB, np.linalg.inv(ZB), ANB, optimize=True)
+
+
+def transformerYcomps(designKeys: List[Tuple[str, Tuple]]) -> List[np.ndarray]:
+    # Read-only reduced Ycomp for every (Akey, design) pair. Designs that aren't cached yet are computed with one
+    # transformerYcompBatch call per transformer class.
+    with transformerYcompLock:
+        Ycomps = {}
+        missing = {}
+        for designKey in designKeys:
+            if designKey in transformerYcompCache:
+                transformerYcompCache.move_to_end(designKey)
+                Ycomps[designKey] = transformerYcompCache[designKey]
+            else:
+                missing.setdefault(designKey[0], {})[designKey[1]] = None
+    computed = {}
+    for Akey, designs in missing.items():
+        designs = list(designs)
+        for design, Ycomp in zip(designs, transformerYcompBatch(Akey, designs)):
+            Ycomp.flags.writeable = False
+            computed[Akey, design] = Ycomp
+    with transformerYcompLock:
+        transformerYcompCache.update(computed)
+        while len(transformerYcompCache) > TRANSFORMER_YCOMP_CACHE_SIZE:
+            transformerYcompCache.popitem(last=False)
+    Ycomps.update(computed)
+    return [Ycomps[designKey] for designKey in designKeys]
+
+
+def fillYbus6x6Xfmrs(bus1: str, bus2: str, DY_flag: bool, Ycomp: np.ndarray, Ybus: SparseYbus):
+    nodes1 = Ybus.nodeIds(bus1, threePhases)
+    nodes2 = Ybus.nodeIds(bus2, threePhases)
     # fill Ybus directly from Ycomp
     # first fill the ones that are independent of DY_flag
     # either because the same bus is used or the same phase
-    fillYbusAdd(bus1 + '.1', bus1 + '.1', Ycomp[0, 0], Ybus)
-    fillYbusAdd(bus1 + '.2', bus1 + '.1', Ycomp[1, 0], Ybus)
-    fillYbusAdd(bus1 + '.2', bus1 + '.2', Ycomp[1, 1], Ybus)
-    fillYbusAdd(bus1 + '.3', bus1 + '.1', Ycomp[2, 0], Ybus)
-    fillYbusAdd(bus1 + '.3', bus1 + '.2', Ycomp[2, 1], Ybus)
-    fillYbusAdd(bus1 + '.3', bus1 + '.3', Ycomp[2, 2], Ybus)
-    fillYbusUnique(bus2 + '.1', bus1 + '.1', Ycomp[3, 0], Ybus)
-    fillYbusAdd(bus2 + '.1', bus2 + '.1', Ycomp[3, 3], Ybus)
-    fillYbusUnique(bus2 + '.2', bus1 + '.2', Ycomp[4, 1], Ybus)
-    fillYbusAdd(bus2 + '.2', bus2 + '.1', Ycomp[4, 3], Ybus)
-    fillYbusAdd(bus2 + '.2', bus2 + '.2', Ycomp[4, 4], Ybus)
-    fillYbusUnique(bus2 + '.3', bus1 + '.3', Ycomp[5, 2], Ybus)
-    fillYbusAdd(bus2 + '.3', bus2 + '.1', Ycomp[5, 3], Ybus)
-    fillYbusAdd(bus2 + '.3', bus2 + '.2', Ycomp[5, 4], Ybus)
-    fillYbusAdd(bus2 + '.3', bus2 + '.3', Ycomp[5, 5], Ybus)
+    fillYbusAdd(nodes1[0], nodes1[0], Ycomp[0, 0], Ybus)
+    fillYbusAdd(nodes1[1], nodes1[0], Ycomp[1, 0], Ybus)
+    fillYbusAdd(nodes1[1], nodes1[1], Ycomp[1, 1], Ybus)
+    fillYbusAdd(nodes1[2], nodes1[0], Ycomp[2, 0], Ybus)
+    fillYbusAdd(nodes1[2], nodes1[1], Ycomp[2, 1], Ybus)
+    fillYbusAdd(nodes1[2], nodes1[2], Ycomp[2, 2], Ybus)
+    fillYbusUnique(nodes2[0], nodes1[0], Ycomp[3, 0], Ybus)
+    fillYbusAdd(nodes2[0], nodes2[0], Ycomp[3, 3], Ybus)
+    fillYbusUnique(nodes2[1], nodes1[1], Ycomp[4, 1], Ybus)
+    fillYbusAdd(nodes2[1], nodes2[0], Ycomp[4, 3], Ybus)
+    fillYbusAdd(nodes2[1], nodes2[1], Ycomp[4, 4], Ybus)
+    fillYbusUnique(nodes2[2], nodes1[2], Ycomp[5, 2], Ybus)
+    fillYbusAdd(nodes2[2], nodes2[0], Ycomp[5, 3], Ybus)
+    fillYbusAdd(nodes2[2], nodes2[1], Ycomp[5, 4], Ybus)
+    fillYbusAdd(nodes2[2], nodes2[2], Ycomp[5, 5], Ybus)
     # now fill the ones that are dependent on DY_flag, which
     # are different bus and different phase
     if DY_flag:
-        fillYbusUnique(bus2 + '.1', bus1 + '.2', Ycomp[4, 0], Ybus)
-        fillYbusUnique(bus2 + '.1', bus1 + '.3', Ycomp[5, 0], Ybus)
-        fillYbusUnique(bus2 + '.2', bus1 + '.1', Ycomp[3, 1], Ybus)
-        fillYbusUnique(bus2 + '.2', bus1 + '.3', Ycomp[5, 1], Ybus)
-        fillYbusUnique(bus2 + '.3', bus1 + '.1', Ycomp[3, 2], Ybus)
-        fillYbusUnique(bus2 + '.3', bus1 + '.2', Ycomp[4, 2], Ybus)
+        fillYbusUnique(nodes2[0], nodes1[1], Ycomp[4, 0], Ybus)
+        fillYbusUnique(nodes2[0], nodes1[2], Ycomp[5, 0], Ybus)
+        fillYbusUnique(nodes2[1], nodes1[0], Ycomp[3, 1], Ybus)
+        fillYbusUnique(nodes2[1], nodes1[2], Ycomp[5, 1], Ybus)
+        fillYbusUnique(nodes2[2], nodes1[0], Ycomp[3, 2], Ybus)
+        fillYbusUnique(nodes2[2], nodes1[1], Ycomp[4, 2], Ybus)
     else:
-        fillYbusUnique(bus2 + '.2', bus1 + '.1', Ycomp[4, 0], Ybus)
-        fillYbusUnique(bus2 + '.3', bus1 + '.1', Ycomp[5, 0], Ybus)
-        fillYbusUnique(bus2 + '.1', bus1 + '.2', Ycomp[3, 1], Ybus)
-        fillYbusUnique(bus2 + '.3', bus1 + '.2', Ycomp[5, 1], Ybus)
-        fillYbusUnique(bus2 + '.1', bus1 + '.3', Ycomp[3, 2], Ybus)
-        fillYbusUnique(bus2 + '.2', bus1 + '.3', Ycomp[4, 2], Ybus)
+        fillYbusUnique(nodes2[1], nodes1[0], Ycomp[4, 0], Ybus)
+        fillYbusUnique(nodes2[2], nodes1[0], Ycomp[5, 0], Ybus)
+        fillYbusUnique(nodes2[0], nodes1[1], Ycomp[3, 1], Ybus)
+        fillYbusUnique(nodes2[2], nodes1[1], Ycomp[5, 1], Ybus)
+        fillYbusUnique(nodes2[0], nodes1[2], Ycomp[3, 2], Ybus)
+        fillYbusUnique(nodes2[1], nodes1[2], Ycomp[4, 2], Ybus)
 
 
-def fillYbusPowerTransformerEndXfmrs(distributedArea: DistributedArea, Ybus: Dict):
-    bindings = powerTransformerEndXfmrImpedances(distributedArea)
+def fillYbusPowerTransformerEndXfmrs(cimTables: CimTables, Ybus: SparseYbus):
+    bindings = cimTables.powerTransformers.impedances
     if len(bindings) == 0:
         return
     Mesh_x_ohm = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        Mesh_x_ohm[xfmr_name] = float(obj['mesh_x_ohm']['value'])
-    bindings = powerTransformerEndXfmrNames(distributedArea)
+        xfmr_name = obj.xfmr_name
+        Mesh_x_ohm[xfmr_name] = obj.mesh_x_ohm
+    bindings = cimTables.powerTransformers.ends
     if len(bindings) == 0:
         return
     Bus = {}
@@ -1748,14 +1400,14 @@ def fillYbusPowerTransformerEndXfmrs(distributedArea: DistributedArea, Ybus: Dic
     RatedU = {}
     R_ohm = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        end_number = int(obj['end_number']['value'])
+        xfmr_name = obj.xfmr_name
+        end_number = obj.end_number
         # can't handle 3-winding transformers so issue a warning and skip
         # to the next transformer in that case
         if end_number == 3:
             bus1 = Bus[xfmr_name][1]
             bus2 = Bus[xfmr_name][2]
-            bus3 = obj['bus']['value'].upper()
+            bus3 = obj.bus.upper()
             logger.warn(
                 f'3-winding, 3-phase PowerTransformerEnd transformers are not supported, xfmr: {xfmr_name}, bus1: \
                 {bus1}, bus2: {bus2}, bus3: {bus3}')
@@ -1773,78 +1425,28 @@ def fillYbusPowerTransformerEndXfmrs(distributedArea: DistributedArea, Ybus: Dic
             RatedS[xfmr_name] = {}
             RatedU[xfmr_name] = {}
             R_ohm[xfmr_name] = {}
-        Bus[xfmr_name][end_number] = obj['bus']['value'].upper()
-        Connection[xfmr_name][end_number] = obj['connection']['value']
-        RatedS[xfmr_name][end_number] = int(float(obj['ratedS']['value']))
-        RatedU[xfmr_name][end_number] = int(obj['ratedU']['value'])
-        R_ohm[xfmr_name][end_number] = float(obj['r_ohm']['value'])
-    # initialize B upfront because it's constant
-    B = np.zeros((6, 3))
-    B[0, 0] = B[2, 1] = B[4, 2] = 1.0
-    B[1, 0] = B[3, 1] = B[5, 2] = -1.0
-    # initialize Y and D matrices, also constant, used to set A later
-    Y1 = np.zeros((4, 12))
-    Y1[0, 0] = Y1[1, 4] = Y1[2, 8] = Y1[3, 1] = Y1[3, 5] = Y1[3, 9] = 1.0
-    Y2 = np.zeros((4, 12))
-    Y2[0, 2] = Y2[1, 6] = Y2[2, 10] = Y2[3, 3] = Y2[3, 7] = Y2[3, 11] = 1.0
-    D1 = np.zeros((4, 12))
-    D1[0, 0] = D1[0, 9] = D1[1, 1] = D1[1, 4] = D1[2, 5] = D1[2, 8] = 1.0
-    D2 = np.zeros((4, 12))
-    D2[0, 2] = D2[0, 11] = D2[1, 3] = D2[1, 6] = D2[2, 7] = D2[2, 10] = 1.0
+        Bus[xfmr_name][end_number] = obj.bus.upper()
+        Connection[xfmr_name][end_number] = obj.connection
+        RatedS[xfmr_name][end_number] = int(obj.ratedS)
+        RatedU[xfmr_name][end_number] = obj.ratedU
+        R_ohm[xfmr_name][end_number] = obj.r_ohm
+    designKeys = []
     for xfmr_name in Bus:
-        # Note that division is always floating point in Python 3 even if
-        # operands are integer
-        zBaseP = (RatedU[xfmr_name][1] * RatedU[xfmr_name][1]) / RatedS[xfmr_name][1]
-        r_ohm_pu = R_ohm[xfmr_name][1] / zBaseP
-        mesh_x_ohm_pu = Mesh_x_ohm[xfmr_name] / zBaseP
-        zsc_1V = complex(2.0 * r_ohm_pu, mesh_x_ohm_pu) * (3.0 / RatedS[xfmr_name][1])
-        # initialize ZB
-        ZB = np.zeros((3, 3), dtype=complex)
-        ZB[0, 0] = ZB[1, 1] = ZB[2, 2] = zsc_1V
-        # set both Vp/Vs for N and top/bottom for A
-        if Connection[xfmr_name][1] == 'Y':
-            Vp = RatedU[xfmr_name][1] / math.sqrt(3.0)
-            top = Y1
-        else:
-            Vp = RatedU[xfmr_name][1]
-            top = D1
-        if Connection[xfmr_name][2] == 'Y':
-            Vs = RatedU[xfmr_name][2] / math.sqrt(3.0)
-            bottom = Y2
-        else:
-            Vs = RatedU[xfmr_name][2]
-            bottom = D2
-        # initialize N
-        N = np.zeros((12, 6))
-        N[0, 0] = N[4, 2] = N[8, 4] = 1.0 / Vp
-        N[1, 0] = N[5, 2] = N[9, 4] = -1.0 / Vp
-        N[2, 1] = N[6, 3] = N[10, 5] = 1.0 / Vs
-        N[3, 1] = N[7, 3] = N[11, 5] = -1.0 / Vs
-        # initialize A
-        A = np.vstack((top, bottom))
-        # compute Ycomp = A x N x B x inv(ZB) x B' x N' x A'
-        # there are lots of ways to break this up including not at all, but
-        # here's one way that keeps it from looking overly complex
-        ANB = np.matmul(np.matmul(A, N), B)
-        ANB_invZB = np.matmul(ANB, np.linalg.inv(ZB))
-        ANB_invZB_Bp = np.matmul(ANB_invZB, np.transpose(B))
-        ANB_invZB_BpNp = np.matmul(ANB_invZB_Bp, np.transpose(N))
-        Ycomp = np.matmul(ANB_invZB_BpNp, np.transpose(A))
+        # anything that isn't wye is treated as delta
+        Akey = '3p_' + ''.join('Y' if Connection[xfmr_name][end] == 'Y' else 'D' for end in (1, 2))
+        designKeys.append((Akey, ((RatedS[xfmr_name][1], ), (RatedU[xfmr_name][1], RatedU[xfmr_name][2]),
+                                  (R_ohm[xfmr_name][1], ), (Mesh_x_ohm[xfmr_name], ))))
+    for xfmr_name, Ycomp in zip(Bus, transformerYcomps(designKeys)):
         bus1 = Bus[xfmr_name][1]
         bus2 = Bus[xfmr_name][2]
         # set special case flag that indicates if we need to swap the phases
         # for each bus to do the Ybus matching
         connect_DY_flag = Connection[xfmr_name][1] == 'D' and Connection[xfmr_name][2] == 'Y'
-        # delete row and column 8 and 4 making a 6x6 matrix
-        Ycomp = np.delete(Ycomp, 7, 0)
-        Ycomp = np.delete(Ycomp, 7, 1)
-        Ycomp = np.delete(Ycomp, 3, 0)
-        Ycomp = np.delete(Ycomp, 3, 1)
         fillYbus6x6Xfmrs(bus1, bus2, connect_DY_flag, Ycomp, Ybus)
 
 
-def fillYbusTransformerTankXfmrs(distributedArea: DistributedArea, Ybus: Dict):
-    bindings = transformerTankXfmrRated(distributedArea)
+def fillYbusTransformerTankXfmrs(cimTables: CimTables, Ybus: SparseYbus):
+    bindings = cimTables.transformerTanks.rated
     if len(bindings) == 0:
         return
     RatedS = {}
@@ -1852,74 +1454,42 @@ def fillYbusTransformerTankXfmrs(distributedArea: DistributedArea, Ybus: Dict):
     Connection = {}
     R_ohm = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        enum = int(obj['enum']['value'])
+        xfmr_name = obj.xfmr_name
+        enum = obj.enum
         if xfmr_name not in RatedS:
             RatedS[xfmr_name] = {}
             RatedU[xfmr_name] = {}
             Connection[xfmr_name] = {}
             R_ohm[xfmr_name] = {}
-        RatedS[xfmr_name][enum] = int(float(obj['ratedS']['value']))
-        RatedU[xfmr_name][enum] = int(obj['ratedU']['value'])
-        Connection[xfmr_name][enum] = obj['connection']['value']
-        R_ohm[xfmr_name][enum] = float(obj['r_ohm']['value'])
-    bindings = transformerTankXfmrSct(distributedArea)
+        RatedS[xfmr_name][enum] = int(obj.ratedS)
+        RatedU[xfmr_name][enum] = obj.ratedU
+        Connection[xfmr_name][enum] = obj.connection
+        R_ohm[xfmr_name][enum] = obj.r_ohm
+    bindings = cimTables.transformerTanks.shortCircuitTests
     Leakage_z = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        enum = int(obj['enum']['value'])
+        xfmr_name = obj.xfmr_name
+        enum = obj.enum
         if xfmr_name not in Leakage_z:
             Leakage_z[xfmr_name] = {}
-        Leakage_z[xfmr_name][enum] = float(obj['leakage_z']['value'])
-    bindings = transformerTankXfmrNames(distributedArea)
+        Leakage_z[xfmr_name][enum] = obj.leakage_z
+    bindings = cimTables.transformerTanks.ends
     if len(bindings) == 0:
         return
     Bus = {}
     Phase = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        enum = int(obj['enum']['value'])
+        xfmr_name = obj.xfmr_name
+        enum = obj.enum
         if xfmr_name not in Bus:
             Bus[xfmr_name] = {}
             Phase[xfmr_name] = {}
-        Bus[xfmr_name][enum] = obj['bus']['value'].upper()
-        Phase[xfmr_name][enum] = obj['phase']['value']
-    # initialize different variations of B upfront and then figure out later
-    # which to use for each transformer
-    # 3-phase
-    B = {}
-    B['3p'] = np.zeros((6, 3))
-    B['3p'][0, 0] = B['3p'][2, 1] = B['3p'][4, 2] = 1.0
-    B['3p'][1, 0] = B['3p'][3, 1] = B['3p'][5, 2] = -1.0
-    # logger.debug(B['3p'])
-    # 1-phase, 2-windings
-    B['2w'] = np.zeros((2, 1))
-    B['2w'][0, 0] = 1.0
-    B['2w'][1, 0] = -1.0
-    # 1-phase, 3-windings
-    B['3w'] = np.zeros((3, 2))
-    B['3w'][0, 0] = B['3w'][0, 1] = B['3w'][2, 1] = 1.0
-    B['3w'][1, 0] = -1.0
-    # initialize Y and D matrices, also constant, used to set A for
-    # 3-phase transformers
-    Y1_3p = np.zeros((4, 12))
-    Y1_3p[0, 0] = Y1_3p[1, 4] = Y1_3p[2, 8] = Y1_3p[3, 1] = Y1_3p[3, 5] = Y1_3p[3, 9] = 1.0
-    Y2_3p = np.zeros((4, 12))
-    Y2_3p[0, 2] = Y2_3p[1, 6] = Y2_3p[2, 10] = Y2_3p[3, 3] = Y2_3p[3, 7] = Y2_3p[3, 11] = 1.0
-    D1_3p = np.zeros((4, 12))
-    D1_3p[0, 0] = D1_3p[0, 9] = D1_3p[1, 1] = D1_3p[1, 4] = D1_3p[2, 5] = D1_3p[2, 8] = 1.0
-    D2_3p = np.zeros((4, 12))
-    D2_3p[0, 2] = D2_3p[0, 11] = D2_3p[1, 3] = D2_3p[1, 6] = D2_3p[2, 7] = D2_3p[2, 10] = 1.0
-    # initialize A for each transformer variation
-    A = {}
-    A['2w'] = np.identity(4)
-    A['3w'] = np.identity(6)
-    A['3p_YY'] = np.vstack((Y1_3p, Y2_3p))
-    A['3p_DD'] = np.vstack((D1_3p, D2_3p))
-    A['3p_YD'] = np.vstack((Y1_3p, D2_3p))
-    A['3p_DY'] = np.vstack((D1_3p, Y2_3p))
+        Bus[xfmr_name][enum] = obj.bus.upper()
+        Phase[xfmr_name][enum] = obj.phase
     # map transformer query phase values to nodelist indexes
-    ybusPhaseIdx = {'A': '.1', 'B': '.2', 'C': '.3', 's1': '.1', 's2': '.2'}
+    ybusPhaseIdx = {'A': '1', 'B': '2', 'C': '3', 's1': '1', 's2': '2'}
+    Bkeys = []
+    designKeys = []
     for xfmr_name in Bus:
         # determine the type of transformer to drive the computation
         if Phase[xfmr_name][1] == 'ABC':
@@ -1934,95 +1504,24 @@ def fillYbusTransformerTankXfmrs(distributedArea: DistributedArea, Ybus: Dict):
             # 1-phase, 2-winding
             Bkey = '2w'
             Akey = Bkey
-        # note that division is always floating point in Python 3 even if
-        # operands are integer
-        zBaseP = (RatedU[xfmr_name][1] * RatedU[xfmr_name][1]) / RatedS[xfmr_name][1]
-        zBaseS = (RatedU[xfmr_name][2] * RatedU[xfmr_name][2]) / RatedS[xfmr_name][2]
-        r_ohm_pu = R_ohm[xfmr_name][1] / zBaseP
-        mesh_x_ohm_pu = Leakage_z[xfmr_name][1] / zBaseP
-        if Bkey == '3p':
-            zsc_1V = complex(2.0 * r_ohm_pu, mesh_x_ohm_pu) * (3.0 / RatedS[xfmr_name][1])
-            # initialize ZB
-            ZB = np.zeros((3, 3), dtype=complex)
-            ZB[0, 0] = ZB[1, 1] = ZB[2, 2] = zsc_1V
-            # initialize N
-            if Connection[xfmr_name][1] == 'Y':
-                Vp = RatedU[xfmr_name][1] / math.sqrt(3.0)
-            else:
-                Vp = RatedU[xfmr_name][1]
-            if Connection[xfmr_name][2] == 'Y':
-                Vs = RatedU[xfmr_name][2] / math.sqrt(3.0)
-            else:
-                Vs = RatedU[xfmr_name][2]
-            N = np.zeros((12, 6))
-            N[0, 0] = N[4, 2] = N[8, 4] = 1.0 / Vp
-            N[1, 0] = N[5, 2] = N[9, 4] = -1.0 / Vp
-            N[2, 1] = N[6, 3] = N[10, 5] = 1.0 / Vs
-            N[3, 1] = N[7, 3] = N[11, 5] = -1.0 / Vs
-        elif Bkey == '3w':
-            zsc_1V = complex(3.0 * r_ohm_pu, mesh_x_ohm_pu) * (1.0 / RatedS[xfmr_name][1])
-            zod_1V = complex(2.0 * R_ohm[xfmr_name][2], Leakage_z[xfmr_name][2]) / zBaseS * (1.0 / RatedS[xfmr_name][2])
-            # initialize ZB
-            ZB = np.zeros((2, 2), dtype=complex)
-            ZB[0, 0] = ZB[1, 1] = zsc_1V
-            ZB[1, 0] = ZB[0, 1] = 0.5 * (zsc_1V + zsc_1V - zod_1V)
-            # initialize N
-            Vp = RatedU[xfmr_name][1]
-            Vs1 = RatedU[xfmr_name][2]
-            Vs2 = RatedU[xfmr_name][3]
-            N = np.zeros((6, 3))
-            N[0, 0] = 1.0 / Vp
-            N[1, 0] = -1.0 / Vp
-            N[2, 1] = 1.0 / Vs1
-            N[3, 1] = -1.0 / Vs1
-            N[4, 2] = -1.0 / Vs2
-            N[5, 2] = 1.0 / Vs2
-        else:
-            zsc_1V = complex(2.0 * r_ohm_pu, mesh_x_ohm_pu) * (1.0 / RatedS[xfmr_name][1])
-            # initialize ZB
-            ZB = np.zeros((1, 1), dtype=complex)
-            ZB[0, 0] = zsc_1V
-            # initialize N
-            Vp = RatedU[xfmr_name][1]
-            Vs = RatedU[xfmr_name][2]
-            N = np.zeros((4, 2))
-            N[0, 0] = 1.0 / Vp
-            N[1, 0] = -1.0 / Vp
-            N[2, 1] = 1.0 / Vs
-            N[3, 1] = -1.0 / Vs
-        # compute Ycomp = A x N x B x inv(ZB) x B' x N' x A'
-        # there are lots of ways to break this up including not at all, but
-        # here's one way that keeps it from looking overly complex
-        ANB = np.matmul(np.matmul(A[Akey], N), B[Bkey])
-        ANB_invZB = np.matmul(ANB, np.linalg.inv(ZB))
-        ANB_invZB_Bp = np.matmul(ANB_invZB, np.transpose(B[Bkey]))
-        ANB_invZB_BpNp = np.matmul(ANB_invZB_Bp, np.transpose(N))
-        Ycomp = np.matmul(ANB_invZB_BpNp, np.transpose(A[Akey]))
-        # do Ybus comparisons and determine overall transformer status color
-        xfmrColorIdx = 0
+        # the ratings, resistances and leakage impedances of the secondary only matter for split phase transformers
+        windings = (1, 2) if Bkey == '3w' else (1, )
+        voltages = (1, 2, 3) if Bkey == '3w' else (1, 2)
+        Bkeys.append(Bkey)
+        designKeys.append(
+            (Akey, (tuple(RatedS[xfmr_name][end] for end in windings),
+                    tuple(RatedU[xfmr_name][end] for end in voltages), tuple(R_ohm[xfmr_name][end] for end in windings),
+                    tuple(Leakage_z[xfmr_name][end] for end in windings))))
+    # every design of a transformer class is computed in one stack before any of them are stamped
+    for xfmr_name, Bkey, (Akey, _), Ycomp in zip(Bus, Bkeys, designKeys, transformerYcomps(designKeys)):
         if Bkey == '3p':
             bus1 = Bus[xfmr_name][1]
             bus2 = Bus[xfmr_name][2]
-            # delete row and column 8 and 4 making a 6x6 matrix
-            Ycomp = np.delete(Ycomp, 7, 0)
-            Ycomp = np.delete(Ycomp, 7, 1)
-            Ycomp = np.delete(Ycomp, 3, 0)
-            Ycomp = np.delete(Ycomp, 3, 1)
             fillYbus6x6Xfmrs(bus1, bus2, Akey == '3p_DY', Ycomp, Ybus)
         elif Bkey == '3w':
-            bus1 = Bus[xfmr_name][1] + ybusPhaseIdx[Phase[xfmr_name][1]]
-            bus2 = Bus[xfmr_name][2] + ybusPhaseIdx[Phase[xfmr_name][2]]
-            bus3 = Bus[xfmr_name][3] + ybusPhaseIdx[Phase[xfmr_name][3]]
-            # split phase transformers are a bit tricky, but Shiva
-            # figured out how it needs to be done with reducing the
-            # matrix and how the 3 buses come into it
-            # delete row and column 5, 4, and 2 making a 3x3 matrix
-            Ycomp = np.delete(Ycomp, 4, 0)
-            Ycomp = np.delete(Ycomp, 4, 1)
-            Ycomp = np.delete(Ycomp, 3, 0)
-            Ycomp = np.delete(Ycomp, 3, 1)
-            Ycomp = np.delete(Ycomp, 1, 0)
-            Ycomp = np.delete(Ycomp, 1, 1)
+            bus1 = Ybus.nodeId(Bus[xfmr_name][1], ybusPhaseIdx[Phase[xfmr_name][1]])
+            bus2 = Ybus.nodeId(Bus[xfmr_name][2], ybusPhaseIdx[Phase[xfmr_name][2]])
+            bus3 = Ybus.nodeId(Bus[xfmr_name][3], ybusPhaseIdx[Phase[xfmr_name][3]])
             fillYbusAdd(bus1, bus1, Ycomp[0, 0], Ybus)
             fillYbusUnique(bus2, bus1, Ycomp[1, 0], Ybus)
             fillYbusAdd(bus2, bus2, Ycomp[1, 1], Ybus)
@@ -2030,192 +1529,210 @@ def fillYbusTransformerTankXfmrs(distributedArea: DistributedArea, Ybus: Dict):
             fillYbusAdd(bus3, bus2, Ycomp[2, 1], Ybus)
             fillYbusAdd(bus3, bus3, Ycomp[2, 2], Ybus)
         else:
-            bus1 = Bus[xfmr_name][1] + ybusPhaseIdx[Phase[xfmr_name][1]]
-            bus2 = Bus[xfmr_name][2] + ybusPhaseIdx[Phase[xfmr_name][2]]
-            Yval = Ycomp[2, 0]
-            # delete row and column 4 and 2 making a 2x2 matrix
-            Ycomp = np.delete(Ycomp, 3, 0)
-            Ycomp = np.delete(Ycomp, 3, 1)
-            Ycomp = np.delete(Ycomp, 1, 0)
-            Ycomp = np.delete(Ycomp, 1, 1)
+            bus1 = Ybus.nodeId(Bus[xfmr_name][1], ybusPhaseIdx[Phase[xfmr_name][1]])
+            bus2 = Ybus.nodeId(Bus[xfmr_name][2], ybusPhaseIdx[Phase[xfmr_name][2]])
             fillYbusAdd(bus1, bus1, Ycomp[0, 0], Ybus)
             fillYbusUnique(bus2, bus1, Ycomp[1, 0], Ybus)
             fillYbusAdd(bus2, bus2, Ycomp[1, 1], Ybus)
 
 
-def fillYbusUniqueSwitches(bus1: str, bus2: str, Ybus: Dict):
-    if bus1 not in Ybus:
-        Ybus[bus1] = {}
-    if bus2 not in Ybus:
-        Ybus[bus2] = {}
-    if bus2 in Ybus[bus1]:
-        logger.warn(f'Unexpected existing value found for Ybus[{bus1}][{bus2}] when filling switching equipment value')
-    Ybus[bus1][bus2] = Ybus[bus2][bus1] = complex(-500.0, 500.0)
-
-
-def fillYbusAddSwitches(bus1: str, bus2: str, Ybus: Dict):
-    if bus1 not in Ybus:
-        Ybus[bus1] = {}
-    if bus2 not in Ybus:
-        Ybus[bus2] = {}
-    if bus2 in Ybus[bus1]:
-        Ybus[bus1][bus2] += complex(500.0, -500.0)
-        Ybus[bus2][bus1] = Ybus[bus1][bus2]
-    else:
-        Ybus[bus1][bus2] = Ybus[bus2][bus1] = complex(500.0, -500.0)
+def fillYbusUniqueSwitches(node1: int, node2: int, Ybus: SparseYbus):
+    Ybus.stamp(node1, node2, complex(-500.0, 500.0), UNIQUE)
 
 
-def fillYbusNoSwapSwitches(bus1: str, bus2: str, is_Open: bool, Ybus: Dict):
+def fillYbusAddSwitches(node1: int, node2: int, Ybus: SparseYbus):
+    Ybus.stamp(node1, node2, complex(500.0, -500.0), ADD)
+
+
+def fillYbusNoSwapSwitches(bus1: str, bus2: str, phase: str, is_Open: bool, Ybus: SparseYbus):
     if not is_Open:
-        fillYbusUniqueSwitches(bus2, bus1, Ybus)
-        fillYbusAddSwitches(bus1, bus1, Ybus)
-        fillYbusAddSwitches(bus2, bus2, Ybus)
+        node1 = Ybus.nodeId(bus1, phase)
+        node2 = Ybus.nodeId(bus2, phase)
+        fillYbusUniqueSwitches(node2, node1, Ybus)
+        fillYbusAddSwitches(node1, node1, Ybus)
+        fillYbusAddSwitches(node2, node2, Ybus)
+
+
+# map switch query phase values to nodelist indexes
+switchPhaseIdx = {'A': '1', 'B': '2', 'C': '3'}
+
+
+def switchPhases(obj: SwitchRecord) -> List[str]:
+    if obj.phases_side1 == '':
+        # 3-phase switch
+        return list(threePhases)
+    # 1- or 2-phase switch
+    return [switchPhaseIdx[phase] for phase in obj.phases_side1 if phase in switchPhaseIdx]
 
 
-def fillYbusSwitchingEquipmentSwitches(distributedArea: DistributedArea, Ybus: Dict):
-    bindings = switchingEquipmentSwitchNames(distributedArea)
+def fillYbusSwitchingEquipmentSwitches(cimTables: CimTables, Ybus: SparseYbus):
+    bindings = cimTables.switches
     if len(bindings) == 0:
         return
-    # map transformer query phase values to nodelist indexes
-    ybusPhaseIdx = {'A': '.1', 'B': '.2', 'C': '.3'}
     for obj in bindings:
-        sw_name = obj['sw_name']['value']
-        is_Open = obj['is_Open']['value'].upper() == 'TRUE'
-        bus1 = obj['bus1']['value'].upper()
-        bus2 = obj['bus2']['value'].upper()
-        phases_side1 = obj['phases_side1']['value']
-        if phases_side1 == '':
-            # 3-phase switch
-            fillYbusNoSwapSwitches(bus1 + '.1', bus2 + '.1', is_Open, Ybus)
-            fillYbusNoSwapSwitches(bus1 + '.2', bus2 + '.2', is_Open, Ybus)
-            fillYbusNoSwapSwitches(bus1 + '.3', bus2 + '.3', is_Open, Ybus)
+        bus1 = obj.bus1.upper()
+        bus2 = obj.bus2.upper()
+        phases = switchPhases(obj)
+        # the node names of every switch are kept with the Ybus so a later state change can be patched in
+        switch = Ybus.switches.setdefault(obj.sw_name, {"open": obj.is_Open, "nodes": []})
+        switch["nodes"].extend([bus1 + '.' + phase, bus2 + '.' + phase] for phase in phases)
+        for phase in phases:
+            fillYbusNoSwapSwitches(bus1, bus2, phase, obj.is_Open, Ybus)
+
+
+def patchYbusDict(ybusDict: Dict, bus1: str, bus2: str, Yval: complex, changes: Dict):
+    # adds Yval to an entry of the {bus1: {bus2: (real, imag)}} view and its mirror, recording the new values in
+    # changes. Entries that cancel out completely, like those of a node only reached through an opened switch, are
+    # removed and recorded as None.
+    for row, col in {(bus1, bus2), (bus2, bus1)}:
+        rowEntries = ybusDict.setdefault(row, {})
+        oldVal = rowEntries.get(col)
+        newVal = Yval if oldVal is None else complex(oldVal[0], oldVal[1]) + Yval
+        if newVal == 0:
+            rowEntries.pop(col, None)
+            if len(rowEntries) == 0:
+                del ybusDict[row]
+            changes.setdefault(row, {})[col] = None
         else:
-            # 1- or 2-phase switch
-            switchColorIdx = 0
-            for phase in phases_side1:
-                if phase in ybusPhaseIdx:
-                    fillYbusNoSwapSwitches(bus1 + ybusPhaseIdx[phase], bus2 + ybusPhaseIdx[phase], is_Open, Ybus)
-
-
-def fillYbusOnlyAddShunts(bus: str, Yval: complex, Ybus: Dict):
+            rowEntries[col] = (newVal.real, newVal.imag)
+            changes.setdefault(row, {})[col] = rowEntries[col]
+
+
+def applySwitchState(Ybus: SparseYbus, ybusDict: Dict, switchName: str, isOpen: bool) -> Dict:
+    # Patches the contribution of one switch into the Ybus and its dict view in O(phases) and returns the changed
+    # entries. The contribution mirrors fillYbusNoSwapSwitches so the result matches a full rebuild as long as no
+    # other equipment stamps the switch's off-diagonal entries.
+    switch = Ybus.switches.get(switchName)
+    if switch is None:
+        errorStr = f"Switch {switchName} is not part of the Ybus for this area."
+        logger.error(errorStr)
+        raise KeyError(errorStr)
+    changes = {}
+    if switch["open"] == isOpen:
+        return changes
+    sign = -1.0 if isOpen else 1.0
+    for bus1, bus2 in switch["nodes"]:
+        for row, col, Yval in [(bus2, bus1, complex(-500.0, 500.0)), (bus1, bus1, complex(500.0, -500.0)),
+                               (bus2, bus2, complex(500.0, -500.0))]:
+            Ybus.patch(row, col, sign * Yval)
+            patchYbusDict(ybusDict, row, col, sign * Yval, changes)
+    switch["open"] = isOpen
+    return changes
+
+
+def fillYbusOnlyAddShunts(bus: str, phase: str, Yval: complex, Ybus: SparseYbus):
     if Yval == 0j:
         return
-    if bus not in Ybus or bus not in Ybus[bus]:
-        logger.warn(f'Existing value not found for Ybus[{bus}][{bus}] when adding shunt element model contribution')
-        return
-    Ybus[bus][bus] += Yval
+    # the contribution is dropped with a warning when Ybus[bus][bus] doesn't exist once the matrix is reduced
+    node = Ybus.nodeId(bus, phase)
+    Ybus.stamp(node, node, Yval, SHUNT)
 
 
-def fillYbusShuntElementShunts(distributedArea: DistributedArea, Ybus: Dict):
+def fillYbusShuntElementShunts(cimTables: CimTables, Ybus: SparseYbus):
     # map query phase values to nodelist indexes
-    ybusPhaseIdx = {'A': '.1', 'B': '.2', 'C': '.3', 's1': '.1', 's2': '.2'}
+    ybusPhaseIdx = {'A': '1', 'B': '2', 'C': '3', 's1': '1', 's2': '2'}
+    # the dictionaries below are keyed by (bus, phase) nodes
     # CAPACITORS DATA STRUCTURES INITIALIZATION
-    bindings = shuntElementCapNames(distributedArea)
+    bindings = cimTables.shunts
     Cap_name = {}
     B_per_section = {}
     for obj in bindings:
-        cap_name = obj['cap_name']['value']
-        B_per_section[cap_name] = float(obj['b_per_section']['value'])
-        bus = obj['bus']['value'].upper()
-        phase = 'ABC'    # no phase specified indicates 3-phase
-        if 'phase' in obj:
-            phase = obj['phase']['value']
+        cap_name = obj.cap_name
+        B_per_section[cap_name] = obj.b_per_section
+        bus = obj.bus.upper()
+        phase = obj.phase
         if phase == 'ABC':    # 3-phase
-            if bus + '.1' not in Cap_name:
-                Cap_name[bus + '.1'] = []
-                Cap_name[bus + '.2'] = []
-                Cap_name[bus + '.3'] = []
-            Cap_name[bus + '.1'].append(cap_name)
-            Cap_name[bus + '.2'].append(cap_name)
-            Cap_name[bus + '.3'].append(cap_name)
+            if (bus, '1') not in Cap_name:
+                Cap_name[(bus, '1')] = []
+                Cap_name[(bus, '2')] = []
+                Cap_name[(bus, '3')] = []
+            Cap_name[(bus, '1')].append(cap_name)
+            Cap_name[(bus, '2')].append(cap_name)
+            Cap_name[(bus, '3')].append(cap_name)
         else:    # specified phase only
-            if bus + ybusPhaseIdx[phase] not in Cap_name:
-                Cap_name[bus + ybusPhaseIdx[phase]] = []
-            Cap_name[bus + ybusPhaseIdx[phase]].append(cap_name)
+            if (bus, ybusPhaseIdx[phase]) not in Cap_name:
+                Cap_name[(bus, ybusPhaseIdx[phase])] = []
+            Cap_name[(bus, ybusPhaseIdx[phase])].append(cap_name)
     # TRANSFORMERS DATA STRUCTURES INITIALIZATION
-    bindings = transformerTankXfmrRated(distributedArea)
+    bindings = cimTables.transformerTanks.rated
     # TransformerTank queries
     RatedS_tank = {}
     RatedU_tank = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        enum = int(obj['enum']['value'])
+        xfmr_name = obj.xfmr_name
+        enum = obj.enum
         if xfmr_name not in RatedS_tank:
             RatedS_tank[xfmr_name] = {}
             RatedU_tank[xfmr_name] = {}
-        RatedS_tank[xfmr_name][enum] = int(float(obj['ratedS']['value']))
-        RatedU_tank[xfmr_name][enum] = int(obj['ratedU']['value'])
-    bindings = transformerTankXfmrNlt(distributedArea)
+        RatedS_tank[xfmr_name][enum] = int(obj.ratedS)
+        RatedU_tank[xfmr_name][enum] = obj.ratedU
+    bindings = cimTables.transformerTanks.noLoadTests
     Noloadloss = {}
     I_exciting = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        Noloadloss[xfmr_name] = float(obj['noloadloss_kW']['value'])
-        I_exciting[xfmr_name] = float(obj['i_exciting']['value'])
-    bindings = transformerTankXfmrNames(distributedArea)
+        xfmr_name = obj.xfmr_name
+        Noloadloss[xfmr_name] = obj.noloadloss_kW
+        I_exciting[xfmr_name] = obj.i_exciting
+    bindings = cimTables.transformerTanks.ends
     Xfmr_tank_name = {}
     Enum_tank = {}
     BaseV_tank = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        enum = int(obj['enum']['value'])
-        bus = obj['bus']['value'].upper()
-        baseV = float(obj['baseV']['value'])
+        xfmr_name = obj.xfmr_name
+        enum = obj.enum
+        bus = obj.bus.upper()
+        baseV = obj.baseV
         if xfmr_name not in Enum_tank:
             Enum_tank[xfmr_name] = {}
             BaseV_tank[xfmr_name] = {}
         Enum_tank[xfmr_name][bus] = enum
         BaseV_tank[xfmr_name][bus] = baseV
-        phase = obj['phase']['value']
+        phase = obj.phase
         if phase == 'ABC':
-            if bus + '.1' not in Xfmr_tank_name:
-                Xfmr_tank_name[bus + '.1'] = []
-                Xfmr_tank_name[bus + '.2'] = []
-                Xfmr_tank_name[bus + '.3'] = []
-            Xfmr_tank_name[bus + '.1'].append(xfmr_name)
-            Xfmr_tank_name[bus + '.2'].append(xfmr_name)
-            Xfmr_tank_name[bus + '.3'].append(xfmr_name)
+            # a single phase tank may already be connected to one of the phases of this bus
+            for phaseIdx in ('1', '2', '3'):
+                Xfmr_tank_name.setdefault((bus, phaseIdx), []).append(xfmr_name)
         else:
-            if bus + ybusPhaseIdx[phase] not in Xfmr_tank_name:
-                Xfmr_tank_name[bus + ybusPhaseIdx[phase]] = []
-            Xfmr_tank_name[bus + ybusPhaseIdx[phase]].append(xfmr_name)
+            if (bus, ybusPhaseIdx[phase]) not in Xfmr_tank_name:
+                Xfmr_tank_name[(bus, ybusPhaseIdx[phase])] = []
+            Xfmr_tank_name[(bus, ybusPhaseIdx[phase])].append(xfmr_name)
     # TransformerEnd queries
-    bindings = powerTransformerEndXfmrAdmittances(distributedArea)
+    bindings = cimTables.powerTransformers.admittances
     B_S = {}
     G_S = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        B_S[xfmr_name] = float(obj['b_S']['value'])
-        G_S[xfmr_name] = float(obj['g_S']['value'])
-    bindings = powerTransformerEndXfmrNames(distributedArea)
+        xfmr_name = obj.xfmr_name
+        B_S[xfmr_name] = obj.b_S
+        G_S[xfmr_name] = obj.g_S
+    bindings = cimTables.powerTransformers.ends
     Xfmr_end_name = {}
     RatedU_end = {}
     Enum_end = {}
     for obj in bindings:
-        xfmr_name = obj['xfmr_name']['value']
-        enum = int(obj['end_number']['value'])
-        bus = obj['bus']['value'].upper()
-        if bus + '.1' not in Xfmr_end_name:
-            Xfmr_end_name[bus + '.1'] = []
-            Xfmr_end_name[bus + '.2'] = []
-            Xfmr_end_name[bus + '.3'] = []
-        Xfmr_end_name[bus + '.1'].append(xfmr_name)
-        Xfmr_end_name[bus + '.2'].append(xfmr_name)
-        Xfmr_end_name[bus + '.3'].append(xfmr_name)
+        xfmr_name = obj.xfmr_name
+        enum = obj.end_number
+        bus = obj.bus.upper()
+        if (bus, '1') not in Xfmr_end_name:
+            Xfmr_end_name[(bus, '1')] = []
+            Xfmr_end_name[(bus, '2')] = []
+            Xfmr_end_name[(bus, '3')] = []
+        Xfmr_end_name[(bus, '1')].append(xfmr_name)
+        Xfmr_end_name[(bus, '2')].append(xfmr_name)
+        Xfmr_end_name[(bus, '3')].append(xfmr_name)
         if xfmr_name not in Enum_end:
             Enum_end[xfmr_name] = {}
             RatedU_end[xfmr_name] = {}
         Enum_end[xfmr_name][bus] = enum
-        RatedU_end[xfmr_name][enum] = int(obj['ratedU']['value'])
+        RatedU_end[xfmr_name][enum] = obj.ratedU
     for node in Cap_name:
         sum_shunt_imag = 0.0
         for cap in Cap_name[node]:
             # no real component contribution for capacitors
             sum_shunt_imag += B_per_section[cap]
-        fillYbusOnlyAddShunts(node, complex(0.0, sum_shunt_imag), Ybus)
+        fillYbusOnlyAddShunts(*node, complex(0.0, sum_shunt_imag), Ybus)
     for node in Xfmr_tank_name:
         sum_shunt_imag = sum_shunt_real = 0.0
-        bus = node.split('.')[0]
+        bus = node[0]
         for xfmr in Xfmr_tank_name[node]:
             if Enum_tank[xfmr][bus] >= 2:
                 ratedU_sq = RatedU_tank[xfmr][2] * RatedU_tank[xfmr][2]
@@ -2229,17 +1746,17 @@ def fillYbusShuntElementShunts(distributedArea: DistributedArea, Ybus: Dict):
                 except:
                     B_m = Ym
                 sum_shunt_imag += -B_m
-        fillYbusOnlyAddShunts(node, complex(sum_shunt_real, sum_shunt_imag), Ybus)
+        fillYbusOnlyAddShunts(*node, complex(sum_shunt_real, sum_shunt_imag), Ybus)
     for node in Xfmr_end_name:
         sum_shunt_imag = sum_shunt_real = 0.0
-        bus = node.split('.')[0]
+        bus = node[0]
         for xfmr in Xfmr_end_name[node]:
             if Enum_end[xfmr][bus] == 2:
                 ratedU_ratio = RatedU_end[xfmr][1] / RatedU_end[xfmr][2]
                 ratedU_sq = ratedU_ratio * ratedU_ratio
                 sum_shunt_real += G_S[xfmr] * ratedU_sq
                 sum_shunt_imag += -B_S[xfmr] * ratedU_sq
-        fillYbusOnlyAddShunts(node, complex(sum_shunt_real, sum_shunt_imag), Ybus)
+        fillYbusOnlyAddShunts(*node, complex(sum_shunt_real, sum_shunt_imag), Ybus)
 
 
 def countUniqueYbus(Ybus):
@@ -2262,41 +1779,177 @@ def makeYbusSerializable(Ybus: Dict):
             Ybus[bus1][bus2] = (yVal.real, yVal.imag)
 
 
-def calculateYbus(distributedArea: DistributedArea) -> Dict:
-    Ybus = {}
-    areaID = distributedArea.container.mRID
-    fillYbusPerLengthPhaseImpedanceLines(distributedArea, Ybus)
-    logger.debug(f"Ybus for {areaID} after fillYbusPerLengthPhaseImpedanceLines is:\n"
-                 f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
-    fillYbusPerLengthSequenceImpedanceLines(distributedArea, Ybus)
-    logger.debug(f"Ybus for {areaID} after fillYbusPerLengthSequenceImpedanceLines is:\n"
-                 f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
-    fillYbusACLineSegmentLines(distributedArea, Ybus)
-    logger.debug(f"Ybus for {areaID} after fillYbusACLineSegmentLines is:\n"
-                 f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
-    fillYbusWireInfoAndWireSpacingInfoLines(distributedArea, Ybus)
-    logger.debug(f"Ybus for {areaID} after fillYbusWireInfoAndWireSpacingInfoLines is:\n"
-                 f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
-    line_count = countUniqueYbus(Ybus)
-    logger.debug(f'Line_model # entries: {line_count}')
-    fillYbusPowerTransformerEndXfmrs(distributedArea, Ybus)
-    logger.debug(f"Ybus for {areaID} after fillYbusPowerTransformerEndXfmrs is:\n"
-                 f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
-    fillYbusTransformerTankXfmrs(distributedArea, Ybus)
-    logger.debug(f"Ybus for {areaID} after fillYbusTransformerTankXfmrs is:\n"
-                 f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
-    count = countUniqueYbus(Ybus)
-    xfmr_count = count - line_count
-    logger.debug(f'Power_transformer # entries: {xfmr_count}')
-    fillYbusSwitchingEquipmentSwitches(distributedArea, Ybus)
-    logger.debug(f"Ybus for {areaID} after fillYbusSwitchingEquipmentSwitches is:\n"
-                 f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
-    count = countUniqueYbus(Ybus)
-    switch_count = count - line_count - xfmr_count
-    logger.debug(f'Switching_equipment # entries: {switch_count}')
-    fillYbusShuntElementShunts(distributedArea, Ybus)
-    logger.debug(f"Ybus for {areaID} after fillYbusShuntElementShunts is:\n"
-                 f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
-    logger.debug('Shunt_element contributions added (no new entries)')
-    makeYbusSerializable(Ybus)
+def areaEquipmentIDs(distributedArea: DistributedArea) -> Set[str]:
+    return {
+        mRID
+        for cimClass, objects in distributedArea.graph.items() if issubclass(cimClass, cim.Equipment)
+        for mRID in objects
+    }
+
+
+class EquipmentFilteredArea:
+    # Read-only view of a distributed area without the equipment in excludedIDs. It has just the graph and container
+    # that CimTables uses, so the Ybus of an area can be calculated without equipment another area already covers.
+
+    def __init__(self, distributedArea: DistributedArea, excludedIDs: Set[str]):
+        self.container = distributedArea.container
+        self.graph = {}
+        for cimClass, objects in distributedArea.graph.items():
+            if issubclass(cimClass, cim.Equipment):
+                objects = {mRID: obj for mRID, obj in objects.items() if mRID not in excludedIDs}
+            self.graph[cimClass] = objects
+
+
+def calculateHierarchicalSparseYbus(distributedArea: DistributedArea, childYbuses: Iterable[SparseYbus],
+                                    childEquipmentIDs: Set[str]) -> SparseYbus:
+    # The child Ybuses are merged first and only the equipment no child covers is stamped on top of them, so boundary
+    # nodes sum every area's contribution and shunts see the diagonals the children provide.
+    Ybus = SparseYbus()
+    for childYbus in childYbuses:
+        Ybus.merge(childYbus)
+    boundaryArea = EquipmentFilteredArea(distributedArea, childEquipmentIDs)
+    return assembleSparseYbus(CimTables(boundaryArea), Ybus=Ybus)
+
+
+def estimateYbusTripletCount(distributedArea: DistributedArea) -> int:
+    # a fully coupled 3-phase branch stamps 21 upper triangle triplets so size for that plus some headroom
+    equipmentClasses = [
+        cim.ACLineSegment, cim.PowerTransformer, cim.TransformerTank, cim.LoadBreakSwitch, cim.Recloser, cim.Breaker,
+        cim.Fuse, cim.Sectionaliser, cim.Jumper, cim.Disconnector, cim.GroundDisconnector, cim.LinearShuntCompensator
+    ]
+    equipmentCount = 0
+    for equipmentClass in equipmentClasses:
+        equipmentCount += len(distributedArea.graph.get(equipmentClass, {}))
+    return 24 * equipmentCount
+
+
+# fill stages in the order they have to be applied, the shunt stage must be last since it only adds to existing
+# diagonal entries
+ybusFillStages = [
+    ("fillYbusPerLengthPhaseImpedanceLines", fillYbusPerLengthPhaseImpedanceLines),
+    ("fillYbusPerLengthSequenceImpedanceLines", fillYbusPerLengthSequenceImpedanceLines),
+    ("fillYbusACLineSegmentLines", fillYbusACLineSegmentLines),
+    ("fillYbusWireInfoAndWireSpacingInfoLines", fillYbusWireInfoAndWireSpacingInfoLines),
+    ("fillYbusPowerTransformerEndXfmrs", fillYbusPowerTransformerEndXfmrs),
+    ("fillYbusTransformerTankXfmrs", fillYbusTransformerTankXfmrs),
+    ("fillYbusSwitchingEquipmentSwitches", fillYbusSwitchingEquipmentSwitches),
+    ("fillYbusShuntElementShunts", fillYbusShuntElementShunts),
+]
+# fill stages that only depend on the CIM tables, they run at the same time into their own buffers which are merged
+# into the Ybus in ybusFillStages order before the shunt stage reads the diagonals
+ybusIndependentStages = {stageName for stageName, _ in ybusFillStages[:-1]}
+# threads running the independent fill stages of one calculation, 1 runs every stage in sequence on the calling thread.
+# Most of the stage time is Python stamping that holds the GIL, so more threads are opt-in.
+ybusStageThreads = 1
+# debug entry counts reported after the last stage of each equipment category
+ybusEntryCategories = {
+    "fillYbusWireInfoAndWireSpacingInfoLines": "Line_model",
+    "fillYbusTransformerTankXfmrs": "Power_transformer",
+    "fillYbusSwitchingEquipmentSwitches": "Switching_equipment"
+}
+# area mRIDs whose Ybus is dumped in full after every fill stage
+ybusDumpAreas = set()
+
+
+def enableYbusDump(areaID: str):
+    ybusDumpAreas.add(areaID)
+
+
+def disableYbusDump(areaID: str):
+    ybusDumpAreas.discard(areaID)
+
+
+def setYbusStageThreads(threadCount: int):
+    global ybusStageThreads
+    ybusStageThreads = max(int(threadCount), 1)
+
+
+def runFillStage(fillStage, cimTables: CimTables) -> Tuple[SparseYbus, Dict]:
+    timer = StageTimer()
+    stageYbus = SparseYbus()
+    fillStage(cimTables, stageYbus)
+    return stageYbus, timer.stop()
+
+
+def calculateSparseYbus(distributedArea: DistributedArea) -> SparseYbus:
+    return assembleSparseYbus(CimTables(distributedArea), estimateYbusTripletCount(distributedArea))
+
+
+def assembleSparseYbus(cimTables: CimTables,
+                       capacity: int = 1024,
+                       Ybus: Optional[SparseYbus] = None,
+                       stageBuffers: Optional[Dict[str, List[SparseYbus]]] = None) -> SparseYbus:
+    # runs the fill stages over already built tables, so a materialized CimTables can be assembled in another process.
+    # The stages in stageBuffers were already filled elsewhere and only have their buffers merged.
+    if Ybus is None:
+        Ybus = SparseYbus(capacity)
+    areaID = cimTables.areaID
+    dumpYbus = areaID in ybusDumpAreas
+    stageSummaries = []
+    # triplet count before the first stage and after each one for the entry counts
+    tripletEnds = [Ybus.tripletCount]
+    stageThreads = min(ybusStageThreads, len(ybusIndependentStages)) if stageBuffers is None else 1
+    calculationStart = time.perf_counter()
+    stagePool = None
+    stageFutures: Dict[str, Future] = {}
+    if stageThreads > 1:
+        cimTables.extractAll()
+        stagePool = ThreadPoolExecutor(max_workers=stageThreads, thread_name_prefix="YbusStage")
+        stageFutures = {
+            stageName: stagePool.submit(runFillStage, fillStage, cimTables)
+            for stageName, fillStage in ybusFillStages if stageName in ybusIndependentStages
+        }
+    try:
+        for stageName, fillStage in ybusFillStages:
+            tripletCount = Ybus.tripletCount
+            if stageBuffers is not None and stageName in stageBuffers:
+                timer = StageTimer()
+                for stageYbus in stageBuffers[stageName]:
+                    Ybus.appendTriplets(stageYbus)
+                stageMetrics = timer.stop()
+            elif stageName in stageFutures:
+                # merged in stage order so unique entries resolve exactly as they do when filling in sequence
+                stageYbus, stageMetrics = stageFutures[stageName].result()
+                Ybus.appendTriplets(stageYbus)
+            else:
+                timer = StageTimer()
+                fillStage(cimTables, Ybus)
+                stageMetrics = timer.stop()
+            stageSummaries.append({
+                "stage": stageName,
+                **stageMetrics, "triplets": Ybus.tripletCount - tripletCount,
+                "nodes": Ybus.nodeCount
+            })
+            tripletEnds.append(Ybus.tripletCount)
+            if dumpYbus:
+                logger.info(f"Ybus for {areaID} after {stageName} is:\n"
+                            f"{json.dumps(Ybus, indent=4, sort_keys=True, cls=ComplexEncoder)}")
+    finally:
+        if stagePool is not None:
+            stagePool.shutdown(cancel_futures=True)
+    # entries each stage added, counted once from the triplets instead of reducing the matrix after every stage. The
+    # first count is of the entries the Ybus already had before the first stage.
+    entryCounts = Ybus.newEntryCounts(tripletEnds)
+    categoryEntries = entryCounts[0]
+    for stageSummary, stageEntries in zip(stageSummaries, entryCounts[1:]):
+        stageSummary["entries"] = stageEntries
+        categoryEntries += stageEntries
+        if stageSummary["stage"] in ybusEntryCategories:
+            logger.debug(f'{ybusEntryCategories[stageSummary["stage"]]} # entries: {categoryEntries}')
+            categoryEntries = 0
+    Ybus.summary = {
+        "area": areaID,
+        "nodes": Ybus.nodeCount,
+        "entries": Ybus.countUnique(),
+        "triplets": Ybus.tripletCount,
+        "seconds": round(time.perf_counter() - calculationStart, 6),
+        "stageThreads": stageThreads,
+        "stages": stageSummaries,
+        "tables": list(cimTables.tableMetrics)
+    }
+    logger.info(f"Ybus summary for {areaID}: {json.dumps(Ybus.summary)}")
     return Ybus
+
+
+def calculateYbus(distributedArea: DistributedArea) -> Dict:
+    return calculateSparseYbus(distributedArea).toDict()